@@ -1,24 +1,52 @@
-import subprocess
+from collections import namedtuple
+import mmap
 
-from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.elffile import AR_MAGIC, AR_THIN_MAGIC, archive_members, ELF_MAGIC, ElfError
+
+# member of the archive, offset of its data in the archive (None for the
+# members of thin archives, their data is not stored in the archive)
+ArMember = namedtuple('ArMember', ['name', 'offset', 'size', 'is_elf'])
 
 
 class ArParser:
     """
-    Class contains all information obtained by ar command.
+    Class contains the list of the members of an ar archive (a static library)
+    read directly from the mapped file.
+
+    Both the GNU and BSD variants of the format are supported including
+    their long member names and thin archives.
     """
 
     def __init__(self, pkgfile_path):
         self.pkgfile_path = pkgfile_path
         self.objects = []
+        self.members = []
+        self.is_thin = False
         self.parsing_failed_reason = None
         self.parse()
 
-    def parse(self):
-        r = subprocess.run(['ar', 't', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
-            return
+    @property
+    def elf_members(self):
+        """Return the members that are ELF objects stored in the archive."""
+        return [member for member in self.members if member.is_elf]
 
-        self.objects = r.stdout.splitlines()
+    def parse(self):
+        try:
+            with open(self.pkgfile_path, 'rb') as in_file:
+                if in_file.read(len(AR_MAGIC)) not in (AR_MAGIC, AR_THIN_MAGIC):
+                    raise ElfError(f'{self.pkgfile_path}: file format not recognized')
+                with mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.is_thin = data[:len(AR_THIN_MAGIC)] == AR_THIN_MAGIC
+                    for name, offset, size, external in archive_members(data, self.pkgfile_path, self.is_thin):
+                        if external:
+                            self.members.append(ArMember(name, None, size, False))
+                        else:
+                            is_elf = data[offset:offset + len(ELF_MAGIC)] == ELF_MAGIC
+                            self.members.append(ArMember(name, offset, size, is_elf))
+        except OSError as e:
+            self.parsing_failed_reason = f'{self.pkgfile_path}: {e.strerror}'
+        except ElfError as e:
+            self.parsing_failed_reason = str(e)
+        if self.parsing_failed_reason:
+            self.members = []
+        self.objects = [member.name for member in self.members]
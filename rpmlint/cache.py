@@ -0,0 +1,168 @@
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+import threading
+import time
+
+from rpmlint.helpers import print_warning
+from rpmlint.version import __version__
+from xdg.BaseDirectory import xdg_cache_home
+
+
+class ResultCache:
+    """
+    Persistent cache of results of the expensive per-file analyses.
+
+    The results are stored in a SQLite database (by default in
+    $XDG_CACHE_HOME/rpmlint) under a key that is computed from the digest
+    of the analysed file content and a fingerprint of everything else the
+    result depends on (name of the check, version of the external tool,
+    relevant configuration options and rpmlint version). The number of
+    stored results is limited and the least recently used ones are evicted.
+
+    The database connection is opened lazily and separately in each
+    process, so the cache can be shared by the worker processes (--jobs).
+    """
+
+    filename = 'results.sqlite'
+    # share instances between the checks of the same run
+    _instances = {}
+
+    def __init__(self, path, size):
+        self.path = Path(path)
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._count = 0
+        self._disabled = False
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Return the result cache configured by UseResultCache, ResultCacheDir
+        and ResultCacheSize options or None if the cache is disabled.
+        """
+        configuration = config.configuration
+        if not configuration.get('UseResultCache'):
+            return None
+        path = cache_directory(config) / cls.filename
+        size = configuration.get('ResultCacheSize', 100000)
+        if (path, size) not in cls._instances:
+            cls._instances[(path, size)] = cls(path, size)
+        return cls._instances[(path, size)]
+
+    @staticmethod
+    def key(*parts):
+        """Return the cache key for the given (JSON serializable) parts."""
+        data = json.dumps([__version__] + list(parts), sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _connect(self):
+        if self._disabled:
+            return None
+        # never share the connection with the forked worker processes
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS results '
+                               '(key TEXT PRIMARY KEY, value TEXT NOT NULL, atime INTEGER NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS results_atime ON results (atime)')
+            self._count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        except (OSError, sqlite3.Error) as e:
+            print_warning(f'(none): W: unable to open result cache {self.path}: {e}')
+            self._disabled = True
+            return None
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def lookup(self, key):
+        """
+        Return a tuple (found, value) of the result stored under the key.
+        """
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return False, None
+            try:
+                row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return False, None
+                connection.execute('UPDATE results SET atime = ? WHERE key = ?', (time.time_ns(), key))
+            except sqlite3.Error as e:
+                print_warning(f'(none): W: result cache lookup failed: {e}')
+                return False, None
+            self.hits += 1
+            return True, json.loads(row[0])
+
+    def store(self, key, value):
+        """
+        Store the (JSON serializable) value under the key and evict the least
+        recently used results if the cache is full.
+        """
+        data = json.dumps(value)
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            try:
+                cursor = connection.execute('UPDATE results SET value = ?, atime = ? WHERE key = ?',
+                                            (data, time.time_ns(), key))
+                if cursor.rowcount:
+                    return
+                connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (key, data, time.time_ns()))
+                self._count += 1
+                if self._count > self.size:
+                    self._evict(connection)
+            except sqlite3.Error as e:
+                print_warning(f'(none): W: result cache update failed: {e}')
+
+    def _evict(self, connection):
+        # make room for a tenth of the cache at once to not evict
+        # after each stored result
+        count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        excess = count - self.size + self.size // 10
+        if excess > 0:
+            connection.execute('DELETE FROM results WHERE key IN '
+                               '(SELECT key FROM results ORDER BY atime LIMIT ?)', (excess,))
+            count -= excess
+        self._count = count
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+def cache_directory(config):
+    """
+    Return the directory of the persistent caches (ResultCacheDir option or
+    $XDG_CACHE_HOME/rpmlint).
+    """
+    return Path(config.configuration.get('ResultCacheDir') or os.path.join(xdg_cache_home, 'rpmlint'))
+
+
+@functools.lru_cache(maxsize=None)
+def tool_fingerprint(name):
+    """
+    Return a string identifying the installed version of the external
+    tool (its location, size and modification time).
+    """
+    path = shutil.which(name)
+    if path is None:
+        return f'{name}:missing'
+    st = os.stat(path)
+    return f'{path}:{st.st_size}:{st.st_mtime_ns}'
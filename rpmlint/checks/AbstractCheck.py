@@ -1,6 +1,8 @@
 import concurrent.futures
 import re
 
+from rpmlint.cache import ResultCache
+
 
 class AbstractCheck:
     def __init__(self, config, output):
@@ -10,6 +12,10 @@ class AbstractCheck:
         self.output = output
         # by default do not track checked files
         self.checked_files = None
+        # maximum number of bytes read from each file (None if no limit)
+        self.max_scanned_bytes = None
+        # persistent cache of the per-file results (None if disabled)
+        self.result_cache = ResultCache.from_config(config)
 
     def check(self, pkg):
         if pkg.is_source:
@@ -25,6 +31,71 @@ class AbstractCheck:
     def check_spec(self, pkg):
         return
 
+    def wanted_files(self, pkg):
+        """
+        Return names of the package files whose content is read by the check.
+
+        In the lazy extraction mode, the content of these files is extracted
+        at once before running the checks. Other files are extracted when
+        their path is accessed for the first time.
+        """
+        return ()
+
+    def wanted_file_heads(self, pkg):
+        """
+        Return a dictionary mapping names of the package files to the number
+        of leading bytes the check reads via pkg.file_head().
+        """
+        return {}
+
+    def wanted_patterns(self, pkg):
+        """
+        Return a dictionary mapping names of the package files to lists of
+        the regexes the check searches in their content via pkg.grep().
+
+        The content of each file is scanned for the regexes of all the checks
+        at once before running the checks, so the file is read only once.
+        """
+        return {}
+
+    def cached_result(self, pkgfile, compute, *fingerprint):
+        """
+        Return the result of compute() for the content of pkgfile.
+
+        If the result cache is enabled, the result is stored under the digest
+        of the file content, the name of the check and the fingerprint (e.g.
+        version of the external tool or the relevant configuration options)
+        and compute() is called only when there is no result stored yet.
+        The result has to be JSON serializable (tuples are returned as lists).
+        """
+        if self.result_cache is None or not pkgfile.md5:
+            return compute()
+        key = self.result_cache.key(self.__class__.__name__, pkgfile.md5, *fingerprint)
+        found, result = self.result_cache.lookup(key)
+        if not found:
+            result = compute()
+            self.result_cache.store(key, result)
+        return result
+
+    def collected_data(self):
+        """
+        Return the data collected from the checked package for after_checks.
+
+        When the packages are checked in worker processes (--jobs), the data
+        is sent to the main process and merged into its check by
+        merge_collected_data(). It is stored in the package cache too and
+        merged again when the cached output of the package is replayed, so
+        it has to be JSON serializable.
+        """
+        return None
+
+    def merge_collected_data(self, data):
+        return
+
+    def clear_collected_data(self):
+        """Drop the data collected from all the packages of the run."""
+        return
+
     def after_checks(self):
         return
 
@@ -33,16 +104,41 @@ class AbstractCheck:
 
 
 class AbstractFilesCheck(AbstractCheck):
+    """
+    Check reading the content of the package files matching a regexp.
+
+    The files a check does not need to read can be skipped by their libmagic
+    type or their extension, and the number of bytes read from each file can
+    be limited, all configured in the FileScanLimits.<check name> table:
+
+    SkipMagic: List of regexps of libmagic types of the skipped files, only
+               the types known without libmagic (stored in the package
+               header) are used.
+    SkipExtensions: List of extensions of the skipped files.
+    MaxScannedBytes: Maximum number of bytes read from each file, the bigger
+                     files are read only up to this size if the check
+                     supports partial reads (partial_reads) and skipped
+                     otherwise. 0 means no limit.
+    """
+
+    # whether check_file() can work with just the first max_scanned_bytes
+    # bytes of the files
+    partial_reads = False
+
     def __init__(self, config, output, file_regexp):
         self.__files_re = re.compile(file_regexp)
         self.use_threads = False
         super().__init__(config, output)
+        limits = config.configuration.get('FileScanLimits', {}).get(self.__class__.__name__, {})
+        self.skip_magic = [re.compile(regex) for regex in limits.get('SkipMagic', [])]
+        self.skip_extensions = tuple(limits.get('SkipExtensions', []))
+        self.max_scanned_bytes = limits.get('MaxScannedBytes') or None
 
     def check_binary(self, pkg):
         if self.checked_files is None:
             self.checked_files = 0
 
-        filenames = [x for x in pkg.files if x not in pkg.ghost_files and self.__files_re.match(x)]
+        filenames = self._matching_files(pkg)
         if self.use_threads:
             # NOTE: the speed benefit of the ThreadPoolExecutor is limited due to
             # Global Interpreter Lock (GIL).
@@ -64,6 +160,30 @@ class AbstractFilesCheck(AbstractCheck):
     def reset(self):
         self.checked_files = None
 
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        return self._matching_files(pkg)
+
+    def _matching_files(self, pkg):
+        return [x for x in pkg.files if x not in pkg.ghost_files and self.__files_re.match(x) and
+                not self._skipped(pkg.files[x])]
+
+    def _skipped(self, pkgfile):
+        """Return True if the check does not read the file (see FileScanLimits)."""
+        if self.skip_extensions and pkgfile.name.endswith(self.skip_extensions):
+            return True
+        if self.max_scanned_bytes and not self.partial_reads and \
+                (pkgfile.size or 0) > self.max_scanned_bytes:
+            return True
+        if not self.skip_magic:
+            return False
+        # only the magic known without libmagic (from the header), the
+        # classification of all the files (and their extraction in the lazy
+        # mode) would cost more than reading the skipped files
+        magic = pkgfile.known_magic
+        return bool(magic) and any(regex.search(magic) for regex in self.skip_magic)
+
     def check_file(self, pkg, filename):
         """Virtual method called for each file that match the regexp passed
         to the constructor.
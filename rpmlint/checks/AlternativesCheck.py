@@ -31,6 +31,11 @@ class AlternativesCheck(AbstractCheck):
     def __init__(self, config, output):
         super().__init__(config, output)
 
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        return [f for f in pkg.files if re.search(r'^/usr/share/libalternatives/[^/]+/.*\.conf$', f)]
+
     def check(self, pkg):
         if pkg.is_source:
             return
@@ -223,7 +228,7 @@ class AlternativesCheck(AbstractCheck):
             if not re.search(r'^/usr/share/libalternatives/[^/]+/.*\.conf$', f):
                 continue
 
-            filename = Path(pkg.dirname + f)
+            filename = Path(pkgfile.path)
             if not filename.exists():
                 if pkgfile.is_ghost:
                     self.output.add_info('I', pkg, 'libalternatives-conf-not-found', f)
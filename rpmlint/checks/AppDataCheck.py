@@ -1,6 +1,7 @@
 import subprocess
 from xml.etree import ElementTree
 
+from rpmlint.cache import tool_fingerprint
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
 
@@ -17,8 +18,16 @@ class AppDataCheck(AbstractFilesCheck):
         super().__init__(config, output, r'/usr/share/appdata/.*\.(appdata|metainfo).xml$')
 
     def check_file(self, pkg, filename):
-        root = pkg.dir_name()
-        f = root + filename
+        pkgfile = pkg.files[filename]
+        validation_failed = self.cached_result(pkgfile, lambda: self._validate(pkgfile.path),
+                                               self.cmd, tool_fingerprint(self.cmd.split()[0]))
+        if validation_failed:
+            self.output.add_info('E', pkg, 'invalid-appdata-file', filename)
+
+    def _validate(self, f):
+        """
+        Validate the appdata file, return True if the validation failed.
+        """
         cmd = self.cmd + f
 
         validation_failed = False
@@ -34,5 +43,4 @@ class AppDataCheck(AbstractFilesCheck):
                 ElementTree.parse(f)
             except ElementTree.ParseError:
                 validation_failed = True
-        if validation_failed:
-            self.output.add_info('E', pkg, 'invalid-appdata-file', filename)
+        return validation_failed
@@ -1,6 +1,7 @@
 import stat
 import subprocess
 
+from rpmlint.cache import tool_fingerprint
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
 
@@ -22,21 +23,27 @@ class BashismsCheck(AbstractFilesCheck):
         # FIXME: remove in the future
         self.use_early_fail = '[-e]' in output
 
+    def wanted_files(self, pkg):
+        return [f for f in super().wanted_files(pkg) if self._is_shell_script(pkg.files[f])]
+
+    @staticmethod
+    def _is_shell_script(pkgfile):
+        return stat.S_ISREG(pkgfile.mode) and pkgfile.magic.startswith('POSIX shell script')
+
     def check_file(self, pkg, filename):
-        root = pkg.dir_name()
         pkgfile = pkg.files[filename]
-        filepath = root + filename
 
         # We only care about the real files that state they are shell scripts
-        if not (stat.S_ISREG(pkgfile.mode) and
-                pkgfile.magic.startswith('POSIX shell script')):
+        if not self._is_shell_script(pkgfile):
             return
 
         # There are package likes Linux kernel where there are common
         # shell scripts present in multiple packages
         # (kernel-source, kernel-source-vanilla).
         if pkgfile.md5 not in self.file_cache:
-            self.file_cache[pkgfile.md5] = list(self.check_bashisms(pkg, filepath, filename))
+            self.file_cache[pkgfile.md5] = self.cached_result(
+                pkgfile, lambda: list(self.check_bashisms(pkg, pkgfile.path, filename)),
+                tool_fingerprint('dash'), tool_fingerprint('checkbashisms'), self.use_early_fail)
 
         for warning in self.file_cache[pkgfile.md5]:
             self.output.add_info('W', pkg, warning, filename)
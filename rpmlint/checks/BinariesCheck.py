@@ -1,5 +1,7 @@
+from collections import deque
 import concurrent.futures
 import contextlib
+import os
 from pathlib import Path
 import re
 import stat
@@ -16,6 +18,28 @@ KERNEL_MODULES_PATHS = ('/lib/modules/', '/usr/lib/modules/')
 GLIBC_EMPTY_ARCHIVES = ('libanl', 'libdl', 'libpthread', 'librt', 'libutil')
 
 
+class ElfInfo:
+    """
+    Attributes of an ELF file (or an ar archive) detected from its magic and
+    the parsers of its content used by the checks.
+    """
+
+    def __init__(self, magic):
+        self.is_exec = 'executable' in magic
+        self.is_shobj = 'shared object' in magic
+        self.is_archive = 'current ar archive' in magic
+        self.is_dynamically_linked = 'dynamically linked' in magic
+        self.is_pie_exec = 'pie executable' in magic
+        self.is_nonstandard_archive = False
+        # the members of the archive
+        self.ar_parser = None
+        self.readelf_parser = None
+        self.ldd_parser = None
+        self.objdump_parser = None
+        # (issue, reason) of the failed parser
+        self.failure = None
+
+
 class BinariesCheck(AbstractCheck):
     """
     Checks for binary files in the package.
@@ -50,6 +74,12 @@ class BinariesCheck(AbstractCheck):
     def __init__(self, config, output):
         super().__init__(config, output)
         self.checked_files = 0
+        # the thread pool analysing the ELF files of a package, the parsers are
+        # pure Python so more threads would only contend for the GIL (the
+        # packages are checked in parallel by --jobs)
+        self.elf_threads = min(2, os.cpu_count() or 1)
+        self.elf_files_ahead = 2 * self.elf_threads
+        self._executor = None
         self.system_lib_paths = tuple(config.configuration['SystemLibPaths'])
         self.pie_exec_regex_list = []
         for regex in config.configuration['PieExecutables']:
@@ -82,6 +112,17 @@ class BinariesCheck(AbstractCheck):
 
     def reset(self):
         self.checked_files = 0
+        self._shutdown_executor()
+
+    def _shutdown_executor(self):
+        """
+        Stop the threads analysing the ELF files of the package, so no
+        thread is running when the worker processes are forked (--jobs,
+        --serve).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
 
     @staticmethod
     def create_nonlibc_regexp_call(call):
@@ -99,9 +140,10 @@ class BinariesCheck(AbstractCheck):
         script.
         """
         if 'shell script' in pkgfile.magic:
-            file_start = None
-            with contextlib.suppress(IOError), open(pkgfile.path, 'rb') as inputf:
-                file_start = inputf.read(2048)
+            file_start = pkg.file_head(fname, 2048)
+            if file_start is None:
+                with contextlib.suppress(IOError), open(pkgfile.path, 'rb') as inputf:
+                    file_start = inputf.read(2048)
             if (file_start and b'This wrapper script should never '
                                b'be moved out of the build directory'
                     in file_start):
@@ -161,7 +203,7 @@ class BinariesCheck(AbstractCheck):
             self.output.add_info('W', pkg, 'unstripped-binary-or-object',
                                  bin_name)
 
-    def _check_non_pie(self, pkg, bin_name):
+    def _check_non_pie(self, pkg, bin_name, elf):
         """
         Check if the bin_name binary is built with PIE.
 
@@ -170,7 +212,7 @@ class BinariesCheck(AbstractCheck):
         We suppose that the package is arch dependent and bin_name is binary
         executable.
         """
-        if not self.is_shobj and not self.is_pie_exec:
+        if not elf.is_shobj and not elf.is_pie_exec:
             if any(regex.fullmatch(bin_name) for regex in self.pie_exec_regex_list):
                 self.output.add_info('E', pkg,
                                      'non-position-independent-executable',
@@ -234,12 +276,12 @@ class BinariesCheck(AbstractCheck):
         if has_usr_lib_file and not has_binary_in_usr_lib:
             self.output.add_info('W', pkg, 'only-non-binary-in-usr-lib')
 
-    def _check_no_text_in_archive(self, pkg, pkgfile):
+    def _check_no_text_in_archive(self, pkg, pkgfile, elf):
         """
         For an archive, test if any .text sections is non-empty.
         """
-        if self.is_archive:
-            for comment in self.readelf_parser.comment_section_info.comments:
+        if elf.is_archive:
+            for comment in elf.readelf_parser.comment_section_info.comments:
                 if comment.startswith('GHC '):
                     return
 
@@ -250,7 +292,7 @@ class BinariesCheck(AbstractCheck):
             if stem in GLIBC_EMPTY_ARCHIVES or (stem.endswith('_p') and stem[:-2] in GLIBC_EMPTY_ARCHIVES):
                 return
 
-            for elf_file in self.readelf_parser.section_info.elf_files:
+            for elf_file in elf.readelf_parser.section_info.elf_files:
                 for section in elf_file:
                     sn = section.name
                     if ((sn in self.lto_text_like_sections or
@@ -261,47 +303,47 @@ class BinariesCheck(AbstractCheck):
             self.output.add_info('E', pkg, 'lto-no-text-in-archive', pkgfile.name)
             return
 
-    def _check_no_patchable_function_entries_in_archive(self, pkg, pkgfile):
+    def _check_no_patchable_function_entries_in_archive(self, pkg, pkgfile, elf):
         """
         For static libraries, we should not ship __patchable_function_entries as it can
         accidentally make a shared library or an executable live-patchable.
         """
-        if self.is_archive:
-            for elf_file in self.readelf_parser.section_info.elf_files:
+        if elf.is_archive:
+            for elf_file in elf.readelf_parser.section_info.elf_files:
                 for section in elf_file:
                     if section.name == '__patchable_function_entries':
                         self.output.add_info('E', pkg, 'patchable-function-entry-in-archive', pkgfile.name)
                         return
 
-    def _check_missing_symtab_in_archive(self, pkg, pkgfile):
+    def _check_missing_symtab_in_archive(self, pkg, pkgfile, elf):
         """
         FIXME Add test coverage.
         """
-        if self.is_archive:
-            for elf_file in self.readelf_parser.section_info.elf_files:
+        if elf.is_archive:
+            for elf_file in elf.readelf_parser.section_info.elf_files:
                 for section in elf_file:
                     if section.name == '.symtab':
                         return
 
             self.output.add_info('E', pkg, 'static-library-without-symtab', pkgfile.name)
 
-    def _check_missing_debug_info_in_archive(self, pkg, pkgfile):
-        if self.is_archive:
-            for elf_file in self.readelf_parser.section_info.elf_files:
+    def _check_missing_debug_info_in_archive(self, pkg, pkgfile, elf):
+        if elf.is_archive:
+            for elf_file in elf.readelf_parser.section_info.elf_files:
                 for section in elf_file:
                     if section.name.startswith('.debug_'):
                         return
             self.output.add_info('E', pkg, 'static-library-without-debuginfo', pkgfile.name)
 
     # Check for LTO sections
-    def _check_lto_section(self, pkg, pkgfile):
-        for elf_file in self.readelf_parser.section_info.elf_files:
+    def _check_lto_section(self, pkg, pkgfile, elf):
+        for elf_file in elf.readelf_parser.section_info.elf_files:
             for section in elf_file:
                 if '.gnu.lto_.' in section.name:
                     self.output.add_info('E', pkg, 'lto-bytecode', pkgfile.name)
                     return
 
-    def _check_executable_stack(self, pkg, pkgfile):
+    def _check_executable_stack(self, pkg, pkgfile, elf):
         """
         Check if the stack is declared as executable which is usually an error.
         """
@@ -311,8 +353,8 @@ class BinariesCheck(AbstractCheck):
             return
 
         # Do not check kernel modules and archives
-        if not self.is_archive and not any(pkgfile.name.startswith(p) for p in KERNEL_MODULES_PATHS):
-            stack_headers = [h for h in self.readelf_parser.program_header_info.headers if h.name == 'GNU_STACK']
+        if not elf.is_archive and not any(pkgfile.name.startswith(p) for p in KERNEL_MODULES_PATHS):
+            stack_headers = [h for h in elf.readelf_parser.program_header_info.headers if h.name == 'GNU_STACK']
             if not stack_headers:
                 self.output.add_info('E', pkg, 'missing-PT_GNU_STACK-section', pkgfile.name)
             elif 'E' in stack_headers[0].flags:
@@ -337,7 +379,7 @@ class BinariesCheck(AbstractCheck):
             if path.name.startswith('lib') or path.name.startswith('ld-'):
                 self.output.add_info('E', pkg, 'no-ldconfig-symlink', shlib)
 
-    def _check_shared_library(self, pkg, pkgfile):
+    def _check_shared_library(self, pkg, pkgfile, elf):
         """
         Various checks for the shared library.
 
@@ -348,10 +390,10 @@ class BinariesCheck(AbstractCheck):
         4) Print 'shlib-with-non-pic-code' error if the library contains
            object code that was compiled without -fPIC.
         """
-        if not self.readelf_parser.is_shlib:
+        if not elf.readelf_parser.is_shlib:
             return
 
-        soname = self.readelf_parser.dynamic_section_info.soname
+        soname = elf.readelf_parser.dynamic_section_info.soname
         if not soname:
             self.output.add_info('W', pkg, 'no-soname', pkgfile.name)
         else:
@@ -380,10 +422,10 @@ class BinariesCheck(AbstractCheck):
                                                  f'SONAME: {soname} ({pkgfile.name}), expected package suffix: {soversion}')
 
         # check if the object code in the library is compiled with PIC
-        if self.readelf_parser.dynamic_section_info['TEXTREL']:
+        if elf.readelf_parser.dynamic_section_info['TEXTREL']:
             self.output.add_info('E', pkg, 'shlib-with-non-pic-code', pkgfile.name)
 
-    def _check_dependency(self, pkg, pkgfile):
+    def _check_dependency(self, pkg, pkgfile, elf):
         """
         FIXME Add test coverage.
         """
@@ -392,47 +434,47 @@ class BinariesCheck(AbstractCheck):
         # skip debuginfo: https://bugzilla.redhat.com/190599
         #
         # following issues are errors for shared libs and warnings for executables
-        if not self.is_dynamically_linked:
+        if not elf.is_dynamically_linked:
             return
 
         # Skip python packages
         if self.python_module_regex.fullmatch(pkgfile.name):
             return
 
-        if not self.is_archive and not self.readelf_parser.is_debug:
-            info_type = 'E' if self.readelf_parser.is_shlib else 'W'
-            for symbol in self.ldd_parser.undefined_symbols:
+        if not elf.is_archive and not elf.readelf_parser.is_debug:
+            info_type = 'E' if elf.readelf_parser.is_shlib else 'W'
+            for symbol in elf.ldd_parser.undefined_symbols:
                 self.output.add_info(info_type, pkg, 'undefined-non-weak-symbol', pkgfile.name, symbol)
-            for dependency in self.ldd_parser.unused_dependencies:
+            for dependency in elf.ldd_parser.unused_dependencies:
                 self.output.add_info(info_type, pkg, 'unused-direct-shlib-dependency',
                                      pkgfile.name, dependency)
 
-    def _check_library_dependency_location(self, pkg, pkgfile):
+    def _check_library_dependency_location(self, pkg, pkgfile, elf):
         """
         FIXME Add test coverage.
         """
-        if not self.is_dynamically_linked:
+        if not elf.is_dynamically_linked:
             return
 
-        if not self.is_archive:
-            for dependency in self.ldd_parser.dependencies:
+        if not elf.is_archive:
+            for dependency in elf.ldd_parser.dependencies:
                 if dependency.startswith('/opt/'):
                     self.output.add_info('E', pkg, 'linked-against-opt-library', pkgfile.name, dependency)
                     break
 
         nonusr = ('/bin', '/lib', '/sbin')
         if pkgfile.name.startswith(nonusr):
-            for dependency in self.ldd_parser.dependencies:
+            for dependency in elf.ldd_parser.dependencies:
                 if dependency.startswith('/usr/'):
                     self.output.add_info('W', pkg, 'linked-against-usr-library', pkgfile.name, dependency)
                     break
 
-    def _check_security_functions(self, pkg, pkgfile):
-        setgid = any(self.readelf_parser.symbol_table_info.get_functions_for_regex(self.setgid_call_regex))
-        setuid = any(self.readelf_parser.symbol_table_info.get_functions_for_regex(self.setuid_call_regex))
-        setgroups = any(self.readelf_parser.symbol_table_info.get_functions_for_regex(self.setgroups_call_regex))
-        mktemp = any(self.readelf_parser.symbol_table_info.get_functions_for_regex(self.mktemp_call_regex))
-        gethostbyname = any(self.readelf_parser.symbol_table_info.get_functions_for_regex(self.gethostbyname_call_regex))
+    def _check_security_functions(self, pkg, pkgfile, elf):
+        setgid = any(elf.readelf_parser.symbol_table_info.get_functions_for_regex(self.setgid_call_regex))
+        setuid = any(elf.readelf_parser.symbol_table_info.get_functions_for_regex(self.setuid_call_regex))
+        setgroups = any(elf.readelf_parser.symbol_table_info.get_functions_for_regex(self.setgroups_call_regex))
+        mktemp = any(elf.readelf_parser.symbol_table_info.get_functions_for_regex(self.mktemp_call_regex))
+        gethostbyname = any(elf.readelf_parser.symbol_table_info.get_functions_for_regex(self.gethostbyname_call_regex))
 
         if setgid and setuid and not setgroups:
             is_uid = stat.S_ISUID & pkgfile.mode
@@ -444,8 +486,8 @@ class BinariesCheck(AbstractCheck):
         if gethostbyname:
             self.output.add_info('W', pkg, 'binary-or-shlib-calls-gethostbyname', pkgfile.name)
 
-    def _check_rpath(self, pkg, pkgfile):
-        for runpaths in self.readelf_parser.dynamic_section_info.runpaths:
+    def _check_rpath(self, pkg, pkgfile, elf):
+        for runpaths in elf.readelf_parser.dynamic_section_info.runpaths:
             for runpath in runpaths.split(':'):
                 if self.rpath_origin in runpath:
                     runpath = runpath.replace(self.rpath_origin, str(Path(pkgfile.name).parent))
@@ -454,16 +496,16 @@ class BinariesCheck(AbstractCheck):
                     self.output.add_info('E', pkg, 'binary-or-shlib-defines-rpath', pkgfile.name, f'(RUNPATH: {runpaths})')
                     return
 
-    def _check_library_dependency(self, pkg, pkgfile):
-        if (self.is_archive or
+    def _check_library_dependency(self, pkg, pkgfile, elf):
+        if (elf.is_archive or
                 any(pkgfile.name.startswith(p) for p in KERNEL_MODULES_PATHS) or
                 self.python_module_regex.fullmatch(pkgfile.name)):
             return
 
-        dyn_section = self.readelf_parser.dynamic_section_info
+        dyn_section = elf.readelf_parser.dynamic_section_info
         if not len(dyn_section.needed) and not (dyn_section.soname and
                                                 self.ldso_soname_regex.search(dyn_section.soname)):
-            if not self.is_shobj:
+            if not elf.is_shobj:
                 self.output.add_info('E', pkg, 'statically-linked-binary', pkgfile.name)
         else:
             # linked against libc ?
@@ -474,10 +516,10 @@ class BinariesCheck(AbstractCheck):
                 for lib in dyn_section.needed:
                     if 'libc.' in lib:
                         return
-                if not self.is_shobj:
+                if not elf.is_shobj:
                     self.output.add_info('W', pkg, 'program-not-linked-against-libc', pkgfile.name)
 
-    def _check_forbidden_functions(self, pkg, pkgfile):
+    def _check_forbidden_functions(self, pkg, pkgfile, elf):
         forbidden_functions = self.config.configuration['WarnOnFunction']
         if forbidden_functions:
             for name, func in forbidden_functions.items():
@@ -491,40 +533,33 @@ class BinariesCheck(AbstractCheck):
 
         forbidden_calls = []
         for r_name, func in forbidden_functions.items():
-            if any(self.readelf_parser.symbol_table_info.get_functions_for_regex(func['f_regex'])):
+            if any(elf.readelf_parser.symbol_table_info.get_functions_for_regex(func['f_regex'])):
                 forbidden_calls.append(r_name)
 
         if not forbidden_calls:
             return
 
+        # the strings are scanned only until all the waivers are found
+        waiver_regexes = {fn: forbidden_functions[fn]['waiver_regex'] for fn in forbidden_calls
+                          if 'waiver_regex' in forbidden_functions[fn]}
         strings_parser = StringsParser(pkgfile.path)
+        waived = strings_parser.search(waiver_regexes)
         failed_reason = strings_parser.parsing_failed_reason
         if failed_reason:
             self.output.add_info('E', pkg, 'strings-failed', pkgfile.name, failed_reason)
             return
 
-        forbidden_functions_filtered = []
-
-        for fn in forbidden_calls:
-            f = forbidden_functions[fn]
-            if 'waiver_regex' not in f:
-                forbidden_functions_filtered.append(fn)
-                continue
-
-            # See: https://github.com/PyCQA/flake8-bugbear/issues/269
-            waiver = any(f['waiver_regex'].search(string) for string in strings_parser.strings)
-            if not waiver:
-                forbidden_functions_filtered.append(fn)
+        forbidden_functions_filtered = [fn for fn in forbidden_calls if fn not in waived]
 
         for fn in forbidden_functions_filtered:
             self.output.add_info('W', pkg, fn, pkgfile.name, forbidden_functions[fn]['f_name'])
 
-    def _check_executable_shlib(self, pkg, pkgfile):
-        if not (pkgfile.mode & stat.S_IEXEC) and self.readelf_parser.is_shlib:
+    def _check_executable_shlib(self, pkg, pkgfile, elf):
+        if not (pkgfile.mode & stat.S_IEXEC) and elf.readelf_parser.is_shlib:
             self.output.add_info('E', pkg, 'shared-library-not-executable', pkgfile.name)
 
-    def _check_optflags(self, pkg, pkgfile):
-        if self.is_archive:
+    def _check_optflags(self, pkg, pkgfile, elf):
+        if elf.is_archive:
             return
 
         mandatory_optflags = self.config.configuration['MandatoryOptflags']
@@ -532,7 +567,7 @@ class BinariesCheck(AbstractCheck):
         if not mandatory_optflags and not forbidden_optflags:
             return
 
-        for dwarf_unit in self.objdump_parser.compile_units:
+        for dwarf_unit in elf.objdump_parser.compile_units:
             tokens = dwarf_unit['producer'].split(' ')
             missing = [mo for mo in mandatory_optflags if mo not in tokens]
             forbidden = [f for f in forbidden_optflags if f in tokens]
@@ -541,11 +576,11 @@ class BinariesCheck(AbstractCheck):
             if forbidden:
                 self.output.add_info('E', pkg, 'forbidden-optflags', pkgfile.name, ' '.join(forbidden))
 
-    def _check_hash_sections(self, pkg, pkgfile):
-        if not self.readelf_parser.is_shlib:
+    def _check_hash_sections(self, pkg, pkgfile, elf):
+        if not elf.readelf_parser.is_shlib:
             return
 
-        for elf_file in self.readelf_parser.section_info.elf_files:
+        for elf_file in elf.readelf_parser.section_info.elf_files:
             needle = {'.hash', '.gnu.hash'}
             for section in elf_file:
                 if not needle:
@@ -558,69 +593,167 @@ class BinariesCheck(AbstractCheck):
             if '.gnu.hash' in needle:
                 self.output.add_info('W', pkg, 'missing-gnu-hash-section', pkgfile.name)
 
-    def _is_standard_archive(self, pkg, pkgfile):
+    @staticmethod
+    def _is_standard_archive(pkgfile, elf):
         # skip Klee bytecode archives
         if pkgfile.path.endswith('.bca'):
             return False
 
         # return false for e.g. Rust or Go packages that are archives
         # but files in the archive are not an ELF container
-        ar_parser = ArParser(pkgfile.path)
+        ar_parser = elf.ar_parser = ArParser(pkgfile.path)
         failed_reason = ar_parser.parsing_failed_reason
         if failed_reason:
-            self.output.add_info('E', pkg, 'ar-failed', pkgfile.name, failed_reason)
+            elf.failure = ('ar-failed', failed_reason)
             return False
 
         needles = ('__.PKGDEF', '_go_.o', 'lib.rmeta')
         return not any(needle for needle in needles if needle in ar_parser.objects)
 
-    def _detect_attributes(self, magic):
-        self.is_exec = 'executable' in magic
-        self.is_shobj = 'shared object' in magic
-        self.is_archive = 'current ar archive' in magic
-        self.is_dynamically_linked = 'dynamically linked' in magic
-        self.is_pie_exec = 'pie executable' in magic
-        self.is_nonstandard_archive = False
+    def analyse_elf(self, pkg, pkgfile, magic=None):
+        """
+        Run the parsers (ar, readelf, ldd, objdump) of the ELF file or the
+        archive and return its ElfInfo.
 
-    def run_elf_checks(self, pkg, pkgfile):
-        if self.is_archive and not self._is_standard_archive(pkg, pkgfile):
-            self.is_nonstandard_archive = True
-            return
+        Nothing is reported here so that the files can be analysed in the
+        threads of the executor, the failure of a parser is recorded in
+        ElfInfo and reported by run_elf_checks.
+        """
+        elf = ElfInfo(pkgfile.magic if magic is None else magic)
+        if elf.is_archive and not self._is_standard_archive(pkgfile, elf):
+            elf.is_nonstandard_archive = True
+            return elf
 
-        self.readelf_parser = ReadelfParser(pkgfile.path, pkgfile.name)
-        failed_reason = self.readelf_parser.parsing_failed_reason()
+        elf.readelf_parser = ReadelfParser(pkgfile.path, pkgfile.name)
+        failed_reason = elf.readelf_parser.parsing_failed_reason()
         if failed_reason:
-            self.output.add_info('E', pkg, 'readelf-failed', pkgfile.name, failed_reason)
-            return
+            elf.failure = ('readelf-failed', failed_reason)
+            return elf
 
-        if not self.is_archive:
-            if self.is_dynamically_linked:
+        if not elf.is_archive:
+            if elf.is_dynamically_linked:
                 is_installed_pkg = isinstance(pkg, (InstalledPkg, FakePkg))
-                self.ldd_parser = LddParser(pkgfile.path, pkgfile.name, is_installed_pkg)
-                failed_reason = self.ldd_parser.parsing_failed_reason
+                elf.ldd_parser = LddParser(pkgfile.path, pkgfile.name, is_installed_pkg,
+                                           self.system_lib_paths)
+                failed_reason = elf.ldd_parser.parsing_failed_reason
                 if failed_reason:
-                    self.output.add_info('E', pkg, 'ldd-failed', pkgfile.name, failed_reason)
-                    return
+                    elf.failure = ('ldd-failed', failed_reason)
+                    return elf
 
             if (self.config.configuration['MandatoryOptflags'] or
                     self.config.configuration['ForbiddenOptflags']):
-                self.objdump_parser = ObjdumpParser(pkgfile.path, pkgfile.name)
-                failed_reason = self.objdump_parser.parsing_failed_reason
+                elf.objdump_parser = ObjdumpParser(pkgfile.path, pkgfile.name)
+                failed_reason = elf.objdump_parser.parsing_failed_reason
                 if failed_reason:
-                    self.output.add_info('E', pkg, 'objdump-failed', pkgfile.name, failed_reason)
-                    return
+                    elf.failure = ('objdump-failed', failed_reason)
+        return elf
+
+    def _analyse_elf_files(self, pkg, elf_files):
+        """
+        Analyse the (name, pkgfile) ELF files in the thread pool of the
+        package and yield their (name, ElfInfo) in the same order.
+
+        The parsers run in Python and hold the GIL, so the thread pool only
+        overlaps the parsing of one file with the waits of another one (the
+        c++filt round trips of the demangler, the reads of files that are
+        not in the page cache) and it is small. At most elf_files_ahead files
+        are analysed before their results are taken to keep the memory used
+        by the parsed output low.
+        """
+        if self.elf_threads < 2 or len(elf_files) < 2:
+            for fname, pkgfile in elf_files:
+                yield fname, self.analyse_elf(pkg, pkgfile)
+            return
+
+        # the pool lives until the package is checked
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.elf_threads,
+                                                                   thread_name_prefix='rpmlint-elf')
+        pending = deque()
+        files = iter(elf_files)
+        try:
+            for fname, pkgfile in files:
+                # extract the file (lazy mode) in this thread
+                if pkgfile.extract is not None:
+                    pkgfile.extract(pkgfile)
+                pending.append((fname, self._executor.submit(self.analyse_elf, pkg, pkgfile)))
+                if len(pending) >= self.elf_files_ahead:
+                    fname, future = pending.popleft()
+                    yield fname, future.result()
+            while pending:
+                fname, future = pending.popleft()
+                yield fname, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def _analysed_elf(self, pkg, fname, pkgfile, analysed, results):
+        """
+        Return the ElfInfo of the file from the (name, ElfInfo) iterator of
+        _analyse_elf_files, the ones yielded before it are kept in results.
+        A file that was not analysed ahead is analysed now.
+        """
+        while fname not in results:
+            try:
+                name, elf = next(analysed)
+            except StopIteration:
+                return self.analyse_elf(pkg, pkgfile)
+            results[name] = elf
+        return results.pop(fname)
+
+    def run_elf_checks(self, pkg, pkgfile, elf):
+        """
+        Report the failure of the analysis of the file or run all the check
+        functions with its ElfInfo.
+        """
+        if elf.failure:
+            issue, failed_reason = elf.failure
+            self.output.add_info('E', pkg, issue, pkgfile.name, failed_reason)
+            return
+        if elf.is_nonstandard_archive:
+            return
+
+        for fn in self.check_functions:
+            fn(pkg, pkgfile, elf)
+
+    def _is_elf_checked(self, pkg, fname, pkgfile):
+        """
+        Return True if the file is checked by run_elf_checks in check_binary:
+        an ELF file or an ar archive in an arch dependent package that is not
+        ocaml native, Lua bytecode, Go .go and .gox, .o or .static.
+        """
+        magic = pkgfile.magic
+        return (pkg.arch != 'noarch' and
+                ((self.elf_regex.match(magic) and 'eBPF' not in magic) or 'current ar archive' in magic) and
+                'Objective caml native' not in magic and 'Lua bytecode' not in magic and
+                not fname.endswith(('.o', '.static', '.gox', '.go')))
 
-        # NOTE: the speed benefit of the ThreadPoolExecutor is limited due to
-        # Global Interpreter Lock (GIL).
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = []
-            for fn in self.check_functions:
-                futures.append(executor.submit(fn, pkg, pkgfile))
-            concurrent.futures.wait(futures)
-            for future in futures:
-                err = future.exception()
-                if err:
-                    raise err
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        wanted = []
+        for fname, pkgfile in pkg.files.items():
+            if fname in pkg.ghost_files:
+                continue
+            if self.la_file_regex.search(fname):
+                wanted.append(fname)
+            elif pkg.arch != 'noarch' and \
+                    ((self.elf_regex.match(pkgfile.magic) and 'eBPF' not in pkgfile.magic) or
+                     'current ar archive' in pkgfile.magic):
+                wanted.append(fname)
+        return wanted
+
+    def wanted_patterns(self, pkg):
+        if pkg.is_source:
+            return {}
+        return {fname: [self.invalid_dir_ref_regex] for fname in pkg.files
+                if self.la_file_regex.search(fname) and fname not in pkg.ghost_files}
+
+    def wanted_file_heads(self, pkg):
+        if pkg.is_source:
+            return {}
+        return {fname: 2048 for fname, pkgfile in pkg.files.items()
+                if 'shell script' in pkgfile.magic and fname not in pkg.ghost_files}
 
     def check_binary(self, pkg):
         exec_files = []
@@ -630,6 +763,12 @@ class BinariesCheck(AbstractCheck):
         pkg_has_usrlib_file = False
         pkg_has_file_in_lib64 = False
 
+        # the ELF files are analysed ahead in the thread pool, the results
+        # are taken and checked in the order of the files
+        analysed = self._analyse_elf_files(pkg, [(fname, pkgfile) for fname, pkgfile in pkg.files.items()
+                                                 if self._is_elf_checked(pkg, fname, pkgfile)])
+        analysed_elfs = {}
+
         #  go through the all files, run files checks and collect data that are
         #  needed later
         for fname, pkgfile in pkg.files.items():
@@ -699,37 +838,39 @@ class BinariesCheck(AbstractCheck):
 
             self._check_unstripped_binary(fname, pkg, pkgfile)
 
-            # Detect attributes of an ELF file
-            self._detect_attributes(pkgfile.magic)
-
             # run ELF checks
-            self.run_elf_checks(pkg, pkgfile)
+            elf = self._analysed_elf(pkg, fname, pkgfile, analysed, analysed_elfs)
+            self.run_elf_checks(pkg, pkgfile, elf)
 
-            if self.is_nonstandard_archive:
+            if elf.is_nonstandard_archive:
                 continue
 
             # inspect binary file
-            is_shlib = self.readelf_parser.is_shlib
+            is_shlib = elf.readelf_parser.is_shlib
 
             if is_shlib:
                 pkg_has_lib = True
 
             # skip non-exec and non-SO
             # executables and shared objects only from here on
-            if not self.is_exec and not self.is_shobj:
+            is_exec = elf.is_exec
+            if not is_exec and not elf.is_shobj:
                 continue
 
-            if self.is_shobj and not self.is_exec and '.so' not in fname and \
+            if elf.is_shobj and not is_exec and '.so' not in fname and \
                     self.bin_regex.search(fname):
                 # pkgfile.magic does not contain 'executable' for PIEs
-                self.is_exec = True
+                is_exec = True
 
-            if self.is_exec:
+            if is_exec:
                 # add to the list of the all exec files
                 if self.bin_regex.search(fname):
                     exec_files.append(fname)
 
-                self._check_non_pie(pkg, fname)
+                self._check_non_pie(pkg, fname, elf)
+
+        analysed.close()
+        self._shutdown_executor()
 
         # run checks for the whole package
         # it uses data collected in the previous for-cycle
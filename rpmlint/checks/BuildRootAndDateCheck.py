@@ -4,6 +4,7 @@ import time
 
 import rpm
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
+from rpmlint.contentscan import bytes_regex
 
 
 class BuildRootAndDateCheck(AbstractFilesCheck):
@@ -13,6 +14,8 @@ class BuildRootAndDateCheck(AbstractFilesCheck):
 
     If so, it causes the package to rebuild when it's not needed.
     """
+    partial_reads = True
+
     def __init__(self, config, output):
         super().__init__(config, output, r'.*')
         self.looksliketime = re.compile('(2[0-3]|[01]?[0-9]):([0-5]?[0-9]):([0-5]?[0-9])')
@@ -30,16 +33,30 @@ class BuildRootAndDateCheck(AbstractFilesCheck):
             buildroot = buildroot.replace('%%{%s}' % (m), r'[\w\!-\.]{1,20}')
         self.lookslikebuildroot = re.compile(buildroot)
 
+    def wanted_files(self, pkg):
+        return [filename for filename in super().wanted_files(pkg)
+                if not filename.startswith('/usr/lib/debug') and stat.S_ISREG(pkg.files[filename].mode)]
+
+    @staticmethod
+    def _raw(regex):
+        # the raw content is searched so that binary files are checked too
+        return bytes_regex(regex) or regex
+
+    def wanted_patterns(self, pkg):
+        # the time is searched only in the files containing the current date
+        return {filename: [self._raw(self.istoday), self._raw(self.lookslikebuildroot)]
+                for filename in self.wanted_files(pkg)}
+
     def check_file(self, pkg, filename):
         if filename.startswith('/usr/lib/debug') or pkg.is_source or \
                 not stat.S_ISREG(pkg.files[filename].mode):
             return
 
-        data = pkg.read_with_mmap(filename)
-        if self.istoday.search(data):
-            if self.looksliketime.search(data):
+        max_size = self.max_scanned_bytes
+        if pkg.grep(self._raw(self.istoday), filename, max_size):
+            if pkg.grep(self._raw(self.looksliketime), filename, max_size):
                 self.output.add_info('W', pkg, 'file-contains-date-and-time', filename)
             else:
                 self.output.add_info('W', pkg, 'file-contains-current-date', filename)
-        if self.lookslikebuildroot.search(data):
+        if pkg.grep(self._raw(self.lookslikebuildroot), filename, max_size):
             self.output.add_info('E', pkg, 'file-contains-buildroot', filename)
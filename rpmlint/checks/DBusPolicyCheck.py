@@ -6,6 +6,11 @@ DBUS_DIRECTORIES = ('/etc/dbus-1/system.d/', '/usr/share/dbus-1/system.d/')
 
 
 class DBusPolicyCheck(AbstractCheck):
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        return [f for f in pkg.files if f not in pkg.ghost_files and f.startswith(DBUS_DIRECTORIES)]
+
     def check(self, pkg):
         if pkg.is_source:
             return
@@ -18,7 +23,7 @@ class DBusPolicyCheck(AbstractCheck):
             try:
                 if any(f.startswith(d) for d in DBUS_DIRECTORIES):
                     send_policy_seen = False
-                    lf = pkg.dir_name() + f
+                    lf = pkg.files[f].path
                     xml = parse(lf)
                     for policy in xml.getElementsByTagName('policy'):
                         send_policy_seen |= self._check_allow_policy_element(pkg, f, policy)
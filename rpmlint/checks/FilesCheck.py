@@ -431,6 +431,23 @@ class FilesCheck(AbstractCheck):
             self.output.add_info('W', pkg, 'read-error', e)
             return (chunk, False)
 
+        return self.classify_chunk(chunk, filename)
+
+    def peek_pkgfile(self, pkg, pkgfile, length=2048):
+        """
+        Peek into a package file, use its beginning captured while streaming
+        the payload when available (lazy extraction mode).
+        """
+        chunk = pkg.file_head(pkgfile.name, length)
+        if chunk is None:
+            return self.peek(pkgfile.path, pkg, length)
+        return self.classify_chunk(chunk, pkgfile.name)
+
+    def classify_chunk(self, chunk, filename):
+        """
+        Return the chunk from the beginning of a file and a flag if the file
+        seems to be a text file.
+        """
         if b'\0' in chunk:
             return (chunk, False)
 
@@ -456,6 +473,33 @@ class FilesCheck(AbstractCheck):
 
         return (chunk, istext)
 
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        # the tmpfiles.d configuration and the text documentation
+        return [name for name, pkgfile in pkg.files.items()
+                if name not in pkg.ghost_files and stat.S_ISREG(pkgfile.mode) and
+                (pkgfile.is_doc or ('tmpfiles.d' in name and name.endswith('.conf')))]
+
+    def wanted_file_heads(self, pkg):
+        if pkg.is_source:
+            return {}
+        return {name: 2048 for name, pkgfile in pkg.files.items()
+                if name not in pkg.ghost_files and stat.S_ISREG(pkgfile.mode)}
+
+    def wanted_patterns(self, pkg):
+        if pkg.is_source:
+            return {}
+        patterns = {}
+        for name, pkgfile in pkg.files.items():
+            if name in pkg.ghost_files or not stat.S_ISREG(pkgfile.mode):
+                continue
+            if buildconfigfile_regex.search(name):
+                patterns[name] = [buildconfig_rpath_regex]
+            elif name.endswith('.pem'):
+                patterns[name] = [start_certificate_regex, start_private_key_regex]
+        return patterns
+
     def check(self, pkg):
         self._check_utf8(pkg)
 
@@ -929,7 +973,7 @@ class FilesCheck(AbstractCheck):
         if not stat.S_ISREG(realbin.mode):
             return
 
-        file_chunk, file_istext = self.peek(realbin.path, pkg)
+        file_chunk, file_istext = self.peek_pkgfile(pkg, realbin)
         file_interpreter, _file_interpreter_args = script_interpreter(file_chunk)
         # Not a script with shebang, so ignore
         if not file_interpreter:
@@ -1058,13 +1102,17 @@ class FilesCheck(AbstractCheck):
 
     def _check_file_normal_file_getdata(self, pkg, fname, pkgfile):
         res = None
-        try:
-            res = os.access(pkgfile.path, os.R_OK)
-        except UnicodeError as e:  # e.g. non-ASCII, C locale, python 3
-            self.output.add_info('W', pkg, 'inaccessible-filename', fname, e)
+        chunk = pkg.file_head(fname, 2048)
+        if chunk is not None:
+            (self._file_chunk, self._file_istext) = self.classify_chunk(chunk, fname)
         else:
-            if res:
-                (self._file_chunk, self._file_istext) = self.peek(pkgfile.path, pkg)
+            try:
+                res = os.access(pkgfile.path, os.R_OK)
+            except UnicodeError as e:  # e.g. non-ASCII, C locale, python 3
+                self.output.add_info('W', pkg, 'inaccessible-filename', fname, e)
+            else:
+                if res:
+                    (self._file_chunk, self._file_istext) = self.peek(pkgfile.path, pkg)
 
         (self._file_interpreter, self._file_interpreter_args) = script_interpreter(self._file_chunk)
         self._file_is_buildconfig = self._file_istext and buildconfigfile_regex.search(fname)
@@ -62,11 +62,19 @@ class InitScriptCheck(AbstractCheck):
         self.use_deflevels = self.config.configuration['UseDefaultRunlevels']
         self.use_subsys = self.config.configuration['UseVarLockSubsys']
 
+    @staticmethod
+    def _is_initscript(fname):
+        return fname.startswith('/etc/init.d/') or fname.startswith('/etc/rc.d/init.d/')
+
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        return [fname for fname in pkg.files if self._is_initscript(fname)]
+
     def check_binary(self, pkg):
         initscript_list = []
         for fname, pkgfile in pkg.files.items():
-            if not fname.startswith('/etc/init.d/') and \
-                    not fname.startswith('/etc/rc.d/init.d/'):
+            if not self._is_initscript(fname):
                 continue
 
             basename = Path(fname).name
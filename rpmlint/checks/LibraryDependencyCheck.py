@@ -1,26 +1,56 @@
 from pathlib import Path
 import stat
+import struct
 
 from rpm import expandMacro
 from rpmlint.checks import FilesCheck
 from rpmlint.checks.AbstractCheck import AbstractCheck
+from rpmlint.elffile import ElfError, open_elf_files
+from rpmlint.helpers import print_warning
+from rpmlint.lddparser import SharedObject
 from rpmlint.pkg import FakePkg
+from rpmlint.symbolindex import SymbolIndex, SymbolIndexError
 
 
 class LibraryDependencyCheck(AbstractCheck):
+    """
+    Check the dependencies of the -devel packages on the packages providing
+    the linked shared libraries and the undefined symbols of the executables
+    across all the checked packages.
+
+    The shared libraries and dynamically linked files of all the packages of
+    the run are collected in a SymbolIndex (it is not reset after each
+    package) when the undefined symbols are checked (CheckUndefinedSymbols
+    option) or the index is saved for the later runs (SaveSymbolIndex
+    option). A prebuilt index of the base distribution can be loaded
+    (SymbolIndex option).
+    """
+
     def __init__(self, config, output):
         super().__init__(config, output)
-        self.package_requires = {}
-        self.package_so_symlinks = {}
-        self.package_so_files = {}
-        self.package_arch_mapping = {}
-        self.isa = expandMacro('%{_isa}')
+        self.base_index = None
+        index_path = config.configuration.get('SymbolIndex')
+        if index_path:
+            try:
+                self.base_index = SymbolIndex.load(index_path)
+            except SymbolIndexError as e:
+                print_warning(f'(none): W: {e}')
+        self.save_index_path = config.configuration.get('SaveSymbolIndex')
+        self.check_undefined_symbols = config.configuration.get('CheckUndefinedSymbols', False)
+        # the ELF files are indexed only when the index is used, reading
+        # them needs libmagic and the extraction of the files
+        self.index_files = bool(self.check_undefined_symbols or self.save_index_path)
+        self.symbol_index = SymbolIndex(self.base_index)
+        self.reset()
 
     def reset(self):
         self.package_requires = {}
         self.package_so_symlinks = {}
         self.package_so_files = {}
         self.package_arch_mapping = {}
+        # sonames and packages added to the symbol index since the reset
+        self.indexed_sonames = []
+        self.indexed_packages = []
         self.isa = expandMacro('%{_isa}')
 
     def check_binary(self, pkg):
@@ -32,6 +62,8 @@ class LibraryDependencyCheck(AbstractCheck):
             self._process_devel_package(pkg, is_devel)
         else:
             self._process_nondevel_package(pkg)
+        if self.index_files:
+            self._index_elf_files(pkg)
 
     def _process_devel_package(self, pkg, is_devel):
         self.package_requires[pkg.name] = [req[0] for req in pkg.requires + pkg.prereq]
@@ -48,18 +80,115 @@ class LibraryDependencyCheck(AbstractCheck):
             if '.so' in pkgfile.name:
                 self.package_so_files[pkgfile.name] = pkg.name
 
+    def _indexed_files(self, pkg):
+        """Return the dynamically linked ELF files of the package."""
+        if pkg.arch == 'noarch':
+            return []
+        return [pkgfile for fname, pkgfile in pkg.files.items()
+                if fname not in pkg.ghost_files and stat.S_ISREG(pkgfile.mode) and
+                pkgfile.magic.startswith('ELF') and 'dynamically linked' in pkgfile.magic]
+
+    def _index_elf_files(self, pkg):
+        """
+        Add the shared libraries (with their exported dynamic symbols) and
+        the NEEDED sonames and undefined symbols of the dynamically linked
+        files of the package to the symbol index.
+        """
+        self.indexed_packages.append(pkg.name)
+        for pkgfile in self._indexed_files(pkg):
+            try:
+                with open_elf_files(pkgfile.path) as elf_files:
+                    if len(elf_files) != 1:
+                        continue
+                    shared_object = SharedObject(pkgfile.name, elf_files[0])
+            except (ElfError, struct.error, OSError):
+                continue
+            if not shared_object.is_dynamic:
+                continue
+
+            if shared_object.soname:
+                exported = [name for name, definitions in shared_object.defined.items()
+                            if any(not hidden for _version, hidden in definitions)]
+                self.symbol_index.add_library(pkg.name, shared_object.soname, shared_object.needed, exported)
+                self.indexed_sonames.append(shared_object.soname)
+            undefined = sorted({name for name, _version, weak in shared_object.undefined if not weak})
+            self.symbol_index.add_file(pkg.name, pkgfile.name, shared_object.needed, undefined,
+                                       shared_object.interpreter is not None)
+
+    def wanted_files(self, pkg):
+        if pkg.is_source or not self.index_files:
+            return ()
+        return [pkgfile.name for pkgfile in self._indexed_files(pkg)]
+
+    def collected_data(self):
+        # only the part of the index added for the checked package (the
+        # workers have the base index too)
+        # (JSON serializable, it is stored in the package cache too)
+        libraries = {soname: self.symbol_index.libraries[soname] for soname in self.indexed_sonames}
+        return {
+            'libraries': {soname: [library.package, list(library.needed), sorted(library.symbols)]
+                          for soname, library in libraries.items()},
+            'files': {package: {name: [list(indexed.needed), list(indexed.undefined), indexed.is_exec]
+                                for name, indexed in self.symbol_index.files[package].items()}
+                      for package in self.indexed_packages if package in self.symbol_index.files},
+        }
+
+    def merge_collected_data(self, data):
+        for soname, (package, needed, symbols) in data['libraries'].items():
+            self.symbol_index.add_library(package, soname, needed, symbols)
+            self.indexed_sonames.append(soname)
+        for package, files in data['files'].items():
+            for name, (needed, undefined, is_exec) in files.items():
+                self.symbol_index.add_file(package, name, needed, undefined, is_exec)
+            self.indexed_packages.append(package)
+
+    def clear_collected_data(self):
+        self.symbol_index = SymbolIndex(self.base_index)
+
     def after_checks(self):
         for pkgname, so_symlinks in self.package_so_symlinks.items():
             for link in so_symlinks:
                 with FakePkg(pkgname) as pkg:
                     pkg.arch = self.package_arch_mapping[pkgname]
-                    if link not in self.package_so_files:
-                        self.output.add_info('E', pkg, 'no-library-dependency-for', link)
-                        break
-                    else:
+                    if link in self.package_so_files:
                         definition = self.package_so_files[link]
-
-                        if (definition not in self.package_requires[pkgname] and
-                                definition + self.isa not in self.package_requires[pkgname]):
-                            self.output.add_info('E', pkg, 'no-library-dependency-on', definition, link)
+                    else:
+                        # the library may be provided by a package of the
+                        # base distribution, the file name is its soname
+                        definition = self.symbol_index.provider(Path(link).name)
+                        if definition is None or definition == pkgname:
+                            self.output.add_info('E', pkg, 'no-library-dependency-for', link)
                             break
+
+                    if (definition not in self.package_requires[pkgname] and
+                            definition + self.isa not in self.package_requires[pkgname]):
+                        self.output.add_info('E', pkg, 'no-library-dependency-on', definition, link)
+                        break
+
+        if self.check_undefined_symbols:
+            self._check_unresolved_symbols()
+
+        if self.save_index_path:
+            try:
+                self.symbol_index.save(self.save_index_path)
+            except OSError as e:
+                print_warning(f'(none): W: cannot save symbol index {self.save_index_path}: {e}')
+        # the run is over
+        self.clear_collected_data()
+
+    def _check_unresolved_symbols(self):
+        """
+        Report the undefined symbols of the executables no library of their
+        dependencies exports. The executables linked against a library that
+        is not in the index are skipped.
+        """
+        for pkgname, files in self.symbol_index.files.items():
+            for fname, indexed_file in files.items():
+                if not indexed_file.is_exec:
+                    continue
+                unresolved = self.symbol_index.unresolved_symbols(indexed_file)
+                if not unresolved:
+                    continue
+                with FakePkg(pkgname) as pkg:
+                    for symbol in unresolved:
+                        self.output.add_info('W', pkg, 'undefined-symbol-not-provided', fname, symbol)
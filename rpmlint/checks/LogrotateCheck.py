@@ -4,6 +4,11 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 
 class LogrotateCheck(AbstractCheck):
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        return [f for f in pkg.files if f not in pkg.ghost_files and f.startswith('/etc/logrotate.d/')]
+
     def check(self, pkg):
         if pkg.is_source:
             return
@@ -17,7 +22,7 @@ class LogrotateCheck(AbstractCheck):
 
             if f.startswith('/etc/logrotate.d/'):
                 try:
-                    for n, o in self.parselogrotateconf(pkg.dir_name(), f).items():
+                    for n, o in self.parselogrotateconf(files[f].path).items():
                         if n in dirs and dirs[n] != o:
                             self.output.add_info('E', pkg, 'logrotate-duplicate', n)
                         else:
@@ -36,9 +41,9 @@ class LogrotateCheck(AbstractCheck):
                                      f'{d} {files[d].user}:{files[d].group} {mode:04o}')
 
     # extremely primitive logrotate parser
-    def parselogrotateconf(self, root, f):
+    def parselogrotateconf(self, path):
         dirs = {}
-        with open('/'.join((root, f))) as fd:
+        with open(path) as fd:
             currentdirs = []
             for line in fd.readlines():
                 line = line.strip()
@@ -42,6 +42,12 @@ class MenuCheck(AbstractCheck):
         for value in self.launchers.values():
             value['regexp'] = re.compile(value['regexp'])
 
+    def wanted_files(self, pkg):
+        if pkg.is_source:
+            return ()
+        return [fname for fname, pkgfile in pkg.files.items()
+                if menu_file_regex.search(fname) and stat.S_ISREG(pkgfile.mode)]
+
     def check_binary(self, pkg):
         files = pkg.files
         menus = []
@@ -91,10 +97,9 @@ class MenuCheck(AbstractCheck):
             elif not update_menus_regex.search(postun):
                 self.output.add_info('E', pkg, 'postun-without-update-menus')
 
-            directory = pkg.dir_name()
             for f in menus:
                 # remove comments and handle cpp continuation lines
-                text = subprocess.run(('/lib/cpp', directory + f), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=ENGLISH_ENVIRONMENT, text=True).stdout
+                text = subprocess.run(('/lib/cpp', pkg.files[f].path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=ENGLISH_ENVIRONMENT, text=True).stdout
                 if text.endswith('\n'):
                     text = text[:-1]
 
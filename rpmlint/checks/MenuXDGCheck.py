@@ -6,9 +6,11 @@
 
 import codecs
 import configparser as cfgparser
+import os
 from pathlib import Path
 import subprocess
 
+from rpmlint.cache import tool_fingerprint
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
 
@@ -25,7 +27,7 @@ class MenuXDGCheck(AbstractFilesCheck):
         # /var/lib/menu-xdg:/usr/share
         super().__init__(config, output, r'/usr/share/applications/.*\.desktop$')
 
-    def parse_desktop_file(self, pkg, root, f, filename):
+    def parse_desktop_file(self, pkg, f, filename):
         """
         Check the structure of a desktop file.
         """
@@ -38,16 +40,14 @@ class MenuXDGCheck(AbstractFilesCheck):
         except UnicodeDecodeError as e:
             self.output.add_info('E', pkg, 'non-utf8-desktopfile', filename, f'Unicode error: {e}')
         else:
-            self._has_binary(pkg, root, cfp, filename)
+            self._has_binary(pkg, cfp, filename)
 
     def check_file(self, pkg, filename):
-        root = pkg.dir_name()
-        f = root + filename
+        pkgfile = pkg.files[filename]
         try:
-            command = subprocess.run(('desktop-file-validate', f), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                     env=ENGLISH_ENVIRONMENT, text=True)
-            text = command.stdout
-            if command.returncode:
+            returncode, text = self.cached_result(pkgfile, lambda: self._validate(pkgfile.path),
+                                                  tool_fingerprint('desktop-file-validate'))
+            if returncode:
                 error_printed = False
                 for line in text.splitlines():
                     if 'error: ' in line:
@@ -57,10 +57,20 @@ class MenuXDGCheck(AbstractFilesCheck):
                 if not error_printed:
                     self.output.add_info('E', pkg, 'invalid-desktopfile', filename)
 
-            self.parse_desktop_file(pkg, root, f, filename)
+            self.parse_desktop_file(pkg, pkgfile.path, filename)
         except UnicodeDecodeError as e:
             self.output.add_info('E', pkg, 'non-utf8-desktopfile', filename, f'Unicode error: {e}')
 
+    @staticmethod
+    def _validate(path):
+        """
+        Run desktop-file-validate on the file and return its return code and
+        output.
+        """
+        command = subprocess.run(('desktop-file-validate', path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 env=ENGLISH_ENVIRONMENT, text=True)
+        return command.returncode, command.stdout
+
     def _handle_parser_error(self, pkg, filename, e):
         """
         Determine what to do with a caught configparser error.
@@ -78,7 +88,7 @@ class MenuXDGCheck(AbstractFilesCheck):
             self.output.add_info('E', pkg, 'invalid-desktopfile', filename,
                                  e.message.partition(':')[0])
 
-    def _has_binary(self, pkg, root, cfp, filename):
+    def _has_binary(self, pkg, cfp, filename):
         """
         Check whether there is a binary assigned to the desktop file.
 
@@ -91,12 +101,18 @@ class MenuXDGCheck(AbstractFilesCheck):
         if not binary:
             return
         if binary.startswith('/'):
-            if (Path(root + binary).exists()):
+            if self._file_exists(pkg, binary):
                 return
         else:
             for i in STANDARD_BIN_DIRS:
-                if Path(root + i + '/' + binary).exists():
+                if self._file_exists(pkg, i + '/' + binary):
                     # no need to check if the binary is +x, rpmlint does it
                     # in another place
                     return
         self.output.add_info('W', pkg, 'desktopfile-without-binary', filename, binary)
+
+    @staticmethod
+    def _file_exists(pkg, filename):
+        """Check whether the file exists in the package (symlinks resolved)."""
+        filename = os.path.normpath(filename)
+        return filename in pkg.files and Path(pkg.files[filename].path).exists()
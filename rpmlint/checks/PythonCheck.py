@@ -1,7 +1,8 @@
 from importlib import metadata
-from pathlib import Path
+from pathlib import Path, PurePath
 import platform
 import re
+import stat
 
 from packaging.requirements import InvalidRequirement, Requirement
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
@@ -50,6 +51,16 @@ class PythonCheck(AbstractFilesCheck):
         self._pyc_version = None
         super().check_binary(pkg)
 
+    def wanted_files(self, pkg):
+        wanted = []
+        for filename in super().wanted_files(pkg):
+            if filename.endswith(('egg-info/requires.txt', 'dist-info/METADATA')):
+                dirname = str(PurePath(filename).parent)
+                wanted.append(dirname if dirname in pkg.files else filename)
+            elif EGG_INFO_RE.match(filename) and not stat.S_ISDIR(pkg.files[filename].mode):
+                wanted.append(filename)
+        return wanted
+
     def check_file(self, pkg, filename):
         # egg-info format
         is_egginfo = filename.endswith('egg-info/requires.txt')
@@ -102,7 +113,10 @@ class PythonCheck(AbstractFilesCheck):
         metadata if applicable.
         """
 
-        filepath = Path(pkg.dir_name() or '/', filename.lstrip('/'))
+        pkgfile = pkg.files[filename]
+        if stat.S_ISDIR(pkgfile.mode):
+            return
+        filepath = Path(pkgfile.path)
         # Check for (deprecated) distutils style metadata.
         if filepath.is_file():
             self.output.add_info('E', pkg, ERRS['egg-distutils'], filename)
@@ -113,7 +127,12 @@ class PythonCheck(AbstractFilesCheck):
         compare with the requirements defined in the rpm package
         """
 
-        filepath = Path(pkg.dir_name() or '/', filename.lstrip('/'))
+        # the metadata are read from the whole egg-info/dist-info directory
+        dirname = str(PurePath(filename).parent)
+        if dirname in pkg.files:
+            filepath = Path(pkg.files[dirname].path, PurePath(filename).name)
+        else:
+            filepath = Path(pkg.files[filename].path)
         d = metadata.PathDistribution.at(filepath.parent)
         if not d.requires:
             return
@@ -160,6 +160,11 @@ class SpecCheck(AbstractCheck):
         self._spec_name = None
         self._default_state()
 
+    def wanted_files(self, pkg):
+        if not pkg.is_source:
+            return ()
+        return [fname for fname in pkg.files if fname.endswith('.spec')]
+
     def check_source(self, pkg):
         """Find specfile in SRPM and run spec file related checks."""
         wrong_spec = False
@@ -12,15 +12,19 @@ class ZipCheck(AbstractCheck):
     zip_regex = re.compile(r'\.(zip|[ewj]ar)$')
     jar_regex = re.compile(r'\.[ewj]ar$')
 
+    def wanted_files(self, pkg):
+        return [fname for fname in pkg.files if self.zip_regex.search(fname) and fname not in pkg.ghost_files]
+
     def check(self, pkg):
         for fname, pkgfile in pkg.files.items():
+            if not self.zip_regex.search(fname):
+                continue
             path = pkgfile.path
-            if self.zip_regex.search(fname) and Path(path).exists() and \
-               Path(path).is_file() and is_zipfile(path):
+            if Path(path).exists() and Path(path).is_file() and is_zipfile(path):
                 try:
                     with ZipFile(path, 'r') as z:
                         # zip checks
-                        self._check_bad_crc(pkg, fname, z)
+                        self._check_bad_crc(pkg, fname, pkgfile, z)
                         self._check_compression(pkg, fname, z)
 
                         # jar checks
@@ -32,13 +36,13 @@ class ZipCheck(AbstractCheck):
                 except RuntimeError as err:
                     self.output.add_info('W', pkg, 'unable-to-read-zip', f'{fname}: {err}')
 
-    def _check_bad_crc(self, pkg, fname, zipfile):
+    def _check_bad_crc(self, pkg, fname, pkgfile, zipfile):
         """
         Check CRC issues for the files in the zipfile.
 
         Print an error if there is a file in the archive that fails CRC check.
         """
-        badcrc = zipfile.testzip()
+        badcrc = self.cached_result(pkgfile, zipfile.testzip)
         if badcrc:
             self.output.add_info('E', pkg, 'bad-crc-in-zip', badcrc, fname)
 
@@ -4,7 +4,8 @@ import sys
 
 from rpmlint.helpers import print_warning
 from rpmlint.lint import Lint
-from rpmlint.rpmdiff import Rpmdiff
+from rpmlint.rpmdiff import diff_directories, Rpmdiff
+from rpmlint.server import LintServer, run_client
 from rpmlint.version import __version__
 
 
@@ -40,9 +41,11 @@ def process_diff_args(argv):
                                      epilog="""When using the -i or -e options,
                                                separate values from package arguments with '--',
                                                e.g.: 'rpmdiff -i 5 T -- old.rpm new.rpm' or place
-                                               the options _after_ the package arguments.""")
-    parser.add_argument('old_package', metavar='RPM_ORIG', type=Path, help='the old package')
-    parser.add_argument('new_package', metavar='RPM_NEW', type=Path, help='the new package')
+                                               the options _after_ the package arguments.
+                                               When both arguments are directories, all packages
+                                               in them are compared, matched by name.""")
+    parser.add_argument('old_package', metavar='RPM_ORIG', type=Path, help='the old package (or directory with packages)')
+    parser.add_argument('new_package', metavar='RPM_NEW', type=Path, help='the new package (or directory with packages)')
     parser.add_argument('-V', '--version', action='version', version=__version__, help='show package version and exit')
     parser.add_argument('-i', '--ignore', nargs='+', default=None, choices=['S', 'M', '5', 'D', 'N', 'L', 'V', 'U', 'G', 'F', 'T'],
                         help="""file property to ignore when calculating differences.
@@ -81,10 +84,20 @@ def process_lint_args(argv):
     parser.add_argument('-i', '--installed', nargs='+', default='', help='installed packages to be validated by rpmlint')
     parser.add_argument('-t', '--time-report', action='store_true', help='print time report for run checks')
     parser.add_argument('-T', '--profile', action='store_true', help='print cProfile report')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes used to check packages in parallel, 0 means the number of CPUs (default: 1)')
+    parser.add_argument('--stream', action='store_true',
+                        help='print out the messages of every package as soon as it is checked (sorted per package)')
     parser.add_argument('--ignore-unused-rpmlintrc', action='store_true',
                         help='Do not report "unused-rpmlintrc-filter" errors')
     parser.add_argument('--checks',
                         help='Debugging option that enables only selected checks (separated by comma)')
+    server_parser = parser.add_mutually_exclusive_group()
+    server_parser.add_argument('--serve', metavar='SOCKET', type=Path,
+                               help='keep running and check the packages requested by the rpmlint --connect clients '
+                                    'on the UNIX socket')
+    server_parser.add_argument('--connect', metavar='SOCKET', type=Path,
+                               help='check the packages by the rpmlint --serve server listening on the UNIX socket')
     lint_modes_parser = parser.add_mutually_exclusive_group()
     lint_modes_parser.add_argument('-s', '--strict', action='store_true', help='treat all messages as errors')
     lint_modes_parser.add_argument('-P', '--permissive', action='store_true', help='treat individual errors as non-fatal')
@@ -168,7 +181,26 @@ def lint():
     """
     options = process_lint_args(sys.argv[1:])
 
-    sys.exit(Lint(options).run())
+    if options['connect']:
+        ignored = [option for option, name in (('--config', 'config'), ('--checks', 'checks'), ('--profile', 'profile'))
+                   if options[name]]
+        if options['jobs'] != 1:
+            ignored.append('--jobs')
+        if ignored:
+            print_warning(f'(none): W: {", ".join(ignored)} ignored, the options of the rpmlint server are used')
+        sys.exit(run_client(options['connect'], options))
+
+    if options['serve'] and options['jobs'] != 1:
+        print_warning('(none): W: --jobs ignored, the rpmlint server checks the packages in its own process')
+        options['jobs'] = 1
+    linter = Lint(options)
+    if options['serve']:
+        try:
+            LintServer(linter, options['serve']).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    sys.exit(linter.run())
 
 
 def diff():
@@ -176,9 +208,33 @@ def diff():
     Main wrapper for diff command processing
     """
     options = process_diff_args(sys.argv[1:])
+    if options['old_package'].is_dir() and options['new_package'].is_dir():
+        sys.exit(int(diff_batch(options)))
     d = Rpmdiff(options['old_package'], options['new_package'],
                 ignore=options['ignore'], exclude=options['exclude'])
     textdiff = d.textdiff()
     if textdiff:
         print(textdiff)
     sys.exit(int(d.differs()))
+
+
+def diff_batch(options):
+    """
+    Compare directories of old and new packages, return True if any of the
+    packages differ.
+    """
+    differs = False
+    for old, new, d in diff_directories(options['old_package'], options['new_package'],
+                                        ignore=options['ignore'], exclude=options['exclude']):
+        if d is None:
+            differs = True
+            if new is None:
+                print(Rpmdiff.FORMAT % (Rpmdiff.REMOVED, old.name))
+            else:
+                print(Rpmdiff.FORMAT % (Rpmdiff.ADDED, new.name))
+        elif d.differs():
+            differs = True
+            print(f'--- {old.name}')
+            print(f'+++ {new.name}')
+            print(d.textdiff())
+    return differs
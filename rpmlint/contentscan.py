@@ -0,0 +1,168 @@
+import contextlib
+import functools
+import mmap
+import re
+
+non_ascii_regex = re.compile(rb'[^\x00-\x7f]')
+whitespace_class_regex = re.compile(r'\\[sS]')
+
+# number of windows the sampled files are searched in
+SAMPLE_WINDOWS = 16
+# bytes counted at once when looking for the line number of a match
+LINE_COUNT_CHUNK = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def bytes_regex(regex):
+    """
+    Return the bytes version of the str regex or None if the pattern cannot
+    be used on bytes (non-ASCII characters, unicode escapes).
+    """
+    if isinstance(regex.pattern, bytes):
+        return regex
+    if not regex.pattern.isascii():
+        return None
+    try:
+        return re.compile(regex.pattern.encode(), regex.flags & ~re.UNICODE)
+    except re.error:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def matches_ascii_as_bytes(regex):
+    """
+    Return True if the bytes version of the str regex matches ASCII content
+    the same way as the regex matches the decoded content. The \\s of the
+    str regexes matches the ASCII separators \\x1c-\\x1f too, unlike the
+    bytes ones, so the regexes using it are not.
+    """
+    return whitespace_class_regex.search(regex.pattern) is None
+
+
+@contextlib.contextmanager
+def mmap_file(path):
+    """
+    Map the file to memory read-only and yield the mmap object, the content
+    is not copied. An empty bytes object is yielded for empty and unreadable
+    files.
+    """
+    try:
+        with open(path, 'rb') as in_file:
+            data = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # empty files cannot be mapped
+        yield b''
+        return
+    try:
+        yield data
+    finally:
+        data.close()
+
+
+def content_windows(size, max_size=None, sample=False):
+    """
+    Return the list of (start, end) ranges of the content of the given size
+    that are searched.
+
+    The whole content is searched if it is not bigger than max_size (or if
+    max_size is not set). The bigger content is searched only up to
+    max_size bytes, or if sample is set, in SAMPLE_WINDOWS windows of
+    max_size bytes in total spread evenly over the whole content.
+    """
+    if not max_size or size <= max_size:
+        return [(0, size)]
+    if not sample:
+        return [(0, max_size)]
+    window = max(max_size // SAMPLE_WINDOWS, 1)
+    step = (size - window) / (SAMPLE_WINDOWS - 1)
+    starts = sorted({round(i * step) for i in range(SAMPLE_WINDOWS)})
+    return [(start, start + window) for start in starts]
+
+
+def search(regex, data, max_size=None, sample=False):
+    """
+    Search the bytes regex in the bytes-like data (e.g. a mmap) limited by
+    max_size and sample (see content_windows). Return the match or None.
+    """
+    return search_windows(regex, data, content_windows(len(data), max_size, sample))
+
+
+def search_windows(regex, data, windows):
+    """Search the bytes regex in the (start, end) windows of the data."""
+    for start, end in windows:
+        match = regex.search(data, start, end)
+        if match:
+            return match
+    return None
+
+
+def line_number(data, offset):
+    """Return the number of the line at the offset of the data (starting with 1)."""
+    view = memoryview(data)
+    try:
+        return 1 + sum(bytes(view[start:min(start + LINE_COUNT_CHUNK, offset)]).count(b'\n')
+                       for start in range(0, offset, LINE_COUNT_CHUNK))
+    finally:
+        view.release()
+
+
+def scan_file(path, regexes, max_size=None, sample=False):
+    """
+    Search the content of the file for all the regexes reading it only once.
+
+    Return a dictionary mapping the regexes to the number of the first line
+    matching them (starting with 1) or None, see scan_file_limits.
+    """
+    return scan_file_limits(path, dict.fromkeys(regexes, max_size), sample)[0]
+
+
+def scan_file_limits(path, limits, sample=False):
+    """
+    Search the content of the file for the regexes, each of them limited by
+    its own max_size, mapping the file only once.
+
+    Return a tuple of two dictionaries mapping the regexes to the number of
+    the first line matching them (starting with 1) or None, and to the
+    number of bytes of the content searched for them.
+
+    The bytes regexes are searched in the mapped content directly, binary
+    files included, the content bigger than max_size is limited or sampled
+    (see content_windows). The str regexes give the same results as on the
+    content decoded from UTF-8 (nothing matches if it is not valid UTF-8);
+    the ASCII content is matched as bytes without decoding if that gives the
+    same results (see matches_ascii_as_bytes). The content bigger than
+    max_size is never decoded, it is searched for the bytes version of the
+    str regexes as for bytes regexes.
+    """
+    results = dict.fromkeys(limits)
+    scanned = dict.fromkeys(limits, 0)
+    with mmap_file(path) as data:
+        is_ascii = None
+        text = None
+        for regex, max_size in limits.items():
+            windows = content_windows(len(data), max_size, sample)
+            limited = windows != [(0, len(data))]
+            as_bytes = isinstance(regex.pattern, bytes) or limited
+            if not as_bytes and matches_ascii_as_bytes(regex):
+                if is_ascii is None:
+                    is_ascii = non_ascii_regex.search(data) is None
+                as_bytes = is_ascii
+            if as_bytes:
+                pattern = bytes_regex(regex)
+                if pattern is not None:
+                    match = search_windows(pattern, data, windows)
+                    if match:
+                        results[regex] = line_number(data, match.start())
+                    scanned[regex] = sum(end - start for start, end in windows)
+                    continue
+                if limited:
+                    continue
+            if text is None:
+                try:
+                    text = str(data, 'utf-8')
+                except UnicodeDecodeError:
+                    text = ''
+            match = regex.search(text)
+            if match:
+                results[regex] = text.count('\n', 0, match.start()) + 1
+            scanned[regex] = len(data)
+    return results, scanned
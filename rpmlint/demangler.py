@@ -0,0 +1,108 @@
+import atexit
+from collections import OrderedDict
+import os
+import subprocess
+import threading
+
+from rpmlint.helpers import ENGLISH_ENVIRONMENT
+
+# c++filt reads the names from a pipe, the input written at once must fit
+# in the pipe buffer so that it never blocks while c++filt is writing
+BATCH_SIZE = 16 * 1024
+CACHE_SIZE = 65536
+
+
+class Demangler:
+    """
+    Demangle the C++ symbol names by a persistent c++filt process shared by
+    all the checked files.
+
+    The names are written to the standard input of c++filt one per line so
+    there is no limit on their number (unlike the command line arguments).
+    The demangled names are kept in a LRU cache, the libraries using the
+    same C++ libraries reference the same symbols.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._process = None
+        self._lock = threading.Lock()
+
+    def demangle(self, names):
+        """
+        Return the list of the demangled names. OSError is raised when
+        c++filt cannot be run.
+        """
+        with self._lock:
+            missing = []
+            for name in dict.fromkeys(names):
+                if '\n' in name:
+                    # not a name c++filt could read in one line
+                    self._cache[name] = name
+                elif name not in self._cache:
+                    missing.append(name)
+            batch = []
+            batch_size = 0
+            for name in missing:
+                batch.append(name)
+                batch_size += len(name) + 1
+                if batch_size >= BATCH_SIZE:
+                    self._demangle_batch(batch)
+                    batch = []
+                    batch_size = 0
+            if batch:
+                self._demangle_batch(batch)
+
+            demangled = []
+            for name in names:
+                self._cache.move_to_end(name)
+                demangled.append(self._cache[name])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return demangled
+
+    def close(self):
+        """Terminate the c++filt process (it is started again if needed)."""
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+    def _demangle_batch(self, names):
+        if self._process is None:
+            self._process = subprocess.Popen(['c++filt'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             encoding='utf8', errors='replace', env=ENGLISH_ENVIRONMENT)
+        try:
+            self._process.stdin.write(''.join(name + '\n' for name in names))
+            self._process.stdin.flush()
+            for name in names:
+                line = self._process.stdout.readline()
+                if not line:
+                    raise OSError(f'c++filt exited with code {self._process.poll()}')
+                self._cache[name] = line[:-1]
+        except OSError:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+            raise
+
+    def _after_fork(self):
+        # the process and the lock belong to the parent, only the copies
+        # of its pipes are closed
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process = None
+        self._lock = threading.Lock()
+
+
+demangler = Demangler()
+atexit.register(demangler.close)
+os.register_at_fork(after_in_child=demangler._after_fork)
+
+
+def demangle(names):
+    """Return the list of the demangled C++ symbol names."""
+    return demangler.demangle(names)
@@ -0,0 +1,513 @@
+from collections import namedtuple
+import contextlib
+import mmap
+import os
+import struct
+import zlib
+
+import zstandard as zstd
+
+
+ELF_MAGIC = b'\x7fELF'
+AR_MAGIC = b'!<arch>\n'
+AR_THIN_MAGIC = b'!<thin>\n'
+AR_HEADER_SIZE = 60
+
+NOT_ELF_ERROR = 'Error: Not an ELF file - it has the wrong magic bytes at the start'
+
+SHF_COMPRESSED = 0x800
+ELFCOMPRESS_ZLIB = 1
+ELFCOMPRESS_ZSTD = 2
+
+SHN_UNDEF = 0
+SHN_XINDEX = 0xffff
+
+ET_REL = 1
+
+SHT_RELA = 4
+SHT_NOBITS = 8
+SHT_REL = 9
+SHT_DYNAMIC = 6
+SHT_SYMTAB = 2
+SHT_DYNSYM = 11
+SHT_GNU_VERDEF = 0x6ffffffd
+SHT_GNU_VERNEED = 0x6ffffffe
+SHT_GNU_VERSYM = 0x6fffffff
+
+PT_LOAD = 1
+PT_DYNAMIC = 2
+
+DT_NULL = 0
+DT_STRTAB = 5
+DT_STRSZ = 10
+
+VERSYM_HIDDEN = 0x8000
+VERSYM_VERSION = 0x7fff
+
+ElfSectionHeader = namedtuple('ElfSectionHeader', ('name', 'type', 'flags', 'addr', 'offset',
+                                                   'size', 'link', 'info', 'entsize'))
+ElfSegment = namedtuple('ElfSegment', ('type', 'flags', 'offset', 'vaddr', 'filesz'))
+ElfSymbol = namedtuple('ElfSymbol', ('name', 'type', 'bind', 'shndx', 'version', 'version_kind'))
+
+# the structures in the order of their fields used below, for
+# (ELFCLASS32, ELFCLASS64)
+_EHDR = ('HHIIIIIHHHHHH', 'HHIQQQIHHHHHH')
+_SHDR = ('IIIIIIIIII', 'IIQQQQIIQQ')
+_PHDR = ('IIIIIIII', 'IIQQQQQQ')
+_DYN = ('II', 'QQ')
+_SYM = ('IIIBBH', 'IBBHQQ')
+_CHDR = ('III', 'IIQQ')
+_REL = ('II', 'QQ')
+_RELA = ('IIi', 'QQq')
+
+
+class ElfError(Exception):
+    """The file cannot be read as an ELF file (or an archive of them)."""
+
+
+class ElfFile:
+    """
+    Reader of the ELF structures of one ELF file (or an archive member)
+    stored in the data buffer at the given offset.
+
+    The structures are decoded directly from the buffer, nothing is copied
+    except the strings.
+    """
+
+    def __init__(self, data, offset=0, size=None, name=None):
+        self.data = data
+        self.base = offset
+        self.limit = len(data) if size is None else offset + size
+        self.name = name
+
+        ident = self._read(0, 16)
+        if ident[:4] != ELF_MAGIC:
+            raise ElfError(NOT_ELF_ERROR)
+        if ident[4] not in (1, 2) or ident[5] not in (1, 2):
+            raise ElfError('Error: Unsupported ELF class or data encoding')
+        self.is_64 = ident[4] == 2
+        self.endian = '<' if ident[5] == 1 else '>'
+        self._structs = {}
+
+        (self.type, self.machine, _version, _entry, self.phoff, self.shoff, _flags,
+         _ehsize, self.phentsize, self.phnum, self.shentsize, self.shnum,
+         self.shstrndx) = self._unpack(_EHDR, 16)
+
+        self._sections = None
+        self._segments = None
+
+    def _struct(self, formats):
+        fmt = formats[self.is_64]
+        st = self._structs.get(fmt)
+        if st is None:
+            st = self._structs[fmt] = struct.Struct(self.endian + fmt)
+        return st
+
+    def _unpack(self, formats, offset):
+        st = self._struct(formats)
+        return self._unpack_struct(st, offset)
+
+    def _unpack_struct(self, st, offset):
+        start = self.base + offset
+        if offset < 0 or start + st.size > self.limit:
+            raise ElfError('Error: The ELF file is truncated')
+        return st.unpack_from(self.data, start)
+
+    def _check_table(self, offset, count, entsize, st):
+        """Check that the table of count entries at offset fits the file."""
+        if entsize < st.size or offset < 0 or self.base + offset + count * entsize > self.limit:
+            raise ElfError('Error: The ELF file is truncated')
+
+    def _read(self, offset, size):
+        start = self.base + offset
+        if offset < 0 or start + size > self.limit:
+            raise ElfError('Error: The ELF file is truncated')
+        return self.data[start:start + size]
+
+    def cstring(self, offset, limit=None):
+        """Return the NUL terminated string at offset (decoded)."""
+        start = self.base + offset
+        end = self.limit if limit is None else min(self.limit, self.base + limit)
+        if offset < 0 or start >= end:
+            return '<corrupt>'
+        stop = self.data.find(b'\0', start, end)
+        if stop == -1:
+            stop = end
+        return self.data[start:stop].decode('utf-8', errors='replace')
+
+    @property
+    def sections(self):
+        """The section headers (including the NULL one at index 0)."""
+        if self._sections is None:
+            self._sections = self._read_sections()
+        return self._sections
+
+    @property
+    def segments(self):
+        """The program headers."""
+        if self._segments is None:
+            self._segments = self._read_segments()
+        return self._segments
+
+    def _read_sections(self):
+        if not self.shoff:
+            return []
+        st = self._struct(_SHDR)
+        raw = [self._unpack_struct(st, self.shoff)]
+        shnum = self.shnum or raw[0][5]
+        shstrndx = raw[0][6] if self.shstrndx == SHN_XINDEX else self.shstrndx
+        self._check_table(self.shoff, shnum, self.shentsize, st)
+        for i in range(1, shnum):
+            raw.append(self._unpack_struct(st, self.shoff + i * self.shentsize))
+
+        strtab = raw[shstrndx] if 0 < shstrndx < len(raw) else None
+        sections = []
+        for values in raw:
+            name, sh_type, flags, addr, offset, size, link, info, _align, entsize = values
+            if strtab is not None:
+                name = self.cstring(strtab[4] + name, strtab[4] + strtab[5])
+            else:
+                name = ''
+            sections.append(ElfSectionHeader(name, sh_type, flags, addr, offset, size, link, info, entsize))
+        return sections
+
+    def _read_segments(self):
+        if not self.phoff:
+            return []
+        phnum = self.phnum
+        if phnum == 0xffff and self.sections:
+            phnum = self.sections[0].info
+        st = self._struct(_PHDR)
+        self._check_table(self.phoff, phnum, self.phentsize, st)
+        segments = []
+        for i in range(phnum):
+            values = self._unpack_struct(st, self.phoff + i * self.phentsize)
+            if self.is_64:
+                p_type, flags, offset, vaddr, _paddr, filesz, _memsz, _align = values
+            else:
+                p_type, offset, vaddr, _paddr, filesz, _memsz, flags, _align = values
+            segments.append(ElfSegment(p_type, flags, offset, vaddr, filesz))
+        return segments
+
+    def section_data(self, section):
+        """Return the content of the section (bytes)."""
+        if section.type == SHT_NOBITS:
+            return b''
+        return self._read(section.offset, section.size)
+
+    def section_content(self, section):
+        """Return the content of the section, decompressed if needed."""
+        data = self.section_data(section)
+        if not section.flags & SHF_COMPRESSED:
+            return data
+        st = self._struct(_CHDR)
+        if len(data) < st.size:
+            raise ElfError('Error: The compressed section is truncated')
+        ch_type = st.unpack_from(data)[0]
+        try:
+            if ch_type == ELFCOMPRESS_ZLIB:
+                return zlib.decompress(data[st.size:])
+            if ch_type == ELFCOMPRESS_ZSTD:
+                return zstd.ZstdDecompressor().decompressobj().decompress(data[st.size:])
+        except (zlib.error, zstd.ZstdError) as e:
+            raise ElfError(f'Error: Unable to decompress section {section.name}: {e}')
+        raise ElfError(f'Error: Unsupported compression type {ch_type} of section {section.name}')
+
+    def relocations(self, target):
+        """
+        Return a dictionary mapping the offsets in the section with the index
+        target to (symbol value, addend) of their relocations. The addend is
+        None for the REL relocations, it is stored in the section itself.
+
+        Only relocatable files (ET_REL) are expected to have relocations of
+        the sections that are not loaded, such as the debug sections.
+        """
+        relocations = {}
+        for section in self.sections:
+            if section.type not in (SHT_REL, SHT_RELA) or section.info != target:
+                continue
+            if not 0 < section.link < len(self.sections):
+                raise ElfError(f'Error: Invalid symbol table of relocation section {section.name}')
+            values = self._symbol_values(self.sections[section.link])
+            st = self._struct(_RELA if section.type == SHT_RELA else _REL)
+            entsize = section.entsize or st.size
+            # the symbol index is stored in the upper bits of r_info
+            shift = 32 if self.is_64 else 8
+            for offset in range(section.offset, section.offset + section.size - st.size + 1, entsize):
+                entry = self._unpack_struct(st, offset)
+                symbol = entry[1] >> shift
+                value = values[symbol] if symbol < len(values) else 0
+                relocations[entry[0]] = (value, entry[2] if section.type == SHT_RELA else None)
+        return relocations
+
+    def _symbol_values(self, table):
+        """Return the list of the values of the symbols of the symbol table."""
+        st = self._struct(_SYM)
+        entsize = table.entsize or st.size
+        count = table.size // entsize if table.type != SHT_NOBITS else 0
+        index = 4 if self.is_64 else 1
+        return [self._unpack_struct(st, table.offset + i * entsize)[index] for i in range(count)]
+
+    def get_section(self, name):
+        for section in self.sections:
+            if section.name == name:
+                return section
+        return None
+
+    def _offset_from_vma(self, vma):
+        for segment in self.segments:
+            if segment.type == PT_LOAD and segment.vaddr <= vma < segment.vaddr + segment.filesz:
+                return vma - segment.vaddr + segment.offset
+        return None
+
+    def dynamic_entries(self):
+        """
+        Return the (tag, value) entries of the dynamic section up to and
+        including the first DT_NULL entry.
+        """
+        offset = size = None
+        for section in self.sections:
+            if section.type == SHT_DYNAMIC:
+                offset, size = section.offset, section.size
+                break
+        else:
+            for segment in self.segments:
+                if segment.type == PT_DYNAMIC:
+                    offset, size = segment.offset, segment.filesz
+                    break
+        if offset is None:
+            return []
+
+        st = self._struct(_DYN)
+        entries = []
+        for entry_offset in range(offset, offset + size - st.size + 1, st.size):
+            tag, value = self._unpack_struct(st, entry_offset)
+            entries.append((tag, value))
+            if tag == DT_NULL:
+                break
+        return entries
+
+    def dynamic_strtab(self, entries):
+        """
+        Return (offset, size) of the string table used by the dynamic
+        section entries.
+        """
+        for section in self.sections:
+            if section.type == SHT_DYNAMIC and 0 < section.link < len(self.sections):
+                strtab = self.sections[section.link]
+                return strtab.offset, strtab.size
+        values = dict(entries)
+        if DT_STRTAB in values:
+            offset = self._offset_from_vma(values[DT_STRTAB])
+            if offset is not None:
+                return offset, values.get(DT_STRSZ, self.limit - self.base - offset)
+        return None
+
+    def symbols(self, table):
+        """
+        Return the symbols of the symbol table section, the version is
+        resolved for dynamic symbols.
+
+        The version_kind of the symbols is 'public' (name@@VERSION),
+        'hidden' (name@VERSION), 'undefined' (name@VERSION (N), where N is
+        stored in version) or None.
+        """
+        strtab = self.sections[table.link] if 0 < table.link < len(self.sections) else None
+        st = self._struct(_SYM)
+        entsize = table.entsize or st.size
+        count = table.size // entsize if table.type != SHT_NOBITS else 0
+
+        versions = None
+        if table.type == SHT_DYNSYM:
+            versions = self._symbol_versions()
+
+        symbols = []
+        for i in range(count):
+            values = self._unpack_struct(st, table.offset + i * entsize)
+            if self.is_64:
+                st_name, info, _other, shndx, _value, _size = values
+            else:
+                st_name, _value, _size, info, _other, shndx = values
+            if strtab is not None and st_name:
+                name = self.cstring(strtab.offset + st_name, strtab.offset + strtab.size)
+            else:
+                name = ''
+            version = version_kind = None
+            if versions is not None:
+                version, version_kind = versions(i, st_name, shndx)
+            symbols.append(ElfSymbol(name, info & 0xf, info >> 4, shndx, version, version_kind))
+        return symbols
+
+    def _symbol_versions(self):
+        """
+        Return a function resolving the version of a dynamic symbol the same
+        way as readelf does, None if the file has no version information.
+        """
+        versym = verdef = verneed = None
+        for section in self.sections:
+            if section.type == SHT_GNU_VERSYM:
+                versym = section
+            elif section.type == SHT_GNU_VERDEF:
+                verdef = section
+            elif section.type == SHT_GNU_VERNEED:
+                verneed = section
+        if versym is None:
+            return None
+
+        defined = {}
+        if verdef is not None:
+            defined = self._version_definitions(verdef)
+        needed = {}
+        if verneed is not None:
+            needed = self._version_needs(verneed)
+        half = struct.Struct(self.endian + 'H')
+
+        def resolve(index, st_name, shndx):
+            vers_data = self._unpack_struct(half, versym.offset + index * 2)[0]
+            if not (vers_data & VERSYM_HIDDEN) and vers_data <= 1:
+                return None, None
+            kind = 'hidden' if vers_data & VERSYM_HIDDEN else 'public'
+            if shndx != SHN_UNDEF and vers_data != 0x8001:
+                definition = defined.get(vers_data & VERSYM_VERSION)
+                if definition is not None:
+                    vda_name, name = definition
+                    if st_name != vda_name:
+                        return name, kind
+                    return None, None
+            if vers_data in needed:
+                return needed[vers_data], 'undefined'
+            return None, None
+
+        return resolve
+
+    def _version_definitions(self, verdef):
+        """Return a dictionary mapping version index to (vda_name, name)."""
+        strtab = self.sections[verdef.link] if 0 < verdef.link < len(self.sections) else None
+        verdef_st = struct.Struct(self.endian + 'HHHHIII')
+        verdaux_st = struct.Struct(self.endian + 'II')
+        result = {}
+        offset = verdef.offset
+        for _i in range(verdef.info or 0xffff):
+            _version, _flags, ndx, cnt, _hash, aux, vd_next = self._unpack_struct(verdef_st, offset)
+            if cnt:
+                vda_name, _vda_next = self._unpack_struct(verdaux_st, offset + aux)
+                name = self.cstring(strtab.offset + vda_name, strtab.offset + strtab.size) if strtab else ''
+                result[ndx] = (vda_name, name)
+            if not vd_next:
+                break
+            offset += vd_next
+        return result
+
+    def _version_needs(self, verneed):
+        """Return a dictionary mapping vna_other to the version name."""
+        strtab = self.sections[verneed.link] if 0 < verneed.link < len(self.sections) else None
+        verneed_st = struct.Struct(self.endian + 'HHIII')
+        vernaux_st = struct.Struct(self.endian + 'IHHII')
+        result = {}
+        offset = verneed.offset
+        for _i in range(verneed.info or 0xffff):
+            _version, cnt, _file, aux, vn_next = self._unpack_struct(verneed_st, offset)
+            aux_offset = offset + aux
+            for _j in range(cnt):
+                _hash, _flags, other, vna_name, vna_next = self._unpack_struct(vernaux_st, aux_offset)
+                name = self.cstring(strtab.offset + vna_name, strtab.offset + strtab.size) if strtab else ''
+                result.setdefault(other, name)
+                if not vna_next:
+                    break
+                aux_offset += vna_next
+            if not vn_next:
+                break
+            offset += vn_next
+        return result
+
+
+def archive_members(data, path, thin):
+    """
+    Yield (name, offset, size, external) of the members of the ar archive
+    in data, the archive symbol tables and the long name table are skipped.
+    The external members of thin archives are not stored in data.
+    """
+    long_names = b''
+    offset = len(AR_MAGIC)
+    while offset + AR_HEADER_SIZE <= len(data):
+        header = data[offset:offset + AR_HEADER_SIZE]
+        if header[58:60] != b'`\n':
+            raise ElfError(f'Error: {path}: invalid archive member header')
+        name = header[:16].rstrip(b' ')
+        try:
+            size = int(header[48:58].strip() or b'0')
+        except ValueError:
+            raise ElfError(f'Error: {path}: invalid archive member size')
+        if size < 0:
+            raise ElfError(f'Error: {path}: invalid archive member size')
+        offset += AR_HEADER_SIZE
+        stored = not thin or name in (b'//', b'/', b'/SYM64/', b'__.SYMDEF', b'__.SYMDEF SORTED')
+        if stored and offset + size > len(data):
+            raise ElfError(f'Error: {path}: truncated archive member')
+
+        if name == b'//':
+            long_names = data[offset:offset + size]
+            offset += size + size % 2
+            continue
+        is_thin_member = thin
+        if name in (b'/', b'/SYM64/', b'__.SYMDEF', b'__.SYMDEF SORTED'):
+            is_thin_member = False
+        elif name.startswith(b'/') and name[1:].isdigit():
+            start = int(name[1:])
+            end = long_names.find(b'\n', start)
+            name = long_names[start:end if end != -1 else len(long_names)].rstrip(b'/')
+            yield name.decode('utf-8', errors='replace'), offset, size, thin
+        elif name.startswith(b'#1/') and name[3:].isdigit():
+            # BSD long names are stored at the start of the member data
+            length = int(name[3:])
+            if length > size:
+                raise ElfError(f'Error: {path}: invalid archive member name')
+            name = data[offset:offset + length].rstrip(b'\0')
+            if name not in (b'__.SYMDEF', b'__.SYMDEF SORTED'):
+                yield name.decode('utf-8', errors='replace'), offset + length, size - length, False
+        else:
+            yield name.rstrip(b'/').decode('utf-8', errors='replace'), offset, size, thin
+
+        # members of thin archives are stored outside of the archive
+        if not is_thin_member:
+            offset += size + size % 2
+
+
+@contextlib.contextmanager
+def open_elf_files(path):
+    """
+    Map the file at path into memory and yield a list of ElfFile objects,
+    one for a plain ELF file and one for each member of an ar archive.
+
+    Raises:
+        ElfError: If the file does not exist, or it (or a member of the
+                  archive) is not an ELF file.
+    """
+    if not os.path.exists(path):
+        raise ElfError(f"Error: '{path}': No such file")
+    if not os.path.isfile(path):
+        raise ElfError(f"Error: '{path}' is not an ordinary file")
+
+    with contextlib.ExitStack() as stack:
+        data = _map_file(stack, path)
+        if data[:len(AR_MAGIC)] in (AR_MAGIC, AR_THIN_MAGIC):
+            thin = data[:len(AR_THIN_MAGIC)] == AR_THIN_MAGIC
+            elf_files = []
+            for name, offset, size, external in archive_members(data, path, thin):
+                if external:
+                    member = os.path.join(os.path.dirname(path), name)
+                    if not os.path.isfile(member):
+                        raise ElfError(f"Error: '{member}': No such file")
+                    elf_files.append(ElfFile(_map_file(stack, member), name=name))
+                else:
+                    elf_files.append(ElfFile(data, offset, size, name=name))
+            yield elf_files
+        else:
+            yield [ElfFile(data)]
+
+
+def _map_file(stack, path):
+    fobj = stack.enter_context(open(path, 'rb'))
+    if not os.fstat(fobj.fileno()).st_size:
+        return b''
+    return stack.enter_context(mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ))
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
+import threading
+
+from rpmlint.cache import ResultCache
+
+try:
+    import magic
+    has_magic = True
+except ImportError:
+    has_magic = False
+
+
+# libmagic handles of the threads, they cannot be shared between them
+_local = threading.local()
+
+
+def _new_detector():
+    # python-magic & libmagic compatibility code
+    # https://github.com/ahupp/python-magic/blob/master/COMPAT.md
+    if hasattr(magic, 'from_file'):
+        return magic.Magic().from_file
+    # libmagic python bindings
+    cookie = magic.open(magic.MAGIC_NONE)
+    cookie.load()
+    return cookie.file
+
+
+def get_magic(path):
+    """Return the libmagic description of the file ('' if it cannot be read)."""
+    detect = getattr(_local, 'detect', None)
+    if detect is None:
+        detect = _local.detect = _new_detector()
+    try:
+        return detect(path)
+    except (ValueError, FileNotFoundError):
+        return ''
+
+
+@functools.lru_cache(maxsize=None)
+def _magic_version():
+    try:
+        return magic.version()
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+class MagicCache:
+    """
+    Classify the package files by libmagic.
+
+    The files are classified in batches by a pool of threads (libmagic
+    releases the GIL) and the results are memoized by the digest of the file
+    content from the package header. The memo is kept in memory for the whole
+    run and also stored in the persistent result cache if it is enabled, so
+    the identical files shipped in many packages (licenses, icons, ...) are
+    classified only once.
+    """
+
+    # number of results memoized in memory
+    memo_size = 100000
+    _default = None
+
+    def __init__(self, result_cache=None, threads=None):
+        self.result_cache = result_cache
+        self.threads = threads or min(8, os.cpu_count() or 1)
+        self._memo = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Return the magic cache using the result cache configured by
+        UseResultCache option.
+        """
+        return cls(ResultCache.from_config(config))
+
+    @classmethod
+    def default(cls):
+        """Return the shared magic cache that is kept only in memory."""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def classify(self, pkgfiles, stats):
+        """
+        Return the list of libmagic descriptions of the package files.
+
+        Args:
+            pkgfiles: A list of PkgFile objects of the extracted files.
+            stats: A dictionary with 'hits' and 'misses' counters of the memo
+                   that are updated.
+        """
+        results = [None] * len(pkgfiles)
+        # key -> indexes of the files with the same content
+        pending = OrderedDict()
+        for i, pkgfile in enumerate(pkgfiles):
+            key = f'{pkgfile.md5}:{pkgfile.size}' if pkgfile.md5 else None
+            if key is None:
+                pending[('path', i)] = [i]
+                continue
+            found = self._lookup(key)
+            if found is not None:
+                results[i] = found
+                stats['hits'] += 1
+            elif key in pending:
+                pending[key].append(i)
+                stats['hits'] += 1
+            else:
+                pending[key] = [i]
+
+        paths = [pkgfiles[indexes[0]].path for indexes in pending.values()]
+        stats['misses'] += len(paths)
+        for (key, indexes), magic_description in zip(pending.items(), self._detect_all(paths)):
+            if isinstance(key, str):
+                self._store(key, magic_description)
+            for i in indexes:
+                results[i] = magic_description
+        return results
+
+    def _lookup(self, key):
+        magic_description = self._memo.get(key)
+        if magic_description is not None:
+            self._memo.move_to_end(key)
+            return magic_description
+        if self.result_cache is not None:
+            found, magic_description = self.result_cache.lookup(self._result_cache_key(key))
+            if found:
+                self._remember(key, magic_description)
+                return magic_description
+        return None
+
+    def _store(self, key, magic_description):
+        self._remember(key, magic_description)
+        if self.result_cache is not None:
+            self.result_cache.store(self._result_cache_key(key), magic_description)
+
+    def _remember(self, key, magic_description):
+        self._memo[key] = magic_description
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    @staticmethod
+    def _result_cache_key(key):
+        # the descriptions differ between libmagic versions
+        return ResultCache.key('magic', key, _magic_version())
+
+    def _detect_all(self, paths):
+        if self.threads < 2 or len(paths) < 2:
+            return [self._detect(path) for path in paths]
+        # the threads live only for the batch, so no thread is running when
+        # the worker processes are forked (--jobs, --serve)
+        with ThreadPoolExecutor(min(self.threads, len(paths)), thread_name_prefix='rpmlint-magic') as executor:
+            return list(executor.map(self._detect, paths))
+
+    def _detect(self, path):
+        return get_magic(path)
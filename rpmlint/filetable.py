@@ -0,0 +1,266 @@
+from array import array
+from collections.abc import Mapping, Set
+import os
+
+import rpm
+from rpmlint.pkgfile import PkgFile
+
+
+class _Column:
+    """
+    Attribute of FileEntry that is decoded from the column of its FileTable
+    on the first access and stored in the slot of PkgFile.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = getattr(PkgFile, name)
+
+    def __get__(self, entry, owner=None):
+        if entry is None:
+            return self
+        try:
+            return self.slot.__get__(entry, owner)
+        except AttributeError:
+            value = self.decode(entry)
+            self.slot.__set__(entry, value)
+            return value
+
+    def __set__(self, entry, value):
+        self.slot.__set__(entry, value)
+
+    def decode(self, entry):
+        return entry._table.decode(self.name, entry._index)
+
+
+class _MagicColumn(_Column):
+    """
+    The magic is calculated for all the files of the table at once (see
+    FileTable.load_magic).
+    """
+
+    def decode(self, entry):
+        entry._table.load_magic()
+        return self.slot.__get__(entry)
+
+
+class _InternedColumn:
+    """
+    Column of strings that repeat a lot (user and group names) stored as
+    indexes to the table of the distinct strings.
+    """
+
+    __slots__ = ['strings', 'indexes']
+
+    def __init__(self, values, decoder=None):
+        ids = {}
+        self.indexes = array('I')
+        for value in values:
+            i = ids.get(value)
+            if i is None:
+                i = ids[value] = len(ids)
+            self.indexes.append(i)
+        self.strings = [decoder(value) if decoder else value for value in ids]
+
+    def __getitem__(self, i):
+        return self.strings[self.indexes[i]]
+
+    def __len__(self):
+        return len(self.indexes)
+
+
+def _compact(values, typecode):
+    """Return the values in an array if they fit the typecode."""
+    try:
+        return array(typecode, values)
+    except (OverflowError, TypeError):
+        return values
+
+
+class FileFlagSet(Set):
+    """
+    Set of the names of the files of a FileTable that have any of the given
+    flags (config, doc, ghost, ...) set.
+
+    The members are kept as a bitset over the file indexes, so membership
+    tests cost a dictionary lookup and a bit test, and as an array of the
+    member indexes that keeps the iteration in the order of the files.
+    """
+
+    def __init__(self, table, flags):
+        column = table._columns['flags']
+        self._names = table._names
+        self._indexes = table._indexes
+        self._bits = bytearray((len(self._names) + 7) // 8)
+        self._members = array('I')
+        for i, value in enumerate(column):
+            if value & flags:
+                self._bits[i >> 3] |= 1 << (i & 7)
+                self._members.append(i)
+
+    def __contains__(self, name):
+        i = self._indexes.get(name)
+        return i is not None and bool(self._bits[i >> 3] & 1 << (i & 7))
+
+    def __iter__(self):
+        return (self._names[i] for i in self._members)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+
+class FileEntry(PkgFile):
+    """PkgFile whose attributes are decoded from a FileTable when needed."""
+
+    __slots__ = ['_table', '_index']
+
+    flags = _Column()
+    mode = _Column()
+    user = _Column()
+    group = _Column()
+    linkto = _Column()
+    size = _Column()
+    md5 = _Column()
+    mtime = _Column()
+    rdev = _Column()
+    inode = _Column()
+    requires = _Column()
+    provides = _Column()
+    lang = _Column()
+    magic = _MagicColumn()
+    filecaps = _Column()
+    _path = _Column()
+    extract = _Column()
+
+    def __init__(self, table, index, name):
+        self._table = table
+        self._index = index
+        self.name = name
+
+    @property
+    def known_magic(self):
+        # the magic from the header unless all the magic is already loaded
+        try:
+            return PkgFile.magic.__get__(self) or ''
+        except AttributeError:
+            return self._table.column_value('magic', self._index) or ''
+
+
+class FileTable(Mapping):
+    """
+    Mapping of the names of the package files to PkgFile objects that is
+    backed by the file arrays (columns) of the package header.
+
+    The numeric columns are stored in arrays and the user and group names in
+    an interned string table. The PkgFile object of a file is created when
+    the file is accessed for the first time and each of its attributes is
+    decoded only when it is needed, so checks that need just the file names
+    and modes do not pay for decoding the rest. That matters for packages
+    with hundreds of thousands of files.
+    """
+
+    # array typecodes of the numeric columns (the columns with values that
+    # do not fit are kept as lists)
+    array_typecodes = {
+        'flags': 'I',
+        'mode': 'H',
+        'size': 'Q',
+        'mtime': 'q',
+        'rdev': 'I',
+        'inode': 'I',
+    }
+    interned_columns = ('user', 'group')
+
+    def __init__(self, names, columns, decoders, dirname, extract=None, magic_loader=None):
+        """
+        Args:
+            names: A list of the file names.
+            columns: A dictionary mapping PkgFile attribute names to the lists
+                     of their raw values (missing attributes are None).
+            decoders: A dictionary mapping the attribute names to functions
+                      decoding the raw values (the values are used as they
+                      are for the other attributes).
+            dirname: Directory with the extracted files.
+            extract: Callback extracting a file on the first access to its
+                     path (lazy extraction mode) or None.
+            magic_loader: Function returning the list of magic descriptions
+                          of the given PkgFile objects (with the magic from
+                          the header set) or None to use the header ones.
+        """
+        self._names = names
+        self._indexes = {name: i for i, name in enumerate(names)}
+        self._entries = [None] * len(names)
+        self._columns = {}
+        self._decoders = dict(decoders)
+        for attribute, values in columns.items():
+            if values is not None and attribute in self.interned_columns:
+                values = _InternedColumn(values, self._decoders.pop(attribute, None))
+            elif values is not None and attribute in self.array_typecodes:
+                values = _compact(values, self.array_typecodes[attribute])
+            self._columns[attribute] = values
+        self._dirname = dirname
+        self._extract = extract
+        self._magic_loader = magic_loader
+        self._magic_loaded = False
+
+    def __getitem__(self, name):
+        i = self._indexes[name]
+        entry = self._entries[i]
+        if entry is None:
+            entry = self._entries[i] = FileEntry(self, i, name)
+        return entry
+
+    def __contains__(self, name):
+        return name in self._indexes
+
+    def __iter__(self):
+        return iter(self._indexes)
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def decode(self, attribute, i):
+        """Return the value of the attribute of the i-th file."""
+        if attribute == '_path':
+            return os.path.normpath(os.path.join(self._dirname, self._names[i].lstrip('/')))
+        if attribute == 'extract':
+            if self._extract is None or self.column_value('flags', i) & rpm.RPMFILE_GHOST:
+                return None
+            return self._extract
+        return self.column_value(attribute, i)
+
+    def column_value(self, attribute, i):
+        """Return the decoded value of the attribute of the i-th file."""
+        column = self._columns.get(attribute)
+        if column is None:
+            return None
+        decoder = self._decoders.get(attribute)
+        return column[i] if decoder is None else decoder(column[i])
+
+    def names_with_flags(self, flags):
+        """Return the FileFlagSet of the files with any of the flags set."""
+        return FileFlagSet(self, flags)
+
+    def load_magic(self):
+        """
+        Set the magic of all the files, the ones without the magic in the
+        header are classified by the magic_loader at once.
+        """
+        if self._magic_loaded:
+            return
+        self._magic_loaded = True
+        slot = PkgFile.magic
+        entries = []
+        for name in self._indexes:
+            entry = self[name]
+            try:
+                slot.__get__(entry)
+            except AttributeError:
+                slot.__set__(entry, self.column_value('magic', entry._index))
+                entries.append(entry)
+        if self._magic_loader is not None and entries:
+            for entry, magic_description in zip(entries, self._magic_loader(entries)):
+                slot.__set__(entry, magic_description)
@@ -1,3 +1,6 @@
+from collections import namedtuple
+import functools
+import operator
 from pathlib import Path
 import re
 import textwrap
@@ -10,6 +13,290 @@ try:
 except ImportError:
     import tomli as tomllib
 
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Stand-in for the package of the replayed messages, see Filter.replay
+RecordedPkg = namedtuple('RecordedPkg', ('name', 'arch', 'current_linenum'))
+
+LEVEL_COLORS = {'E': Color.Red, 'W': Color.Yellow}
+
+
+@functools.lru_cache(maxsize=1024)
+def _package_filename(name):
+    return Path(name).name
+
+
+class Diagnostic:
+    """
+    One rpmlint issue reported for a package.
+
+    The issue is kept in the structured form and it is formatted into the
+    text only when it is printed out.
+    """
+
+    __slots__ = ('package', 'arch', 'line', 'level', 'issue', 'details', 'badness', 'sort_key')
+
+    def __init__(self, package, arch, line, level, issue, details, badness):
+        self.package = package
+        self.arch = arch
+        self.line = line
+        self.level = level
+        self.issue = issue
+        # details joined by spaces (empty details are skipped)
+        self.details = details
+        self.badness = badness
+        # the output is sorted by the issue name and the colored level, the
+        # same order as of the printed out lines (the level is preceded by
+        # its color on a terminal)
+        self.sort_key = (issue, LEVEL_COLORS.get(level, Color.Bold) + level)
+
+    def _prefix(self):
+        line = f'{self.line}:' if self.line else ''
+        arch = f'.{self.arch}' if self.arch else ''
+        return f'{self.package}{arch}:{line}'
+
+    def plain(self):
+        """
+        Return the text of the issue without colors and badness, it is used
+        for the filtering.
+        """
+        details = f' {self.details}' if self.details else ''
+        return f'{self._prefix()} {self.level}: {self.issue}{details}'
+
+    def colored(self):
+        """Return the colored text of the issue as it is printed out."""
+        lvl_color = LEVEL_COLORS.get(self.level, Color.Bold)
+        bad_output = f' (Badness: {self.badness})' if self.badness > 1 else ''
+        details = f' {self.details}' if self.details else ''
+        return (f'{Color.Bold}{self._prefix()}{Color.Reset} {lvl_color}{self.level}: {self.issue}{Color.Reset}'
+                f'{bad_output}{details}')
+
+    def __str__(self):
+        return self.colored()
+
+
+class FilterMatcher:
+    """
+    Find the first of the filter regexes that matches a message.
+
+    Searching every message with every filter gets slow with the large
+    rpmlintrc files, so the filters are indexed by short pieces (n-grams)
+    of the literal strings they require in the matched text, which is
+    mostly the issue name. Only the filters whose n-gram occurs in the
+    message are tried. The filters without such a literal are tried only
+    when a combined alternation of them matches the message (the filters
+    anchored at the start of the message are combined separately, so the
+    alternation is tried only at the start too).
+
+    The candidates are tried in the original order of the filters, so the
+    first matching filter is reported exactly as when all filters are tried
+    one by one.
+    """
+
+    ngram = 4
+
+    def __init__(self, regexes):
+        self.regexes = regexes
+        # n-gram -> indexes of the filters requiring it
+        self.index = {}
+        # lowercase n-gram -> indexes of the filters requiring it in any case
+        self.icase_index = {}
+        # filters that are tried only when a combined alternation matches
+        self.combined = []
+        # tuples (combined alternation, {group: index of the filter})
+        self.combined_regexes = []
+        # filters that are always tried
+        self.unindexed = []
+
+        parsed = [self._parse(regex) for regex in regexes]
+        # number of filters containing the n-gram, the least common n-grams
+        # yield the fewest candidates
+        self._frequency = {}
+        for items in parsed:
+            if items is not None:
+                for key in self._ngrams(items, items.state.flags & re.IGNORECASE):
+                    self._frequency[key] = self._frequency.get(key, 0) + 1
+
+        # (anchored, not anchored) lists of tuples (index, alternative)
+        alternatives = ([], [])
+        for i, items in enumerate(parsed):
+            keys = self._keys(items, items.state.flags & re.IGNORECASE) if items is not None else None
+            if keys:
+                for gram, ignore_case in keys:
+                    index = self.icase_index if ignore_case else self.index
+                    index.setdefault(gram, []).append(i)
+                continue
+            alternative = self._alternative(regexes[i])
+            if alternative is None:
+                self.unindexed.append(i)
+            else:
+                self.combined.append(i)
+                anchored = (items and items[0] in ((sre_parse.AT, sre_parse.AT_BEGINNING_STRING),
+                                                   (sre_parse.AT, sre_parse.AT_BEGINNING)) and
+                            not regexes[i].flags & re.MULTILINE)
+                alternatives[0 if anchored else 1].append((i, alternative))
+        # all the filters from icase_index are tried for non-ASCII texts
+        self.icase_indexed = sorted({i for filters in self.icase_index.values() for i in filters})
+
+        for anchored, group_alternatives in zip((True, False), alternatives):
+            if not group_alternatives:
+                continue
+            groups = {}
+            group = 1
+            for i, _ in group_alternatives:
+                groups[group] = i
+                group += regexes[i].groups + 1
+            pattern = '|'.join(alternative for _, alternative in group_alternatives)
+            try:
+                regex = re.compile(f'^(?:{pattern})' if anchored else pattern)
+            except (re.error, RecursionError, OverflowError, AssertionError):
+                self.unindexed = sorted(self.unindexed + list(groups.values()))
+                self.combined = sorted(set(self.combined) - set(groups.values()))
+                continue
+            self.combined_regexes.append((regex, groups))
+
+    @staticmethod
+    def _parse(regex):
+        """Return the parsed regex or None if it cannot be parsed."""
+        if not isinstance(regex.pattern, str):
+            return None
+        try:
+            return sre_parse.parse(regex.pattern, regex.flags)
+        except (re.error, RecursionError, OverflowError):
+            return None
+
+    @staticmethod
+    def _literals(items):
+        """
+        Yield the tuples (literal, op, value) of the parsed regex items, where
+        the literal is the string of the consecutive literal items preceding
+        the (op, value) item.
+        """
+        literal = ''
+        for op, value in list(items) + [(None, None)]:
+            if op is sre_parse.LITERAL:
+                literal += chr(value)
+            else:
+                yield literal, op, value
+                literal = ''
+
+    @classmethod
+    def _literal_ngrams(cls, literal, ignore_case):
+        """
+        Return the list of the keys (n-gram, ignore_case) of the literal.
+        """
+        if ignore_case:
+            # only the ASCII letters are matched in any case by str.lower
+            if not literal.isascii():
+                return []
+            literal = literal.lower()
+        n = cls.ngram
+        return [(literal[i:i + n], bool(ignore_case)) for i in range(len(literal) - n + 1)]
+
+    @staticmethod
+    def _group_ignores_case(value, ignore_case):
+        # value of SUBPATTERN is (group, add_flags, del_flags, items)
+        return bool(value[1] & re.IGNORECASE or (ignore_case and not value[2] & re.IGNORECASE))
+
+    @classmethod
+    def _ngrams(cls, items, ignore_case):
+        """Return the set of keys of all literals in the parsed regex."""
+        keys = set()
+        for literal, op, value in cls._literals(items):
+            keys.update(cls._literal_ngrams(literal, ignore_case))
+            if op is sre_parse.SUBPATTERN:
+                keys |= cls._ngrams(value[-1], cls._group_ignores_case(value, ignore_case))
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                keys |= cls._ngrams(value[2], ignore_case)
+            elif op is sre_parse.BRANCH:
+                for branch in value[1]:
+                    keys |= cls._ngrams(branch, ignore_case)
+        return keys
+
+    def _keys(self, items, ignore_case):
+        """
+        Return the set of keys (n-gram, ignore_case) of which at least one
+        occurs in every text matched by the parsed regex or None if there is
+        no such set.
+        """
+        options = []
+        for literal, op, value in self._literals(items):
+            keys = sorted(self._literal_ngrams(literal, ignore_case))
+            if keys:
+                options.append({min(keys, key=self._frequency.get)})
+            if op is sre_parse.SUBPATTERN:
+                options.append(self._keys(value[-1], self._group_ignores_case(value, ignore_case)))
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                if value[0] > 0:
+                    options.append(self._keys(value[2], ignore_case))
+            elif op is sre_parse.BRANCH:
+                # one of the branches matches
+                branches = [self._keys(branch, ignore_case) for branch in value[1]]
+                if all(branches):
+                    options.append(set().union(*branches))
+        options = [option for option in options if option]
+        if not options:
+            return None
+        return min(options, key=lambda option: (sum(self._frequency[key] for key in option), sorted(option)))
+
+    @staticmethod
+    def _alternative(regex):
+        """
+        Return the regex as a part of the combined alternation or None if it
+        cannot be combined.
+        """
+        # group references would point to wrong groups in the combined regex
+        if not isinstance(regex.pattern, str) or regex.groupindex or re.search(r'\\[1-9]', regex.pattern):
+            return None
+        # global inline flags are allowed only at the start of the whole
+        # regex, turn them into flags of the group
+        prefix = re.match(r'(?:\(\?[aiLmsux]+\))+', regex.pattern)
+        if prefix is None:
+            alternative = f'({regex.pattern})'
+        else:
+            flags = ''.join(sorted(set(re.sub('[^aiLmsux]', '', prefix.group()))))
+            alternative = f'((?{flags}:{regex.pattern[prefix.end():]}))'
+        try:
+            re.compile(alternative)
+        except re.error:
+            return None
+        return alternative
+
+    def search(self, text):
+        """
+        Return the first (in the original order) filter regex matching the
+        text or None if there is no such regex.
+        """
+        n = self.ngram
+        candidates = set(self.unindexed)
+        if self.index:
+            for gram in self.index.keys() & {text[i:i + n] for i in range(len(text) - n + 1)}:
+                candidates.update(self.index[gram])
+        if self.icase_index:
+            if text.isascii():
+                lower = text.lower()
+                for gram in self.icase_index.keys() & {lower[i:i + n] for i in range(len(lower) - n + 1)}:
+                    candidates.update(self.icase_index[gram])
+            else:
+                candidates.update(self.icase_indexed)
+        # the filter matched by a combined alternation is the result unless
+        # one of the filters before it matches too
+        first = None
+        for regex, groups in self.combined_regexes:
+            match = regex.search(text)
+            if match is not None:
+                candidates.update(groups.values())
+                first = min(first, groups[match.lastindex]) if first is not None else groups[match.lastindex]
+        if first is not None:
+            candidates = {i for i in candidates if i <= first}
+        for i in sorted(candidates):
+            if self.regexes[i].search(text):
+                return self.regexes[i]
+        return None
+
 
 class Filter:
     """
@@ -26,12 +313,26 @@ class Filter:
         Args:
             config: Config object with parsed rpmlint configuration.
         """
+        # Dictionary containing mapped values of descriptions for the errors.
+        self.error_details = {}
+        # Load it up with the toml descriptions
+        self.error_details.update(self._load_descriptions())
+        self.reset(config)
+
+    def reset(self, config):
+        """
+        Initialize options from configuration and forget all the collected
+        messages, so the filter can be reused for a new run (--serve).
+
+        The descriptions are kept, they do not depend on the configuration.
+        """
         # badness stuff
         self.badness_threshold = config.configuration['BadnessThreshold']
         self.badness = config.configuration['Scoring']
         self.strict = config.strict
         # list of filter regexes
         self.filters_regexes = [re.compile(f) for f in config.configuration['Filters']]
+        self.filter_matcher = FilterMatcher(self.filters_regexes)
         self.filter_titles = set(config.configuration['FilterErrorTitles'])
         # list of blocked filters
         self.blocked_filters = set(config.configuration['BlockedFilters'])
@@ -42,10 +343,6 @@ class Filter:
         self.info = config.info
         # How many bad hits we already collected while collecting issues
         self.score = 0
-        # Dictionary containing mapped values of descriptions for the errors.
-        self.error_details = {}
-        # Load it up with the toml descriptions
-        self.error_details.update(self._load_descriptions())
         # Counter of how many issues we encountered
         self.printed_messages = {'I': 0, 'W': 0, 'E': 0}
         # Number of promoted warnings and infos to errors
@@ -54,6 +351,10 @@ class Filter:
         self.filtered_out = 0
         # Messages
         self.results = []
+        # Issues whose descriptions were printed out by flush_results
+        self.described_issues = set()
+        # Raw add_info calls recorded since start_recording (or None)
+        self.recorded = None
 
     @staticmethod
     def _load_descriptions():
@@ -79,10 +380,10 @@ class Filter:
 
     def add_info(self, level, package, rpmlint_issue, *details):
         """
-        Format rpmlint issue output and add it to self.results.
+        Create a record of the rpmlint issue and add it to self.results.
 
-        It creates formatted and colored output consisting of all information
-        about rpmlint issue given by the arguments.
+        The record (Diagnostic) holds all information about the rpmlint issue
+        given by the arguments, it is formatted when printed out.
 
         Args:
             level: A string with level of the rpmlint issue ('E' - Error,
@@ -96,9 +397,10 @@ class Filter:
         if ' ' in rpmlint_issue:
             raise ValueError(f'Space cannot be part of an issue name: "{rpmlint_issue}"')
 
-        # filename in some cases can contain tmp paths and we don't need it
-        # for the printout
-        filename = Path(package.name).name
+        if self.recorded is not None:
+            self.recorded.append([level, package.name, package.arch, package.current_linenum,
+                                  rpmlint_issue, [str(detail) if detail else '' for detail in details]])
+
         # we can get badness treshold
         badness = None
         if rpmlint_issue in self.badness:
@@ -118,33 +420,21 @@ class Filter:
 
         if badness is None:
             badness = 1 if level == 'E' else 0
-        # set coloring
-        if level == 'E':
-            lvl_color = Color.Red
-        elif level == 'W':
-            lvl_color = Color.Yellow
-        else:
-            lvl_color = Color.Bold
-        # compile the message
-        line = f'{package.current_linenum}:' if package.current_linenum else ''
-        arch = f'.{package.arch}' if package.arch else ''
-        bad_output = f' (Badness: {badness})' if badness > 1 else ''
-        detail_output = ''
-        for detail in details:
-            if detail:
-                detail_output += f' {detail}'
-        result = f'{Color.Bold}{filename}{arch}:{line}{Color.Reset} {lvl_color}{level}: {rpmlint_issue}{Color.Reset}{bad_output}{detail_output}'
+        # filename in some cases can contain tmp paths and we don't need it
+        # for the printout
+        diag = Diagnostic(_package_filename(package.name), package.arch, package.current_linenum, level,
+                          rpmlint_issue, ' '.join([str(detail) for detail in details if detail]), badness)
 
         # filter by the result message
-        result_no_color = f'{filename}{arch}:{line} {level}: {rpmlint_issue}{detail_output}'
         # unused-rpmlintrc-filter warnings should be skipped
         if rpmlint_issue != 'unused-rpmlintrc-filter' and rpmlint_issue not in self.blocked_filters:
             if rpmlint_issue in self.filter_titles:
                 self.filtered_out += 1
                 return
-            for f in self.filters_regexes:
-                if f.search(result_no_color):
-                    self.used_filters.add(f.pattern)
+            if self.filters_regexes:
+                matched = self.filter_matcher.search(diag.plain())
+                if matched is not None:
+                    self.used_filters.add(matched.pattern)
                     self.filtered_out += 1
                     return
 
@@ -152,9 +442,81 @@ class Filter:
         self.score += badness
         self.printed_messages[level] += 1
 
-        self.results.append(result)
+        self.results.append(diag)
+
+    def take_results(self):
+        """
+        Return the collected messages together with the counters and reset
+        them.
+
+        It is used to hand over the output of a worker process to the Filter
+        in the main process (see merge_results).
+
+        Returns:
+            A dictionary with the messages, counters and used filters.
+        """
+        state = {
+            'results': self.results,
+            'score': self.score,
+            'printed_messages': self.printed_messages,
+            'promoted_to_error': self.promoted_to_error,
+            'filtered_out': self.filtered_out,
+            'used_filters': self.used_filters,
+        }
+        self.results = []
+        self.score = 0
+        self.printed_messages = {'I': 0, 'W': 0, 'E': 0}
+        self.promoted_to_error = 0
+        self.filtered_out = 0
+        self.used_filters = set()
+        return state
+
+    def merge_results(self, state):
+        """
+        Merge the output returned by take_results into this Filter.
+
+        Args:
+            state: A dictionary returned by take_results.
+        """
+        self.results.extend(state['results'])
+        self.score += state['score']
+        for level, count in state['printed_messages'].items():
+            self.printed_messages[level] += count
+        self.promoted_to_error += state['promoted_to_error']
+        self.filtered_out += state['filtered_out']
+        self.used_filters |= state['used_filters']
+
+    def start_recording(self):
+        """
+        Start recording the raw (not yet filtered) messages passed to
+        add_info, see stop_recording.
+        """
+        self.recorded = []
+
+    def stop_recording(self):
+        """
+        Stop recording and return the recorded messages.
+
+        Returns:
+            A list of messages (JSON serializable) that can be passed to
+            replay.
+        """
+        recorded = self.recorded
+        self.recorded = None
+        return recorded
 
-    def print_results(self, results, config=None):
+    def replay(self, recorded):
+        """
+        Pass the recorded messages to add_info again, so the current filters
+        and scoring apply to them.
+
+        Args:
+            recorded: A list of messages returned by stop_recording.
+        """
+        for level, name, arch, linenum, rpmlint_issue, details in recorded:
+            self.add_info(level, RecordedPkg(name, arch, linenum), rpmlint_issue, *details)
+
+    def print_results(self, results, config=None, described=None):
         """
         Provide all the information about the specified package.
 
@@ -162,32 +524,63 @@ class Filter:
         once per rpmlint_issue.
 
         Args:
-            results: A list with rpmlint messages.
+            results: A list with rpmlint messages (Diagnostic objects).
             config: parsed configuration file that is used as a source for
                     new description strings
+            described: A set of issues whose descriptions were already
+                       printed out, the printed ones are added to it
 
         Returns:
             A string with final rpmlint output.
         """
-        output = ''
-        results.sort(key=self.__diag_sortkey, reverse=True)
+        output = []
+
+        def add_description(rpmlint_issue):
+            if described is None or rpmlint_issue not in described:
+                output.append(self.get_description(rpmlint_issue, config))
+                if described is not None:
+                    described.add(rpmlint_issue)
+
+        results.sort(key=operator.attrgetter('sort_key'), reverse=True)
         last_issue = ''
         for diag in results:
             if self.info:
-                rpmlint_issue = diag.split()[2].rstrip(Color.Reset)
+                rpmlint_issue = diag.issue
                 # print out details for each rpmlint_issue we had
                 if rpmlint_issue != last_issue:
                     if last_issue:
-                        output += self.get_description(last_issue, config)
+                        add_description(last_issue)
                     last_issue = rpmlint_issue
-            output += diag + '\n'
+            output.append(diag.colored() + '\n')
         if self.info and last_issue:
-            output += self.get_description(last_issue, config)
+            add_description(last_issue)
+        output = ''.join(output)
         # normalize the output as rpm 4.15 uses surrogates
         output = output.encode('utf-8', errors='surrogateescape').decode('utf-8', errors='replace')
 
         return output
 
+    def flush_results(self, config=None):
+        """
+        Return the output of the messages collected since the last call and
+        drop them.
+
+        It is used by the streaming output (--stream) to print the messages
+        of each package as soon as it is checked. The counters are kept for
+        the final summary and every description (in the verbose mode) is
+        printed out only once.
+
+        Args:
+            config: parsed configuration file that is used as a source for
+                    new description strings
+
+        Returns:
+            A string with rpmlint output of the messages.
+        """
+        output = self.print_results(self.results, config, self.described_issues)
+        self.results = []
+        return output
+
     def get_description(self, rpmlint_issue, config=None):
         """
         Get description for specified rpmlint issue (error, warning or info).
@@ -213,14 +606,6 @@ class Filter:
             description = textwrap.fill(self.error_details[rpmlint_issue], 78, break_on_hyphens=False) + '\n\n'
         return description
 
-    def __diag_sortkey(self, x):
-        """
-        Sorting helper, xs[1] is packagename line architecture
-                        xs[2] is the reason of the error
-        """
-        xs = x.split()
-        return (xs[2], xs[1])
-
     def validate_filters(self, pkg):
         for f in self.rpmlintrc_filters:
             if f not in self.used_filters:
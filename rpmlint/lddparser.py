@@ -1,15 +1,184 @@
-import re
-import subprocess
+import os
+from pathlib import Path
+import platform
+import struct
+import threading
 
-from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.demangler import demangle
+from rpmlint.elffile import ElfError, open_elf_files, SHN_UNDEF, SHT_DYNSYM
 
+DT_NEEDED = 1
+DT_SONAME = 14
+DT_RPATH = 15
+DT_RUNPATH = 29
 
-class LddParser:
+PT_INTERP = 3
+
+STB_GLOBAL = 1
+STB_WEAK = 2
+STB_GNU_UNIQUE = 10
+STT_SECTION = 3
+STT_FILE = 4
+
+# the dynamic loaders tried by ldd (RTLDLIST) for the objects without
+# an interpreter (shared libraries)
+RTLD_PATHS = ('/lib64/ld-linux-x86-64.so.2', '/lib/ld-linux.so.2', '/libx32/ld-linux-x32.so.2',
+              '/lib/ld-linux-aarch64.so.1', '/lib64/ld64.so.2', '/lib64/ld64.so.1', '/lib/ld64.so.1',
+              '/lib/ld-linux-armhf.so.3', '/lib/ld-linux.so.3', '/lib/ld-linux-riscv64-lp64d.so.1',
+              '/lib64/ld-linux-loongarch-lp64d.so.1', '/lib/ld.so.1')
+DEFAULT_LIB_PATHS = ('/lib64', '/usr/lib64', '/lib', '/usr/lib')
+LD_SO_CACHE = '/etc/ld.so.cache'
+LD_SO_CACHE_MAGIC = b'glibc-ld.so.cache1.1'
+
+
+class SharedObject:
+    """
+    Dynamic linking information of an ELF file: its names, dependencies,
+    search paths and the defined and undefined dynamic symbols.
+    """
+
+    def __init__(self, path, elf_file):
+        self.path = path
+        self.machine = (elf_file.is_64, elf_file.endian, elf_file.machine)
+        self.soname = None
+        self.needed = []
+        self.rpath = []
+        self.runpath = []
+        self.interpreter = None
+        # symbol name -> [(version, hidden)] of its definitions
+        self.defined = {}
+        # [(symbol name, version, weak)] of the references
+        self.undefined = []
+
+        for segment in elf_file.segments:
+            if segment.type == PT_INTERP:
+                self.interpreter = elf_file.cstring(segment.offset, segment.offset + segment.filesz)
+        entries = elf_file.dynamic_entries()
+        self.is_dynamic = bool(entries)
+        strtab = elf_file.dynamic_strtab(entries)
+        for tag, value in entries:
+            if tag not in (DT_NEEDED, DT_SONAME, DT_RPATH, DT_RUNPATH) or strtab is None or value >= strtab[1]:
+                continue
+            string = elf_file.cstring(strtab[0] + value, strtab[0] + strtab[1])
+            if tag == DT_NEEDED:
+                self.needed.append(string)
+            elif tag == DT_SONAME:
+                self.soname = string
+            elif tag == DT_RPATH:
+                self.rpath.extend(string.split(':'))
+            else:
+                self.runpath.extend(string.split(':'))
+
+        for section in elf_file.sections:
+            if section.type != SHT_DYNSYM:
+                continue
+            for symbol in elf_file.symbols(section)[1:]:
+                if not symbol.name or symbol.bind not in (STB_GLOBAL, STB_WEAK, STB_GNU_UNIQUE):
+                    continue
+                if symbol.shndx == SHN_UNDEF:
+                    version = symbol.version if symbol.version_kind == 'undefined' else None
+                    self.undefined.append((symbol.name, version, symbol.bind == STB_WEAK))
+                elif symbol.type not in (STT_SECTION, STT_FILE):
+                    self.defined.setdefault(symbol.name, []).append(
+                        (symbol.version, symbol.version_kind == 'hidden'))
+
+    def defines(self, name, version):
+        """
+        Return True if the object provides the symbol for the reference of
+        the given version (None for unversioned references).
+        """
+        for defined_version, hidden in self.defined.get(name, ()):
+            if version is None:
+                if not hidden:
+                    return True
+            elif defined_version == version or (defined_version is None and not hidden):
+                return True
+        return False
+
+    def origin_paths(self, paths):
+        """Return the search paths with the dynamic string tokens expanded."""
+        origin = str(Path(os.path.realpath(self.path)).parent)
+        lib = 'lib64' if self.machine[0] else 'lib'
+        expanded = []
+        for path in paths:
+            for token, value in (('$ORIGIN', origin), ('${ORIGIN}', origin), ('$LIB', lib), ('${LIB}', lib),
+                                 ('$PLATFORM', platform.machine()), ('${PLATFORM}', platform.machine())):
+                path = path.replace(token, value)
+            if path:
+                expanded.append(path)
+        return expanded
+
+
+# the shared objects read in this run (path -> SharedObject or None if
+# it is not a readable ELF file), every binary re-resolves the same
+# system libraries
+_shared_objects = {}
+_ld_so_cache = None
+_lock = threading.Lock()
+
+
+def load_shared_object(path, cache=True):
+    """
+    Return the SharedObject of the ELF file or None.
+
+    The result is cached unless cache is False (the checked files themselves
+    are read only once, caching them would only grow a long-running
+    rpmlint --serve process).
+    """
+    key = os.path.realpath(path)
+    try:
+        return _shared_objects[key]
+    except KeyError:
+        pass
+    shared_object = None
+    if os.path.isfile(key):
+        try:
+            with open_elf_files(key) as elf_files:
+                if len(elf_files) == 1:
+                    shared_object = SharedObject(path, elf_files[0])
+        except (ElfError, struct.error, OSError):
+            shared_object = None
+    if not cache:
+        return shared_object
+    with _lock:
+        return _shared_objects.setdefault(key, shared_object)
+
+
+def ld_so_cache():
+    """
+    Return the dictionary mapping the library names to the list of their
+    paths from the ld.so.cache of the system (the new format of glibc).
     """
-    Class contains all information obtained by ldd command
-    about undefined symbols and unused direct dependencies.
+    global _ld_so_cache
+    if _ld_so_cache is not None:
+        return _ld_so_cache
+    cache = {}
+    try:
+        with open(LD_SO_CACHE, 'rb') as cache_file:
+            data = cache_file.read()
+    except OSError:
+        data = b''
+    # the new format may follow the old one
+    base = data.find(LD_SO_CACHE_MAGIC)
+    if base != -1:
+        try:
+            nlibs = struct.unpack_from('=I', data, base + 20)[0]
+            for i in range(nlibs):
+                _flags, key, value = struct.unpack_from('=iII', data, base + 48 + i * 24)
+                name = data[base + key:data.index(b'\0', base + key)].decode('utf-8', errors='replace')
+                path = data[base + value:data.index(b'\0', base + value)].decode('utf-8', errors='replace')
+                cache.setdefault(name, []).append(path)
+        except (struct.error, ValueError):
+            pass
+    _ld_so_cache = cache
+    return cache
 
-    Parse these 2 outputs:
+
+class LddParser:
+    """
+    Class contains the information about the dependencies, undefined symbols
+    and unused direct dependencies of a dynamically linked ELF file, the same
+    information as provided by ldd command:
 
     $ ldd -u libnss-unused-dependency.so
     Unused direct dependencies:
@@ -20,73 +189,162 @@ class LddParser:
         libc.so.6 => /lib/libc.so.6 (0xf7d9a000)
         /lib/ld-linux.so.2 (0xf7fcf000)
     undefined symbol: ps_pdwrite	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_pglobal_lookup	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_lsetregs	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_getpid	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_lgetfpregs	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_lsetfpregs	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_lgetregs	(./libthread-undefined-symbol.so)
-    undefined symbol: ps_pdread	(./libthread-undefined-symbol.so)
     undefined symbol: gss_release_cred, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
-    undefined symbol: gss_canonicalize_name, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
-    undefined symbol: gss_pname_to_uid, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
-    undefined symbol: gss_accept_sec_context, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
-    undefined symbol: gss_verify_mic, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
-    undefined symbol: gss_get_mic, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
-    """
 
-    unused_regex = re.compile(r'^\s+(?P<lib>\S+)')
-    undef_regex = re.compile(r'^undefined symbol:\s+(?P<symbol>[^, ]+)')
+    The file is not run by the dynamic loader, its dependencies are looked
+    up the same way (DT_RPATH, DT_RUNPATH, ld.so.cache and the default
+    system library paths) and the undefined symbols of all the loaded
+    objects are resolved using their dynamic symbol tables. The dependencies
+    are listed in the format of ldd without the load addresses and the
+    vDSO (e.g. 'libc.so.6 => /lib64/libc.so.6' or 'libfoo.so => not found').
+    """
 
-    def __init__(self, pkgfile_path, path, is_installed_pkg):
+    def __init__(self, pkgfile_path, path, is_installed_pkg, system_lib_paths=DEFAULT_LIB_PATHS):
         self.pkgfile_path = pkgfile_path
+        self.system_lib_paths = system_lib_paths
         self.dependencies = []
         self.unused_dependencies = []
         self.undefined_symbols = []
         self.parsing_failed_reason = None
         if is_installed_pkg:
-            self.parse_dependencies()
-            self.parse_undefined_symbols()
+            self.parse()
 
-    def parse_dependencies(self):
-        r = subprocess.run(['ldd', '-u', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode == 0:
+    def parse(self):
+        if not os.path.exists(self.pkgfile_path):
+            self.parsing_failed_reason = f'ldd: {self.pkgfile_path}: No such file or directory'
             return
-
-        lines = r.stdout.splitlines()
-        is_unused = False
-        for line in lines:
-            if line.startswith('Unused direct dependencies:'):
-                is_unused = True
-            elif is_unused:
-                unused = self.unused_regex.search(line)
-                if unused:
-                    self.unused_dependencies.append(unused.group('lib'))
-                else:
-                    is_unused = False
-
-    def parse_undefined_symbols(self):
-        r = subprocess.run(['ldd', '-r', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
-        # here ldd should always return 0
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
+        main = load_shared_object(self.pkgfile_path, cache=False)
+        rtld = self._dynamic_loader(main) if main is not None and main.is_dynamic else None
+        if rtld is None:
+            self.parsing_failed_reason = '\tnot a dynamic executable'
             return
 
-        lines = r.stdout.splitlines()
-        for line in lines:
-            r = self.undef_regex.search(line)
-            if r:
-                self.undefined_symbols.append(r.group('symbol'))
+        loaded, names = self._load_dependencies(main, rtld)
+        if main.needed and all(shared_object is not rtld for _name, shared_object in loaded):
+            loaded.append((rtld.path, rtld))
+        scope = [shared_object for _name, shared_object in loaded if shared_object is not None]
+
+        # ldd -u: the direct dependencies no symbol of the file is bound to
+        used = set()
+        for name, version, _weak in main.undefined:
+            provider = self._lookup(scope, name, version)
+            if provider is not None:
+                used.add(id(provider))
+        for name in main.needed:
+            shared_object = names.get(name)
+            if shared_object is None:
+                self.unused_dependencies.append(name)
+            elif id(shared_object) not in used:
+                self.unused_dependencies.append(shared_object.path)
+
+        # ldd -r: the dependencies (including the loader) and the symbols
+        # that cannot be resolved in any of the loaded objects
+        for name, shared_object in loaded[1:]:
+            if shared_object is None:
+                self.dependencies.append(f'{name} => not found')
+            elif name == shared_object.path:
+                self.dependencies.append(name)
             else:
-                self.dependencies.append(line.strip())
+                self.dependencies.append(f'{name} => {shared_object.path}')
+        for shared_object in scope:
+            for name, version, weak in shared_object.undefined:
+                if not weak and self._lookup(scope, name, version) is None:
+                    self.undefined_symbols.append(name)
 
-        # run c++filt demangler for all collected symbols
+        # demangle all collected symbols by the shared c++filt process
         if self.undefined_symbols:
-            r = subprocess.run(['c++filt'] + self.undefined_symbols, encoding='utf8',
-                               capture_output=True, env=ENGLISH_ENVIRONMENT)
-            if r.returncode != 0:
-                self.parsing_failed_reason = r.stderr
-            else:
-                self.undefined_symbols = r.stdout.splitlines()
+            try:
+                self.undefined_symbols = demangle(self.undefined_symbols)
+            except OSError as e:
+                self.parsing_failed_reason = str(e)
+
+    @staticmethod
+    def _dynamic_loader(main):
+        """
+        Return the SharedObject of the dynamic loader of the file (its
+        interpreter or the first compatible loader of ldd) or None.
+        """
+        paths = [main.interpreter] if main.interpreter else RTLD_PATHS
+        for path in paths:
+            rtld = load_shared_object(path)
+            if rtld is not None and rtld.machine == main.machine:
+                if rtld.path != path:
+                    rtld = _named(rtld, path)
+                return rtld
+        return None
+
+    def _load_dependencies(self, main, rtld):
+        """
+        Return the list of (name, SharedObject or None if not found) of the
+        file and all its dependencies in the breadth-first order used by the
+        dynamic loader (the loader is listed only where it is needed) and the
+        dictionary mapping the needed names to their SharedObjects.
+        """
+        loaded = [(self.pkgfile_path, main)]
+        names = {}
+        for name in (rtld.path, rtld.soname):
+            if name:
+                names[name] = rtld
+        index = 0
+        while index < len(loaded):
+            _name, loader = loaded[index]
+            index += 1
+            if loader is None:
+                continue
+            for name in loader.needed:
+                if name in names:
+                    shared_object = names[name]
+                    if shared_object is rtld and all(so is not rtld for _n, so in loaded):
+                        loaded.append((rtld.path, rtld))
+                    continue
+                shared_object = self._find_library(name, loader, main)
+                if shared_object is not None:
+                    known = names.get(shared_object.soname) or next(
+                        (so for _n, so in loaded if so is not None and so.path == shared_object.path), None)
+                    if known is not None:
+                        names[name] = known
+                        continue
+                    if shared_object.soname:
+                        names[shared_object.soname] = shared_object
+                names[name] = shared_object
+                loaded.append((name, shared_object))
+        return loaded, names
+
+    def _find_library(self, name, loader, main):
+        """Return the SharedObject of the library needed by loader or None."""
+        if '/' in name:
+            candidates = [name]
+        else:
+            directories = []
+            if not loader.runpath:
+                directories += loader.origin_paths(loader.rpath)
+                if loader is not main and not main.runpath:
+                    directories += main.origin_paths(main.rpath)
+            directories += loader.origin_paths(loader.runpath)
+            candidates = [str(Path(directory, name)) for directory in directories]
+            candidates += ld_so_cache().get(name, [])
+            candidates += [str(Path(directory, name)) for directory in self.system_lib_paths]
+        for candidate in candidates:
+            shared_object = load_shared_object(candidate)
+            if shared_object is not None and shared_object.machine == loader.machine:
+                return shared_object if shared_object.path == candidate else _named(shared_object, candidate)
+        return None
+
+    @staticmethod
+    def _lookup(scope, name, version):
+        """Return the first object of the scope defining the symbol or None."""
+        for shared_object in scope:
+            if shared_object.defines(name, version):
+                return shared_object
+        return None
+
+
+def _named(shared_object, path):
+    """
+    Return the SharedObject of the same file under another path (the cached
+    objects keep the path they were first loaded from).
+    """
+    named = object.__new__(SharedObject)
+    named.__dict__.update(shared_object.__dict__)
+    named.path = path
+    return named
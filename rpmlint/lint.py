@@ -1,25 +1,48 @@
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import cProfile
+import hashlib
 import importlib
+import json
+import multiprocessing
 import operator
+import os
 from pstats import Stats
 import sys
 from tempfile import gettempdir
 import time
 
+from rpmlint.cache import cache_directory, ResultCache
 from rpmlint.color import Color
 from rpmlint.config import Config
+from rpmlint.filemagic import MagicCache
 from rpmlint.filter import Filter
 from rpmlint.helpers import print_warning, string_center
 from rpmlint.pkg import FakePkg, get_installed_pkgs, Pkg
 from rpmlint.version import __version__
 
 
+# Lint instance inherited by the forked worker processes, see
+# Lint._validate_files_parallel
+_worker_lint = None
+
+
+def _validate_file_in_worker(pname):
+    return _worker_lint._validate_file_isolated(pname)
+
+
 class Lint:
     """
     Generic object handling the basic rpmlint operations
     """
 
+    # configuration options that do not affect the raw output of the checks
+    # and so are not part of the package cache key
+    package_cache_ignored_options = ('Filters', 'FilterErrorTitles', 'BlockedFilters', 'BadnessThreshold',
+                                     'Scoring', 'Descriptions', 'ExtractDir', 'LazyExtraction',
+                                     'UseResultCache', 'ResultCacheDir', 'ResultCacheSize',
+                                     'UsePackageCache', 'PackageCacheSize')
+
     def __init__(self, options):
         # initialize configuration
         self.checks = {}
@@ -27,6 +50,9 @@ class Lint:
         self.packages_checked = 0
         self.specfiles_checked = 0
         self.check_duration = defaultdict(int)
+        # bytes of the file contents read by each check
+        self.scanned_bytes = defaultdict(int)
+        self.magic_stats = {'hits': 0, 'misses': 0}
         if options['config']:
             self.config = Config(options['config'])
         else:
@@ -48,6 +74,14 @@ class Lint:
             self.config.configuration['ExtractDir'] = gettempdir()
         # initialize output buffer
         self.output = Filter(self.config)
+        # libmagic results shared by all the checked packages
+        self.magic_cache = MagicCache.from_config(self.config)
+        # persistent cache of the output of the checked packages
+        self.package_cache = None
+        self._config_digest = None
+        if self.config.configuration['UsePackageCache']:
+            self.package_cache = ResultCache(cache_directory(self.config) / 'packages.sqlite',
+                                             self.config.configuration['PackageCacheSize'])
         # preload the check list if we not print config
         # some of the config values are transformed e.g. to regular
         # expressions
@@ -66,6 +100,9 @@ class Lint:
             self.print_explanation(self.options['explain'], self.config)
             return retcode
 
+        # the messages are printed out as the packages are checked
+        if self.options['stream']:
+            self._print_header()
         # if there are installed arguments just load them up as extra
         # items to the rpmfile option
         if self.options['installed']:
@@ -73,9 +110,12 @@ class Lint:
         # if no exclusive option is passed then just loop over all the
         # arguments that are supposed to be either rpm or spec files
         self.validate_files(self.options['rpmfile'])
-        self._print_header()
-        print(self.output.print_results(self.output.results, self.config),
-              end='')
+        if self.options['stream']:
+            self._flush_output()
+        else:
+            self._print_header()
+            print(self.output.print_results(self.output.results, self.config),
+                  end='')
         quit_color = Color.Bold
         if self.output.printed_messages['W'] > 0:
             quit_color = Color.Yellow
@@ -109,6 +149,46 @@ class Lint:
             self._maybe_print_reports()
             raise e
 
+    def serve_request(self, options):
+        """
+        Run the checks with the options of one request of the --serve mode
+        and return the exit code.
+
+        The configuration and the loaded checks are reused. The rpmlintrc
+        files of the request are loaded on top of the configuration only for
+        this request, the output, the counters and the checks are reset.
+        """
+        config = self.config
+        configuration = config.configuration
+        saved = (list(configuration['Filters']), dict(configuration['Scoring']), config.rpmlintrc_filters,
+                 config.info, config.strict, config.permissive, self.options)
+        # the packages are checked in this process, the forked workers
+        # (--jobs) would inherit the output redirected to the client
+        self.options = dict(self.options, **options, jobs=1)
+        try:
+            self._load_rpmlintrc()
+            config.info = config.info or self.options['verbose']
+            config.strict = config.strict or self.options['strict']
+            config.permissive = config.permissive or self.options['permissive']
+            self.output.reset(config)
+            self.packages_checked = 0
+            self.specfiles_checked = 0
+            self.check_duration.clear()
+            self.scanned_bytes.clear()
+            self.magic_stats = {'hits': 0, 'misses': 0}
+            try:
+                return self.run()
+            except SystemExit as e:
+                return e.code if isinstance(e.code, int) else 1
+        finally:
+            (configuration['Filters'], configuration['Scoring'], config.rpmlintrc_filters,
+             config.info, config.strict, config.permissive, self.options) = saved
+            self.output.reset(config)
+            self.reset_checks()
+            # after_checks is not reached when the request fails
+            for check in self.checks.values():
+                check.clear_collected_data()
+
     def _maybe_print_reports(self):
         if self.options['time_report']:
             self._print_time_report()
@@ -124,6 +204,12 @@ class Lint:
             color = ''
         return f'{color}{fraction:17.1f}{Color.Reset}'
 
+    @staticmethod
+    def _format_scanned_bytes(scanned):
+        if not scanned:
+            return ''
+        return f'{scanned / (1024 * 1024):.1f}'
+
     def _print_time_report(self):
         PERCENT_THRESHOLD = 1
         TIME_THRESHOLD = 0.1
@@ -135,7 +221,7 @@ class Lint:
         check = format('Check', '32s')
         duration = format('Duration (in s)', '>12')
         fraction = format('Fraction (in %)', '>17')
-        print(f'{Color.Bold}    {check} {duration} {fraction}  Checked files{Color.Reset}')
+        print(f'{Color.Bold}    {check} {duration} {fraction}  Checked files  Scanned (in MB){Color.Reset}')
 
         for check, duration in sorted(self.check_duration.items(), key=operator.itemgetter(1), reverse=True):
             fraction = 100.0 * duration / total
@@ -147,9 +233,15 @@ class Lint:
                 checked = self.checks[check].checked_files
                 if checked:
                     checked_files = checked
-            print(f'    {check:32s} {duration:15.1f} {self._get_color_time_report_value(fraction)} {checked_files:>14}')
+            scanned = self._format_scanned_bytes(self.scanned_bytes.get(check))
+            print(f'    {check:32s} {duration:15.1f} {self._get_color_time_report_value(fraction)} {checked_files:>14} '
+                  f'{scanned:>15}')
 
-        print(f'    {"TOTAL":32s} {total:15.1f} {100:17.1f} {total_checked_files:>14}\n')       # noqa Q000
+        total_scanned = self._format_scanned_bytes(sum(self.scanned_bytes.values()))
+        print(f'    {"TOTAL":32s} {total:15.1f} {100:17.1f} {total_checked_files:>14} {total_scanned:>15}\n')       # noqa Q000
+        if self.magic_stats['hits'] or self.magic_stats['misses']:
+            print(f'{Color.Bold}libmagic:{Color.Reset} {self.magic_stats["misses"]} files classified, '
+                  f'{self.magic_stats["hits"]} reused from the cache\n')
 
     def _print_cprofile(self):
         N = 30
@@ -223,6 +315,7 @@ class Lint:
         for pkg in packages:
             self.run_checks(pkg, run_post_checks and pkg == packages[-1])
             self.reset_checks()
+            self._flush_output()
 
     def validate_files(self, files):
         """
@@ -240,9 +333,103 @@ class Lint:
 
         # Sort the files so that the output is stable
         packages = sorted(packages)
+        jobs = self._get_jobs()
+        if jobs > 1 and len(packages) > 2:
+            # the last package is checked here so that after_checks and
+            # the rpmlintrc filter validation run once over the merged data
+            self._validate_files_parallel(packages[:-1], jobs)
+            packages = packages[-1:]
         for pkg in packages:
             self.validate_file(pkg, pkg == packages[-1])
             self.reset_checks()
+            self._flush_output()
+
+    def _get_jobs(self):
+        """
+        Return the number of worker processes used for checking packages.
+        """
+        jobs = self.options['jobs']
+        if jobs is None:
+            return 1
+        if jobs <= 0:
+            return os.cpu_count() or 1
+        return jobs
+
+    def _validate_files_parallel(self, packages, jobs):
+        """
+        Check the packages in worker processes and merge their output.
+
+        The workers are forked from this process, so each of them holds its
+        own copy of the loaded checks and of the Filter. A worker checks one
+        package at a time and sends back the collected messages and counters.
+        They are merged in the order of the package list so the result is the
+        same as when checking the packages one by one.
+
+        The thread pools of the checks (libmagic, ELF analysis) live only
+        while a package is checked, so no thread is running when the workers
+        are forked, even after the installed packages were checked here.
+        """
+        global _worker_lint
+        _worker_lint = self
+        context = multiprocessing.get_context('fork')
+        try:
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+                futures = [executor.submit(_validate_file_in_worker, pkg) for pkg in packages]
+                try:
+                    for future in futures:
+                        self._merge_worker_result(future.result())
+                        self._flush_output()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            _worker_lint = None
+
+    def _validate_file_isolated(self, pname):
+        """
+        Check one package in a worker process and return its output.
+        """
+        # drop whatever was inherited from the parent process
+        self.output.take_results()
+        self.check_duration.clear()
+        self.scanned_bytes.clear()
+        self.magic_stats = {'hits': 0, 'misses': 0}
+        self.packages_checked = 0
+        self.specfiles_checked = 0
+
+        self.validate_file(pname, False)
+        collected_data = {name: check.collected_data() for name, check in self.checks.items()}
+        self.reset_checks()
+        return {
+            'output': self.output.take_results(),
+            'collected_data': collected_data,
+            'check_duration': dict(self.check_duration),
+            'scanned_bytes': dict(self.scanned_bytes),
+            'magic_stats': self.magic_stats,
+            'packages_checked': self.packages_checked,
+            'specfiles_checked': self.specfiles_checked,
+        }
+
+    def _merge_worker_result(self, result):
+        self.output.merge_results(result['output'])
+        self._merge_collected_data(result['collected_data'])
+        for check, duration in result['check_duration'].items():
+            self.check_duration[check] += duration
+        for check, scanned in result['scanned_bytes'].items():
+            self.scanned_bytes[check] += scanned
+        for counter, value in result['magic_stats'].items():
+            self.magic_stats[counter] += value
+        self.packages_checked += result['packages_checked']
+        self.specfiles_checked += result['specfiles_checked']
+
+    def _flush_output(self):
+        """
+        Print out the messages collected so far when streaming the output
+        (--stream), so they are not kept in memory until the end of the run.
+        """
+        if self.options['stream']:
+            print(self.output.flush_results(self.config), end='', flush=True)
 
     def _expand_filelist(self, files):
         packages = []
@@ -256,11 +443,10 @@ class Lint:
     def validate_file(self, pname, is_last):
         try:
             if pname.suffix in ('.rpm', '.spm'):
-                with Pkg(pname, self.config.configuration['ExtractDir'],
-                         verbose=self.config.info) as pkg:
-                    for k, v in pkg.timers.items():
-                        self.check_duration[k] += v
-                    self.run_checks(pkg, is_last)
+                if self.package_cache is not None and not is_last:
+                    self._validate_cached_file(pname)
+                else:
+                    self._check_rpm(pname, is_last)
             elif pname.suffix == '.spec':
                 with FakePkg(pname) as pkg:
                     self.run_checks(pkg, is_last)
@@ -270,16 +456,135 @@ class Lint:
                 raise e
             sys.exit(3)
 
+    def _check_rpm(self, pname, is_last):
+        with Pkg(pname, self.config.configuration['ExtractDir'],
+                 verbose=self.config.info,
+                 lazy=self.config.configuration['LazyExtraction'],
+                 magic_cache=self.magic_cache) as pkg:
+            if pkg.lazy:
+                self._extract_wanted_files(pkg)
+            self.run_checks(pkg, is_last)
+            for k, v in pkg.timers.items():
+                self.check_duration[k] += v
+            for k, v in pkg.magic_stats.items():
+                self.magic_stats[k] += v
+
+    def _validate_cached_file(self, pname):
+        """
+        Check the package unless its output is stored in the package cache.
+
+        The raw (unfiltered) messages of the checks are stored for every
+        package file and replayed through the Filter when the very same file
+        is checked again, so the rpmlintrc filters and scoring still apply.
+        The data the checks collect for after_checks is stored along and
+        merged into the checks again. The last package is never taken from
+        the cache as after_checks may rely on the state of the checks after
+        checking it.
+        """
+        key = self._package_cache_key(pname)
+        found, cached = self.package_cache.lookup(key)
+        if found:
+            self.output.replay(cached['output'])
+            self._merge_collected_data(cached['collected_data'])
+            self.packages_checked += 1
+            return
+
+        self.output.start_recording()
+        try:
+            self._check_rpm(pname, False)
+        finally:
+            recorded = self.output.stop_recording()
+        self.package_cache.store(key, {
+            'output': recorded,
+            'collected_data': {name: check.collected_data() for name, check in self.checks.items()},
+        })
+
+    def _merge_collected_data(self, collected_data):
+        for check, data in collected_data.items():
+            if data is not None:
+                self.checks[check].merge_collected_data(data)
+
+    def _package_cache_key(self, pname):
+        """
+        Return the package cache key of the package file: its SHA-256 digest,
+        the loaded checks and the digest of the effective configuration.
+        """
+        digest = hashlib.sha256()
+        with open(pname, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        if self._config_digest is None:
+            configuration = {k: v for k, v in self.config.configuration.items()
+                             if k not in self.package_cache_ignored_options}
+            data = json.dumps(configuration, sort_keys=True,
+                              default=lambda x: sorted(x) if isinstance(x, (set, frozenset)) else str(x))
+            self._config_digest = hashlib.sha256(data.encode()).hexdigest()
+        return self.package_cache.key('package', digest.hexdigest(), sorted(self.checks), self._config_digest)
+
+    def _extract_wanted_files(self, pkg):
+        """
+        Extract the files that the checks are interested in, all of them in
+        one pass over the payload.
+        """
+        names = set()
+        heads = {}
+        for check in self.checks.values():
+            names.update(check.wanted_files(pkg))
+            names.update(check.wanted_patterns(pkg))
+            for name, size in check.wanted_file_heads(pkg).items():
+                heads[name] = max(size, heads.get(name, 0))
+        pkg.extract_files(names, heads)
+
+    def _scan_contents(self, pkg):
+        """
+        Search the package files for the content patterns of all the checks,
+        each file is read only once. The bytes searched for the patterns of
+        each check are accounted to it.
+        """
+        config = self.config.configuration
+        # file name -> {regex -> max_size}
+        patterns = {}
+        wanted_patterns = {}
+        for name, check in self.checks.items():
+            wanted = check.wanted_patterns(pkg)
+            if not wanted:
+                continue
+            wanted_patterns[name] = wanted
+            limits = [limit for limit in (config['ContentScanMaxSize'], check.max_scanned_bytes) if limit]
+            max_size = min(limits, default=None)
+            for filename, regexes in wanted.items():
+                file_patterns = patterns.setdefault(filename, {})
+                for regex in regexes:
+                    # the regex shared by more checks is searched by the
+                    # biggest of their limits
+                    if regex not in file_patterns:
+                        file_patterns[regex] = max_size
+                    elif file_patterns[regex] and max_size:
+                        file_patterns[regex] = max(file_patterns[regex], max_size)
+                    else:
+                        file_patterns[regex] = None
+        scanned = pkg.scan_contents(patterns, sample=config['ContentScanSampling'])
+        for name, wanted in wanted_patterns.items():
+            self.scanned_bytes[name] += sum(max((scanned[filename][regex] for regex in regexes), default=0)
+                                            for filename, regexes in wanted.items() if filename in scanned)
+
     def run_checks(self, pkg, is_last):
         spec_checks = isinstance(pkg, FakePkg)
-        for checker in self.checks:
+        if not spec_checks:
+            self._scan_contents(pkg)
+        for checker, check in self.checks.items():
             start = time.monotonic()
-            fn = self.checks[checker].check_spec if spec_checks else self.checks[checker].check
+            # files extracted on demand are accounted to the package timers
+            timers = sum(pkg.timers.values())
+            fn = check.check_spec if spec_checks else check.check
             fn(pkg)
-            self.check_duration[checker] += time.monotonic() - start
+            self.check_duration[checker] += time.monotonic() - start - (sum(pkg.timers.values()) - timers)
 
         # run post check function and validate used filters in rpmlintrc
         if is_last:
+            # the cross-package messages are streamed after all the packages
+            self._flush_output()
             for checker in self.checks.values():
                 checker.after_checks()
 
@@ -341,5 +646,4 @@ class Lint:
         """Load a (check) module by its name, unless it is already loaded."""
         module = importlib.import_module(f'.{name}', package='rpmlint.checks')
         klass = getattr(module, name)
-        obj = klass(self.config, self.output)
-        return obj
+        return klass(self.config, self.output)
@@ -1,12 +1,162 @@
-import subprocess
+import struct
+import zlib
 
-from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.elffile import ElfError, ET_REL, open_elf_files, SHF_COMPRESSED, SHT_NOBITS
+
+DW_TAG_COMPILE_UNIT = 0x11
+
+DW_UT_TYPE = 0x02
+DW_UT_SKELETON = 0x04
+DW_UT_SPLIT_COMPILE = 0x05
+DW_UT_SPLIT_TYPE = 0x06
+
+DW_AT_STR_OFFSETS_BASE = 0x72
+# the attributes of the compile units that are read, by their names used
+# by objdump (without the DW_AT_ prefix)
+DW_AT_NAMES = {
+    0x03: 'name',
+    0x13: 'language',
+    0x1b: 'comp_dir',
+    0x25: 'producer',
+}
+
+DW_FORM_ADDR = 0x01
+DW_FORM_BLOCK2 = 0x03
+DW_FORM_BLOCK4 = 0x04
+DW_FORM_DATA2 = 0x05
+DW_FORM_DATA4 = 0x06
+DW_FORM_DATA8 = 0x07
+DW_FORM_STRING = 0x08
+DW_FORM_BLOCK = 0x09
+DW_FORM_BLOCK1 = 0x0a
+DW_FORM_DATA1 = 0x0b
+DW_FORM_FLAG = 0x0c
+DW_FORM_SDATA = 0x0d
+DW_FORM_STRP = 0x0e
+DW_FORM_UDATA = 0x0f
+DW_FORM_REF_ADDR = 0x10
+DW_FORM_INDIRECT = 0x16
+DW_FORM_SEC_OFFSET = 0x17
+DW_FORM_EXPRLOC = 0x18
+DW_FORM_STRX = 0x1a
+DW_FORM_STRP_SUP = 0x1d
+DW_FORM_LINE_STRP = 0x1f
+DW_FORM_IMPLICIT_CONST = 0x21
+DW_FORM_STRX1 = 0x25
+DW_FORM_STRX2 = 0x26
+DW_FORM_STRX3 = 0x27
+DW_FORM_STRX4 = 0x28
+DW_FORM_GNU_STR_INDEX = 0x1f02
+DW_FORM_GNU_REF_ALT = 0x1f20
+DW_FORM_GNU_STRP_ALT = 0x1f21
+
+# size of the fixed size forms
+FIXED_FORM_SIZES = {
+    DW_FORM_DATA2: 2, DW_FORM_DATA4: 4, DW_FORM_DATA8: 8, DW_FORM_DATA1: 1,
+    DW_FORM_FLAG: 1, 0x11: 1, 0x12: 2, 0x13: 4, 0x14: 8, 0x19: 0, 0x1c: 4,
+    0x1e: 16, 0x20: 8, DW_FORM_IMPLICIT_CONST: 0, 0x24: 8, DW_FORM_STRX1: 1,
+    DW_FORM_STRX2: 2, DW_FORM_STRX3: 3, DW_FORM_STRX4: 4, 0x29: 1, 0x2a: 2,
+    0x2b: 3, 0x2c: 4,
+}
+# forms of the values encoded as ULEB128
+ULEB_FORMS = {DW_FORM_UDATA, 0x15, DW_FORM_STRX, 0x1b, 0x22, 0x23, 0x1f01, DW_FORM_GNU_STR_INDEX}
+# forms of the offsets of the size given by the DWARF format (32 or 64-bit)
+OFFSET_FORMS = {DW_FORM_STRP, DW_FORM_SEC_OFFSET, DW_FORM_STRP_SUP, DW_FORM_LINE_STRP,
+                DW_FORM_GNU_REF_ALT, DW_FORM_GNU_STRP_ALT}
+STRX_FORMS = {DW_FORM_STRX, DW_FORM_STRX1, DW_FORM_STRX2, DW_FORM_STRX3, DW_FORM_STRX4,
+              DW_FORM_GNU_STR_INDEX}
+
+# names of the languages as printed by objdump
+DW_LANG_NAMES = {
+    0x01: 'ANSI C', 0x02: 'non-ANSI C', 0x03: 'Ada', 0x04: 'C++', 0x05: 'Cobol 74',
+    0x06: 'Cobol 85', 0x07: 'FORTRAN 77', 0x08: 'Fortran 90', 0x09: 'ANSI Pascal',
+    0x0a: 'Modula 2', 0x0b: 'Java', 0x0c: 'ANSI C99', 0x0d: 'ADA 95', 0x0e: 'Fortran 95',
+    0x0f: 'PLI', 0x10: 'Objective C', 0x11: 'Objective C++', 0x12: 'Unified Parallel C',
+    0x13: 'D', 0x14: 'Python', 0x15: 'OpenCL', 0x16: 'Go', 0x17: 'Modula 3',
+    0x18: 'Haskell', 0x19: 'C++03', 0x1a: 'C++11', 0x1b: 'OCaml', 0x1c: 'Rust',
+    0x1d: 'C11', 0x1e: 'Swift', 0x1f: 'Julia', 0x20: 'Dylan', 0x21: 'C++14',
+    0x22: 'Fortran 03', 0x23: 'Fortran 08', 0x24: 'RenderScript',
+    0x8001: 'MIPS assembler', 0x8765: 'Unified Parallel C',
+}
+
+
+class DebugSection:
+    """
+    Content of a debug section, either the region of the mapped ELF file
+    or the decompressed data (SHF_COMPRESSED and .zdebug_* sections).
+
+    The values are read at the offsets relative to the start of the section,
+    the relocations of relocatable files are applied to the offsets read by
+    read_offset.
+    """
+
+    def __init__(self, data, start, size, endian, relocations=None):
+        self.data = data
+        self.start = start
+        self.size = size
+        self.endian = endian
+        self.relocations = relocations or {}
+
+    def _check(self, offset, size):
+        if offset < 0 or offset + size > self.size:
+            raise ElfError('Error: The DWARF data are truncated')
+
+    def read(self, size, offset):
+        """Return the unsigned integer of the given size at offset."""
+        self._check(offset, size)
+        start = self.start + offset
+        return int.from_bytes(self.data[start:start + size], 'little' if self.endian == '<' else 'big')
+
+    def read_offset(self, size, offset):
+        """Return the offset (into another section) of the given size at offset."""
+        value = self.read(size, offset)
+        relocation = self.relocations.get(offset)
+        if relocation is not None:
+            symbol_value, addend = relocation
+            value = symbol_value + (value if addend is None else addend)
+        return value
+
+    def uleb128(self, offset):
+        """Return the ULEB128 value at offset and the offset after it."""
+        # most of the values (codes, attributes, forms) fit in one byte
+        if 0 <= offset < self.size:
+            byte = self.data[self.start + offset]
+            if byte < 0x80:
+                return byte, offset + 1
+        value = shift = 0
+        while True:
+            self._check(offset, 1)
+            byte = self.data[self.start + offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if byte < 0x80:
+                return value, offset
+
+    def sleb128(self, offset):
+        """Return the SLEB128 value at offset and the offset after it."""
+        start = offset
+        value, offset = self.uleb128(offset)
+        bits = 7 * (offset - start)
+        if value & (1 << (bits - 1)):
+            value -= 1 << bits
+        return value, offset
+
+    def cstring(self, offset):
+        """Return the NUL terminated string at offset and the offset after it."""
+        self._check(offset, 0)
+        start = self.start + offset
+        end = self.data.find(b'\0', start, self.start + self.size)
+        if end == -1:
+            raise ElfError('Error: The DWARF string is not terminated')
+        return self.data[start:end].decode('utf-8', errors='replace'), end - self.start + 1
 
 
 class ObjdumpParser:
     """
-    Class contains all information obtained by objdump command. Right now, we
-    are interested in DW_TAG_compile_unit of debug info.
+    Class contains the DW_TAG_compile_unit attributes of the debug info read
+    directly from the ELF file (the same information as provided by
+    objdump --dwarf=info --dwarf-depth=1).
 
     Example output of objdump:
 
@@ -20,9 +170,12 @@ class ObjdumpParser:
        <2c>   DW_AT_language    : 32769    (MIPS assembler)
      Compilation Unit @ offset 0x2e:
       Length:        0x3c (32-bit)
-    """
 
-    dw_at_prefix = 'DW_AT_'
+    Only the first DIE of every unit is decoded and only its name, comp_dir,
+    producer and language attributes are stored (e.g. {'producer': 'GNU AS
+    2.33.1', 'language': '32769\t(MIPS assembler)', ...}), the strings are
+    resolved from .debug_str, .debug_line_str and .debug_str_offsets.
+    """
 
     def __init__(self, pkgfile_path, path):
         self.pkgfile_path = pkgfile_path
@@ -31,23 +184,231 @@ class ObjdumpParser:
         self.parse_dwarf_compilation_units()
 
     def parse_dwarf_compilation_units(self):
-        r = subprocess.run(['objdump', '--dwarf=info', '--dwarf-depth=1', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
-        # here ldd should always return 0
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
+        try:
+            with open_elf_files(self.pkgfile_path) as elf_files:
+                for elf_file in elf_files:
+                    self._parse_elf_file(elf_file)
+        except (ElfError, struct.error, zlib.error) as e:
+            self.parsing_failed_reason = str(e)
+
+    @staticmethod
+    def _debug_section(elf_file, name):
+        """
+        Return the DebugSection of the .debug_* section (or its .zdebug_*
+        variant) or None if the file does not contain it.
+        """
+        index = section = None
+        for i, candidate in enumerate(elf_file.sections):
+            if candidate.name in (name, '.z' + name[1:]):
+                index, section = i, candidate
+                break
+        if section is None or section.type == SHT_NOBITS:
+            return None
+
+        relocations = elf_file.relocations(index) if elf_file.type == ET_REL else None
+        if section.name.startswith('.zdebug'):
+            # ZLIB, big-endian uncompressed size and the zlib stream
+            data = elf_file.section_data(section)
+            if data[:4] != b'ZLIB':
+                return DebugSection(data, 0, len(data), elf_file.endian, relocations)
+            data = zlib.decompress(data[12:])
+            return DebugSection(data, 0, len(data), elf_file.endian, relocations)
+        if section.flags & SHF_COMPRESSED:
+            data = elf_file.section_content(section)
+            return DebugSection(data, 0, len(data), elf_file.endian, relocations)
+        if section.offset + section.size > elf_file.limit - elf_file.base:
+            raise ElfError('Error: The ELF file is truncated')
+        return DebugSection(elf_file.data, elf_file.base + section.offset, section.size, elf_file.endian,
+                            relocations)
+
+    def _parse_elf_file(self, elf_file):
+        info = self._debug_section(elf_file, '.debug_info')
+        if info is None:
             return
+        abbrev = self._debug_section(elf_file, '.debug_abbrev')
+        if abbrev is None:
+            raise ElfError('Error: The .debug_abbrev section is missing')
+        # the abbreviation tables read so far, often shared by the units
+        abbrev_tables = {}
+        strings = {}
+
+        def string_section(name):
+            if name not in strings:
+                strings[name] = self._debug_section(elf_file, name)
+            return strings[name]
+
+        offset = 0
+        while offset < info.size:
+            unit_length = info.read(4, offset)
+            position = offset + 4
+            offset_size = 4
+            if unit_length == 0xffffffff:
+                unit_length = info.read(8, position)
+                position += 8
+                offset_size = 8
+            elif unit_length >= 0xfffffff0:
+                raise ElfError(f'Error: Invalid length 0x{unit_length:x} of the compilation unit')
+            end = position + unit_length
+            if end > info.size:
+                raise ElfError('Error: The DWARF data are truncated')
+            unit = self._parse_unit(info, abbrev, abbrev_tables, position, offset_size, string_section)
+            if unit is not None:
+                self.compile_units.append(unit)
+            offset = end
+
+    def _parse_unit(self, info, abbrev, abbrev_tables, position, offset_size, string_section):
+        """
+        Return the attributes of the DW_TAG_compile_unit DIE of the unit whose
+        header starts at position or None for other (or unsupported) units.
+        """
+        version = info.read(2, position)
+        position += 2
+        if version >= 5:
+            unit_type = info.read(1, position)
+            address_size = info.read(1, position + 1)
+            abbrev_offset = info.read_offset(offset_size, position + 2)
+            position += 2 + offset_size
+            if unit_type in (DW_UT_SKELETON, DW_UT_SPLIT_COMPILE):
+                position += 8
+            elif unit_type in (DW_UT_TYPE, DW_UT_SPLIT_TYPE):
+                position += 8 + offset_size
+        elif version >= 2:
+            abbrev_offset = info.read_offset(offset_size, position)
+            address_size = info.read(1, position + offset_size)
+            position += offset_size + 1
+        else:
+            return None
+
+        code, position = info.uleb128(position)
+        if not code:
+            return None
+        tag, specs = self._abbreviation(abbrev, abbrev_tables, abbrev_offset, code)
+        if tag != DW_TAG_COMPILE_UNIT:
+            return None
+
+        values = {}
+        str_offsets_base = None
+        for attribute, form, implicit_const in specs:
+            value, position, form = self._read_form(info, position, form, offset_size, address_size,
+                                                    version, implicit_const)
+            if attribute in DW_AT_NAMES:
+                values[attribute] = (form, value)
+            elif attribute == DW_AT_STR_OFFSETS_BASE:
+                str_offsets_base = value
+
+        if str_offsets_base is None:
+            # the split units use the whole section with its header
+            str_offsets_base = 0 if version < 5 else 2 * offset_size
+        unit = {}
+        for attribute, (form, value) in values.items():
+            name = DW_AT_NAMES[attribute]
+            if name == 'language':
+                unit[name] = self._language(value) if isinstance(value, int) else str(value)
+            else:
+                unit[name] = self._string(form, value, offset_size, str_offsets_base, string_section)
+        return unit
+
+    @staticmethod
+    def _abbreviation(abbrev, tables, offset, code):
+        """
+        Return (tag, [(attribute, form, implicit_const), ...]) of the
+        abbreviation with the code from the table at offset.
+
+        The table is read only up to the abbreviation, the entries read are
+        kept in tables with the position to continue from (under None).
+        """
+        table = tables.setdefault(offset, {None: offset})
+        if code in table:
+            return table[code]
+        offset = table[None]
+        while True:
+            entry_code, offset = abbrev.uleb128(offset)
+            if not entry_code:
+                raise ElfError(f'Error: Unable to find the abbreviation {code}')
+            tag, offset = abbrev.uleb128(offset)
+            offset += 1  # DW_CHILDREN_yes or DW_CHILDREN_no
+            specs = []
+            while True:
+                attribute, offset = abbrev.uleb128(offset)
+                form, offset = abbrev.uleb128(offset)
+                if not attribute and not form:
+                    break
+                implicit_const = None
+                if form == DW_FORM_IMPLICIT_CONST:
+                    implicit_const, offset = abbrev.sleb128(offset)
+                specs.append((attribute, form, implicit_const))
+            table[entry_code] = (tag, specs)
+            table[None] = offset
+            if entry_code == code:
+                return tag, specs
+
+    @staticmethod
+    def _read_form(info, position, form, offset_size, address_size, version, implicit_const):
+        """
+        Return the value of the attribute of the form at position, the
+        position after it and the form (DW_FORM_indirect is resolved).
+        The blocks and expressions are skipped, their value is None.
+        """
+        while form == DW_FORM_INDIRECT:
+            form, position = info.uleb128(position)
+        if form == DW_FORM_IMPLICIT_CONST:
+            return implicit_const, position, form
+        if form in FIXED_FORM_SIZES:
+            size = FIXED_FORM_SIZES[form]
+            return info.read(size, position) if size else None, position + size, form
+        if form in ULEB_FORMS:
+            value, position = info.uleb128(position)
+            return value, position, form
+        if form in OFFSET_FORMS:
+            return info.read_offset(offset_size, position), position + offset_size, form
+        if form == DW_FORM_ADDR:
+            return info.read(address_size, position), position + address_size, form
+        if form == DW_FORM_REF_ADDR:
+            size = address_size if version == 2 else offset_size
+            return info.read(size, position), position + size, form
+        if form == DW_FORM_SDATA:
+            value, position = info.sleb128(position)
+            return value, position, form
+        if form == DW_FORM_STRING:
+            value, position = info.cstring(position)
+            return value, position, form
+        if form in (DW_FORM_BLOCK1, DW_FORM_BLOCK2, DW_FORM_BLOCK4):
+            size_size = {DW_FORM_BLOCK1: 1, DW_FORM_BLOCK2: 2, DW_FORM_BLOCK4: 4}[form]
+            return None, position + size_size + info.read(size_size, position), form
+        if form in (DW_FORM_BLOCK, DW_FORM_EXPRLOC):
+            size, position = info.uleb128(position)
+            return None, position + size, form
+        raise ElfError(f'Error: Unsupported DWARF form 0x{form:x}')
+
+    @staticmethod
+    def _string(form, value, offset_size, str_offsets_base, string_section):
+        """Return the string value of the attribute of the given form."""
+        if form == DW_FORM_STRING:
+            return value
+        if form == DW_FORM_STRP:
+            section = string_section('.debug_str')
+        elif form == DW_FORM_LINE_STRP:
+            section = string_section('.debug_line_str')
+        elif form in STRX_FORMS:
+            offsets = string_section('.debug_str_offsets')
+            if offsets is None:
+                return f'(indexed string: 0x{value:x})'
+            value = offsets.read_offset(offset_size, str_offsets_base + value * offset_size)
+            section = string_section('.debug_str')
+        elif form in (DW_FORM_STRP_SUP, DW_FORM_GNU_STRP_ALT):
+            # the string is stored in the supplementary (dwz) file
+            return f'(alt indirect string, offset: 0x{value:x})'
+        else:
+            return str(value)
+        if section is None:
+            return f'(indirect string, offset: 0x{value:x})'
+        return section.cstring(value)[0]
 
-        lines = r.stdout.splitlines()
-        for i, line in enumerate(lines):
-            if 'DW_TAG_compile_unit' in line:
-                # We parse all DW_at_ flags that follow the DW_TAG_compile_unit
-                i += 1
-                cu_data = {}
-                while self.dw_at_prefix in lines[i]:
-                    current_line = lines[i]
-                    current_line = current_line[current_line.find(self.dw_at_prefix) + len(self.dw_at_prefix):]
-                    parts = [t.strip() for t in current_line.split(':')]
-                    cu_data[parts[0]] = parts[-1]
-                    i += 1
-                self.compile_units.append(cu_data)
+    @staticmethod
+    def _language(value):
+        """Return the language in the format used by objdump."""
+        name = DW_LANG_NAMES.get(value)
+        if name is None:
+            kind = 'implementation defined' if 0x8000 <= value <= 0xffff else 'Unknown'
+            name = f'{kind}: {value:x}'
+        return f'{value}\t({name})'
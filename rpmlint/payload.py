@@ -0,0 +1,336 @@
+import bz2
+from collections import namedtuple
+import gzip
+import lzma
+import os
+import stat
+import struct
+import time
+
+import zstandard as zstd
+
+
+RPM_LEAD_SIZE = 96
+RPM_HEADER_MAGIC = b'\x8e\xad\xe8\x01'
+
+CPIO_NEWC_MAGICS = (b'070701', b'070702')
+CPIO_HEADER_SIZE = 110
+CPIO_TRAILER = b'TRAILER!!!'
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+CpioEntry = namedtuple('CpioEntry', ('name', 'ino', 'mode', 'nlink', 'size', 'dev'))
+
+
+class UnsupportedPayloadError(Exception):
+    """
+    The payload cannot be extracted natively, e.g. it uses the stripped cpio
+    format of packages with files bigger than 4 GiB.
+    """
+
+
+class _TimedReader:
+    """
+    File object wrapper measuring time spent in reading (decompressing)
+    the payload stream.
+    """
+
+    def __init__(self, fobj):
+        self.fobj = fobj
+        self.duration = 0
+
+    def read(self, size):
+        start = time.monotonic()
+        data = self.fobj.read(size)
+        self.duration += time.monotonic() - start
+        return data
+
+    def read_exact(self, size):
+        """Read exactly size bytes, decompressors may return short reads."""
+        data = self.read(size)
+        if len(data) == size:
+            return data
+        chunks = [data]
+        remaining = size - len(data)
+        while remaining:
+            chunk = self.read(remaining)
+            if not chunk:
+                raise EOFError('Unexpected end of the RPM payload')
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+
+def _skip_header(fobj, align):
+    """Skip one RPM header structure (signature or main header)."""
+    intro = fobj.read(16)
+    if len(intro) != 16 or intro[:4] != RPM_HEADER_MAGIC:
+        raise UnsupportedPayloadError('Bad RPM header magic')
+    nindex, hsize = struct.unpack('>II', intro[8:])
+    size = nindex * 16 + hsize
+    if align:
+        size += (8 - (16 + size) % 8) % 8
+    fobj.seek(size, os.SEEK_CUR)
+
+
+def seek_payload(fobj):
+    """
+    Position the RPM file object at the start of its (compressed) payload.
+    """
+    fobj.seek(RPM_LEAD_SIZE)
+    # the signature header is aligned to 8 bytes, the main header is not
+    _skip_header(fobj, align=True)
+    _skip_header(fobj, align=False)
+
+
+def open_payload(fobj):
+    """
+    Return a file object with the decompressed payload.
+
+    The compression format is detected by the magic bytes of the stream so
+    that we don't need to consult the RPMTAG_PAYLOADCOMPRESSOR.
+    """
+    start = fobj.tell()
+    magic = fobj.read(6)
+    fobj.seek(start)
+    if magic.startswith(b'\x1f\x8b'):
+        return gzip.GzipFile(fileobj=fobj, mode='rb')
+    if magic.startswith(b'\x28\xb5\x2f\xfd'):
+        return zstd.ZstdDecompressor().stream_reader(fobj)
+    if magic.startswith(b'\xfd7zXZ\x00') or magic.startswith(b'\x5d\x00\x00'):
+        return lzma.LZMAFile(fobj, mode='rb')
+    if magic.startswith(b'BZh'):
+        return bz2.BZ2File(fobj, mode='rb')
+    if magic in CPIO_NEWC_MAGICS:
+        return fobj
+    raise UnsupportedPayloadError('Unknown payload compression')
+
+
+class _EntryContent:
+    """
+    Reader of the content of one cpio entry.
+    """
+
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.remaining = size
+
+    def read(self, size):
+        size = min(size, self.remaining)
+        if not size:
+            return b''
+        self.remaining -= size
+        return self.stream.read_exact(size)
+
+
+def _cpio_entries(stream):
+    """
+    Iterate over the entries of a cpio (newc) archive.
+
+    Yields (entry, read) tuples where read(size) reads the entry content.
+    The unread content of an entry is skipped before the next one is parsed.
+    """
+    while True:
+        header = stream.read_exact(CPIO_HEADER_SIZE)
+        if header[:6] not in CPIO_NEWC_MAGICS:
+            raise UnsupportedPayloadError('Unsupported cpio format')
+        fields = [int(header[i:i + 8], 16) for i in range(6, CPIO_HEADER_SIZE, 8)]
+        ino, mode, _uid, _gid, nlink, _mtime, size, devmajor, devminor = fields[:9]
+        namesize = fields[11]
+        # the name is NUL terminated and padded to 4 bytes with the header
+        name = stream.read_exact(namesize + (4 - (CPIO_HEADER_SIZE + namesize) % 4) % 4)
+        name = name[:namesize - 1]
+        if name == CPIO_TRAILER:
+            return
+
+        content = _EntryContent(stream, size)
+        yield CpioEntry(os.fsdecode(name), ino, mode, nlink, size, (devmajor, devminor)), content.read
+
+        # skip what was not read by the consumer and the padding
+        while content.read(COPY_BUFFER_SIZE):
+            pass
+        padding = (4 - size % 4) % 4
+        if padding:
+            stream.read_exact(padding)
+
+
+def _normalize_name(name):
+    """
+    Return the package file name for a cpio entry name (./usr/bin/foo),
+    the name never points outside of the extraction directory.
+    """
+    if name.startswith('./'):
+        name = name[1:]
+    # normpath collapses any leading '..' components at the root
+    name = os.path.normpath('/' + name.lstrip('/'))
+    if name == '/':
+        return None
+    return name
+
+
+def _safe_path(root, path, safe_dirs):
+    """
+    Return True if none of the parent directories of the path below root is
+    a symlink, so writing the path cannot escape root through a symlink of
+    an earlier entry (or an earlier extraction in the lazy mode).
+
+    safe_dirs is the set of the directories already checked, they are real
+    directories and they stay so (a symlink entry cannot replace them).
+    """
+    parent = os.path.dirname(path)
+    checked = []
+    while len(parent) > len(root) and parent not in safe_dirs:
+        if os.path.islink(parent):
+            return False
+        checked.append(parent)
+        parent = os.path.dirname(parent)
+    safe_dirs.update(checked)
+    return True
+
+
+def _fix_permissions(mode):
+    """Equivalent of chmod +rX, the set[ug]id and sticky bits are dropped."""
+    perms = stat.S_IMODE(mode) & 0o777 | 0o444
+    if stat.S_ISDIR(mode) or perms & 0o111:
+        perms |= 0o111
+    return perms
+
+
+def _makedirs(path):
+    if not os.path.isdir(path):
+        os.makedirs(path, mode=0o755, exist_ok=True)
+
+
+def _is_directory(path):
+    """Return True if path is a real directory (not a symlink to one)."""
+    return os.path.isdir(path) and not os.path.islink(path)
+
+
+def _remove_existing(path):
+    if os.path.lexists(path) and not _is_directory(path):
+        os.unlink(path)
+
+
+def _write_file(path, read, mode, data=b''):
+    _makedirs(os.path.dirname(path))
+    _remove_existing(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        while data:
+            _write_all(fd, data)
+            data = read(COPY_BUFFER_SIZE)
+        os.fchmod(fd, _fix_permissions(mode))
+    finally:
+        os.close(fd)
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def extract_payload(filename, dirname, wanted=None, heads=None):
+    """
+    Extract the payload of the RPM file filename into dirname.
+
+    Files are written with their final permissions (readable for everybody,
+    directories and executables also searchable), so no recursive chmod is
+    needed afterwards. Device files, sockets and pipes are not created.
+    Entries whose path goes through a symlink (e.g. ./usr/lib/foo/bar after
+    the symlink ./usr/lib/foo -> /tmp) are not extracted, they would be
+    written outside of dirname. Symlinks and files whose path is already a
+    directory (of an earlier entry) are not extracted either.
+
+    Args:
+        filename: Path to the RPM file.
+        dirname: Directory where the payload is extracted.
+        wanted: Optional predicate called with a package file name
+                (e.g. /usr/bin/foo). Only matching entries are extracted.
+        heads: Optional dictionary mapping package file names to a number
+               of leading bytes of the file content to capture in memory.
+               It is useful for files that are not extracted.
+
+    Returns:
+        A dictionary with the time spent in decompressing the payload
+        ('decompress') and in writing the files ('write') and with the
+        captured file content ('heads').
+
+    Raises:
+        UnsupportedPayloadError: If the payload format is not supported.
+    """
+    start = time.monotonic()
+    root = os.path.normpath(dirname)
+    safe_dirs = set()
+    heads = heads or {}
+    captured = {}
+    directories = {}
+    # hardlinks: rpm stores the content only with the last entry of the set
+    pending_links = {}
+    written_links = {}
+    with open(filename, 'rb') as rpm_file:
+        seek_payload(rpm_file)
+        stream = _TimedReader(open_payload(rpm_file))
+        for entry, read in _cpio_entries(stream):
+            name = _normalize_name(entry.name)
+            if name is None:
+                continue
+            path = os.path.join(root, name.lstrip('/'))
+            is_wanted = wanted is None or wanted(name)
+
+            if stat.S_ISDIR(entry.mode):
+                if is_wanted and _safe_path(root, path, safe_dirs) and not os.path.islink(path):
+                    _makedirs(path)
+                    directories[path] = entry.mode
+            elif stat.S_ISLNK(entry.mode):
+                if is_wanted and _safe_path(root, path, safe_dirs) and not _is_directory(path):
+                    _makedirs(os.path.dirname(path))
+                    _remove_existing(path)
+                    os.symlink(os.fsdecode(read(entry.size)), path)
+            elif stat.S_ISREG(entry.mode):
+                key = (entry.dev, entry.ino)
+                if entry.nlink > 1 and not entry.size:
+                    if key in written_links:
+                        if is_wanted and _safe_path(root, path, safe_dirs) and not _is_directory(path):
+                            _remove_existing(path)
+                            os.link(written_links[key], path)
+                    else:
+                        pending_links.setdefault(key, []).append((name, path, is_wanted))
+                    continue
+
+                links = pending_links.pop(key, []) + [(name, path, is_wanted)]
+                targets = [p for _n, p, w in links
+                           if w and _safe_path(root, p, safe_dirs) and not _is_directory(p)]
+                head = b''
+                head_sizes = [heads[n] for n, _p, _w in links if n in heads]
+                if head_sizes:
+                    head = read(max(head_sizes))
+                    for n, _p, _w in links:
+                        if n in heads:
+                            captured[n] = head[:heads[n]]
+                if targets:
+                    _write_file(targets[0], read, entry.mode, head or read(COPY_BUFFER_SIZE))
+                    for target in targets[1:]:
+                        _makedirs(os.path.dirname(target))
+                        _remove_existing(target)
+                        os.link(targets[0], target)
+                    if entry.nlink > 1:
+                        written_links[key] = targets[0]
+
+        # hardlinked files without any content
+        for links in pending_links.values():
+            for name, path, is_wanted in links:
+                if is_wanted and _safe_path(root, path, safe_dirs) and not _is_directory(path):
+                    _write_file(path, None, 0o644)
+                if name in heads:
+                    captured[name] = b''
+
+    # apply the directory permissions once all the content is written,
+    # deepest directories first
+    for path in sorted(directories, reverse=True):
+        os.chmod(path, _fix_permissions(directories[path]))
+
+    total = time.monotonic() - start
+    return {'decompress': stream.duration, 'write': total - stream.duration,
+            'heads': captured}
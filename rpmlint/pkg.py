@@ -5,7 +5,6 @@ import gzip
 import hashlib
 import io
 import lzma
-import mmap
 import os
 from pathlib import Path, PurePath
 import re
@@ -17,14 +16,13 @@ import tempfile
 import time
 from urllib.parse import urljoin
 
-try:
-    import magic
-    has_magic = True
-except ImportError:
-    has_magic = False
 import rpm
+from rpmlint.contentscan import mmap_file, scan_file, scan_file_limits
+from rpmlint.filemagic import has_magic, MagicCache
+from rpmlint.filetable import FileTable
 from rpmlint.helpers import (byte_to_string, ENGLISH_ENVIRONMENT,
                              print_warning, pushd)
+from rpmlint.payload import extract_payload, UnsupportedPayloadError
 from rpmlint.pkgfile import PkgFile
 import zstandard as zstd
 
@@ -356,55 +354,70 @@ def parse_deps(line):
     return prcos
 
 
-def _get_magic_libmagic(path):
-    return magic.detect_from_filename(path).name
-
-
-def _get_magic_python_magic(path):
-    return magic.from_file(path)
-
-
-def get_magic(path):
-    # python-magic & libmagic compatibility code
-    # https://github.com/ahupp/python-magic/blob/master/COMPAT.md
-    detect_magic = _get_magic_python_magic
-    if not hasattr(magic, 'from_file'):
-        # libmagic python bindings
-        detect_magic = _get_magic_libmagic
-
+def read_header(filename):
+    """
+    Read the header of the RPM file without touching its payload.
+    """
+    ts = rpm.TransactionSet()
+    # Don't check signatures here...
+    ts.setVSFlags(rpm._RPMVSF_NOSIGNATURES)
+    fd = os.open(filename, os.O_RDONLY)
     try:
-        return detect_magic(path)
-    except (ValueError, FileNotFoundError):
-        return ''
+        return ts.hdrFromFdno(fd)
+    finally:
+        os.close(fd)
 
 
 # classes representing package
 
 class AbstractPkg:
+    # MagicCache classifying the files without magic in the header (the
+    # shared in-memory one if None)
+    magic_cache = None
+
     def cleanup(self):
         pass
 
     def _calc_magic(self, pkgfile):
-        magic_description = pkgfile.magic
-        if not magic_description:
-            if stat.S_ISDIR(pkgfile.mode):
-                magic_description = 'directory'
-            elif stat.S_ISLNK(pkgfile.mode):
-                magic_description = "symbolic link to `%s'" % pkgfile.linkto
-            elif not pkgfile.size:
-                magic_description = 'empty'
-        if not magic_description and not pkgfile.is_ghost and has_magic:
+        return self._calc_files_magic([pkgfile])[0]
+
+    def _calc_files_magic(self, pkgfiles):
+        """
+        Return the list of magic descriptions of the package files. The files
+        without the magic in the header are classified by libmagic at once.
+        """
+        descriptions = []
+        unknown = []
+        for pkgfile in pkgfiles:
+            magic_description = pkgfile.magic
+            if not magic_description:
+                if stat.S_ISDIR(pkgfile.mode):
+                    magic_description = 'directory'
+                elif stat.S_ISLNK(pkgfile.mode):
+                    magic_description = "symbolic link to `%s'" % pkgfile.linkto
+                elif not pkgfile.size:
+                    magic_description = 'empty'
+            if not magic_description and not pkgfile.is_ghost and has_magic:
+                unknown.append(len(descriptions))
+            descriptions.append(magic_description)
+
+        if unknown:
             start = time.monotonic()
-            magic_description = get_magic(pkgfile.path)
+            magic_cache = self.magic_cache or MagicCache.default()
+            classified = magic_cache.classify([pkgfiles[i] for i in unknown], self.magic_stats)
             self.timers['libmagic'] += time.monotonic() - start
-        if magic_description is None or Pkg._magic_from_compressed_re.search(magic_description):
-            # Discard magic from inside compressed files ('file -z')
-            # until PkgFile gets decompression support.  We may get
-            # such magic strings from package headers already now;
-            # for example Fedora's rpmbuild as of F-11's 4.7.1 is
-            # patched so it generates them.
-            magic_description = ''
-        return magic_description
+            for i, magic_description in zip(unknown, classified):
+                descriptions[i] = magic_description
+
+        for i, magic_description in enumerate(descriptions):
+            if magic_description is None or Pkg._magic_from_compressed_re.search(magic_description):
+                # Discard magic from inside compressed files ('file -z')
+                # until PkgFile gets decompression support.  We may get
+                # such magic strings from package headers already now;
+                # for example Fedora's rpmbuild as of F-11's 4.7.1 is
+                # patched so it generates them.
+                descriptions[i] = ''
+        return descriptions
 
     # internal function to gather dependency info used by the above ones
     def _gather_aux(self, header, xs, nametag, flagstag, versiontag,
@@ -504,34 +517,107 @@ class AbstractPkg:
                 return True
         return False
 
+    def file_head(self, filename, size):
+        """
+        Return the first size bytes of the content of the package file
+        captured in memory while streaming the payload. None is returned if
+        the content was not captured, the file needs to be read then.
+        """
+        return None
+
+    def _content_path(self, filename):
+        if filename in self.files:
+            return self.files[filename].path
+        return Path(self.dir_name() or '/', filename.lstrip('/'))
+
+    def mmap_content(self, filename):
+        """
+        Return a context manager mapping the content of the file to memory
+        (read-only, without copying) as a mmap object. Compiled bytes regexes
+        can search it directly, see contentscan.search() for the searches
+        limited in size. Empty and unreadable files give an empty bytes
+        object.
+        """
+        return mmap_file(self._content_path(filename))
+
     def read_with_mmap(self, filename):
         """Mmap a file, return it's content decoded."""
-        try:
-            with open(Path(self.dir_name() or '/', filename.lstrip('/'))) as in_file:
-                return mmap.mmap(in_file.fileno(), 0, mmap.MAP_SHARED, mmap.PROT_READ).read().decode()
-        except Exception:
-            return ''
+        with self.mmap_content(filename) as data:
+            try:
+                return str(data, 'utf-8')
+            except UnicodeDecodeError:
+                return ''
 
-    def grep(self, regex, filename):
-        """Grep regex from a file, return first matching line number (starting with 1)."""
-        data = self.read_with_mmap(filename)
-        match = regex.search(data)
-        if match:
-            return data.count('\n', 0, match.start()) + 1
-        return None
+    def scan_contents(self, patterns, max_size=None, sample=False):
+        """
+        Search the content of the package files for the regexes, reading each
+        file only once for all of them. The results are then returned by
+        grep().
+
+        Args:
+            patterns: A dictionary mapping file names to lists of regexes
+                      (see AbstractCheck.wanted_patterns), or to dictionaries
+                      mapping the regexes to their own max_size.
+            max_size: Only the first max_size bytes of the bigger files are
+                      searched (no limit if None).
+            sample: Search the bigger files in windows spread over the whole
+                    content instead of just their beginning.
+
+        Returns:
+            A dictionary mapping the scanned file names to dictionaries
+            mapping the regexes to the number of bytes searched for them.
+        """
+        start = time.monotonic()
+        scanned = {}
+        for filename, regexes in patterns.items():
+            pkgfile = self.files.get(filename)
+            if pkgfile is None or pkgfile.is_ghost or not stat.S_ISREG(pkgfile.mode):
+                continue
+            limits = regexes if isinstance(regexes, dict) else dict.fromkeys(regexes, max_size)
+            results, scanned[filename] = scan_file_limits(pkgfile.path, limits, sample)
+            for regex, line in results.items():
+                self._content_matches[(filename, regex)] = line
+        self.timers['ContentScan'] += time.monotonic() - start
+        return scanned
+
+    def grep(self, regex, filename, max_size=None, sample=False):
+        """
+        Grep regex from a file, return first matching line number (starting with 1).
+
+        The str regexes match the content decoded from UTF-8, the bytes regexes
+        match the raw content of any file. The result found by scan_contents()
+        is returned if there is one, otherwise the file is searched limited by
+        max_size and sample (see scan_contents).
+        """
+        key = (filename, regex)
+        if key in self._content_matches:
+            return self._content_matches[key]
+        return scan_file(self._content_path(filename), [regex], max_size, sample)[regex]
 
 
 class Pkg(AbstractPkg):
     _magic_from_compressed_re = re.compile(r'\([^)]+\s+compressed\s+data\b')
 
-    def __init__(self, filename, dirname, header=None, is_source=False, extracted=False, verbose=False):
+    def __init__(self, filename, dirname, header=None, is_source=False, extracted=False, verbose=False,
+                 lazy=False, magic_cache=None):
         self.filename = filename
+        self.magic_cache = magic_cache
         self.extracted = extracted
+        self.verbose = verbose
+        # names of the files waiting for extraction in the lazy mode
+        self.lazy = False
+        self._pending_files = set()
+        self._heads = {}
+        # (file name, regex) -> result of grep() found by scan_contents()
+        self._content_matches = {}
 
         # record decompression and extraction time
         start = time.monotonic()
-        self.dirname = self._extract_rpm(dirname, verbose)
-        self.timers = {'ExtractRpm': time.monotonic() - start, 'libmagic': 0}
+        self.timers = {'ExtractRpm': 0, 'DecompressRpm': 0, 'libmagic': 0, 'ContentScan': 0}
+        # files classified by libmagic and reused from MagicCache
+        self.magic_stats = {'hits': 0, 'misses': 0}
+        self.dirname = self._extract_rpm(dirname, verbose, lazy)
+        self.timers['ExtractRpm'] = time.monotonic() - start - self.timers['DecompressRpm']
         self.current_linenum = None
 
         self._req_names = -1
@@ -541,14 +627,7 @@ class Pkg(AbstractPkg):
             self.is_source = is_source
         else:
             # Create a package object from the file name
-            ts = rpm.TransactionSet()
-            # Don't check signatures here...
-            ts.setVSFlags(rpm._RPMVSF_NOSIGNATURES)
-            fd = os.open(filename, os.O_RDONLY)
-            try:
-                self.header = ts.hdrFromFdno(fd)
-            finally:
-                os.close(fd)
+            self.header = read_header(filename)
             self.is_source = not self.header[rpm.RPMTAG_SOURCERPM]
 
         self.name = self[rpm.RPMTAG_NAME]
@@ -560,11 +639,11 @@ class Pkg(AbstractPkg):
         self.req_names = [x[0] for x in self.requires + self.prereq]
 
         self.files = self._gather_files_info()
-        self.config_files = [x.name for x in self.files.values() if x.is_config]
-        self.doc_files = [x.name for x in self.files.values() if x.is_doc]
-        self.ghost_files = [x.name for x in self.files.values() if x.is_ghost]
-        self.noreplace_files = [x.name for x in self.files.values() if x.is_noreplace]
-        self.missingok_files = [x.name for x in self.files.values() if x.is_missingok]
+        self.config_files = self.files.names_with_flags(rpm.RPMFILE_CONFIG)
+        self.doc_files = self.files.names_with_flags(rpm.RPMFILE_DOC)
+        self.ghost_files = self.files.names_with_flags(rpm.RPMFILE_GHOST)
+        self.noreplace_files = self.files.names_with_flags(rpm.RPMFILE_NOREPLACE)
+        self.missingok_files = self.files.names_with_flags(rpm.RPMFILE_MISSINGOK)
 
         if self.is_no_source:
             self.arch = 'nosrc'
@@ -603,9 +682,12 @@ class Pkg(AbstractPkg):
 
     # return the name of the directory where the package is extracted
     def dir_name(self):
+        # the whole payload is needed if the directory is accessed directly
+        if self._pending_files:
+            self.extract_files(list(self._pending_files))
         return self.dirname
 
-    def _extract_rpm(self, dirname, verbose):
+    def _extract_rpm(self, dirname, verbose, lazy=False):
         if not Path(dirname).is_dir():
             print_warning('Unable to access dir %s' % dirname)
         elif dirname == '/':
@@ -616,22 +698,101 @@ class Pkg(AbstractPkg):
                 prefix='rpmlint.%s.' % Path(self.filename).name, dir=dirname
             )
             dirname = self.__tmpdir.name
-
-            # BusyBox' cpio does not support '-D' argument and the only safe
-            # usage is doing chdir before invocation.
-            filename = Path(self.filename).resolve()
-            with pushd(dirname):
-                stderr = None if verbose else subprocess.DEVNULL
-                if shutil.which('rpm2archive'):
-                    with open(filename, 'rb') as rpm_data:
-                        subprocess.check_output('rpm2archive - | tar -xz && chmod -R +rX .', shell=True, env=ENGLISH_ENVIRONMENT,
-                                                stderr=stderr, stdin=rpm_data)
-                else:
-                    command_str = f'rpm2cpio {quote(str(filename))} | cpio -id && chmod -R +rX .'
-                    subprocess.check_output(command_str, shell=True, env=ENGLISH_ENVIRONMENT, stderr=stderr)
             self.extracted = True
+            if lazy:
+                # files are extracted on demand by extract_files()
+                self.lazy = True
+                return dirname
+
+            try:
+                durations = extract_payload(self.filename, dirname)
+                self.timers['DecompressRpm'] = durations['decompress']
+            except UnsupportedPayloadError:
+                # e.g. the stripped cpio format used for files >= 4 GiB
+                self._extract_rpm_external(dirname, verbose)
         return dirname
 
+    def extract_files(self, names, heads=None):
+        """
+        Extract content of the given files in the lazy extraction mode.
+
+        The payload is streamed once for all the files. Directories are
+        extracted with all their content and symlinks with their targets.
+
+        Args:
+            names: Names of the package files to extract.
+            heads: Optional dictionary mapping package file names to the
+                   number of leading bytes to capture in memory (see
+                   file_head()) instead of extracting the file.
+        """
+        wanted = self._lazy_closure(names)
+        heads = {name: size for name, size in (heads or {}).items()
+                 if name in self._pending_files and name not in wanted and
+                 self.file_head(name, size) is None}
+        if not wanted and not heads:
+            return
+
+        try:
+            result = extract_payload(self.filename, self.dirname, wanted=wanted.__contains__, heads=heads)
+        except UnsupportedPayloadError:
+            start = time.monotonic()
+            self._extract_rpm_external(self.dirname, self.verbose)
+            self.timers['ExtractRpm'] += time.monotonic() - start
+            wanted = set(self._pending_files)
+        else:
+            self.timers['DecompressRpm'] += result['decompress']
+            self.timers['ExtractRpm'] += result['write']
+            self._heads.update(result['heads'])
+
+        self._pending_files -= wanted
+        for name in wanted:
+            self.files[name].extract = None
+
+    def _extract_pkgfile(self, pkgfile):
+        """Extract a file accessed for the first time in the lazy mode."""
+        self.extract_files((pkgfile.name,))
+
+    def _lazy_closure(self, names):
+        """
+        Return names of the files not yet extracted that are needed for
+        accessing the given files.
+        """
+        wanted = set()
+        todo = list(names)
+        while todo:
+            name = todo.pop()
+            if name in wanted or name not in self._pending_files:
+                continue
+            wanted.add(name)
+            pkgfile = self.files[name]
+            if stat.S_ISDIR(pkgfile.mode):
+                prefix = name.rstrip('/') + '/'
+                todo.extend(x for x in self._pending_files if x.startswith(prefix))
+            elif pkgfile.linkto:
+                todo.append(os.path.normpath(urljoin(name, pkgfile.linkto)))
+        return wanted
+
+    def file_head(self, filename, size):
+        head = self._heads.get(filename)
+        if head is not None and (len(head) >= size or len(head) == self.files[filename].size):
+            return head[:size]
+        return None
+
+    def _extract_rpm_external(self, dirname, verbose):
+        """Extract the payload with rpm2archive (or rpm2cpio) and tar/cpio."""
+        # BusyBox' cpio does not support '-D' argument and the only safe
+        # usage is doing chdir before invocation.
+        filename = Path(self.filename).resolve()
+        with pushd(dirname):
+            stderr = None if verbose else subprocess.DEVNULL
+            if shutil.which('rpm2archive'):
+                with open(filename, 'rb') as rpm_data:
+                    subprocess.check_output('rpm2archive - | tar -xz && chmod -R +rX .', shell=True, env=ENGLISH_ENVIRONMENT,
+                                            stderr=stderr, stdin=rpm_data)
+            else:
+                command_str = f'rpm2cpio {quote(str(filename))} | cpio -id && chmod -R +rX .'
+                subprocess.check_output(command_str, shell=True, env=ENGLISH_ENVIRONMENT, stderr=stderr)
+
     def check_signature(self):
         ret = subprocess.run(('rpm', '-Kv', self.filename),
                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
@@ -658,24 +819,11 @@ class Pkg(AbstractPkg):
 
     # extract information about the files
     def _gather_files_info(self):
-        ret = {}
         flags = self.header[rpm.RPMTAG_FILEFLAGS]
-        modes = self.header[rpm.RPMTAG_FILEMODES]
-        users = self.header[rpm.RPMTAG_FILEUSERNAME]
-        groups = self.header[rpm.RPMTAG_FILEGROUPNAME]
-        links = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILELINKTOS]]
         sizes = self.header[rpm.RPMTAG_FILESIZES]
         if len(sizes) != len(flags):
             sizes = self.header[rpm.RPMTAG_LONGFILESIZES]
-        md5s = self.header[rpm.RPMTAG_FILEMD5S]
-        mtimes = self.header[rpm.RPMTAG_FILEMTIMES]
-        rdevs = self.header[rpm.RPMTAG_FILERDEVS]
-        langs = self.header[rpm.RPMTAG_FILELANGS]
         inodes = self.header[rpm.RPMTAG_FILEINODES]
-        requires = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILEREQUIRE]]
-        provides = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILEPROVIDE]]
-        files = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILENAMES]]
-        magics = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILECLASS]]
         try:  # rpm >= 4.7.0
             filecaps = self.header[rpm.RPMTAG_FILECAPS]
         except AttributeError:
@@ -686,30 +834,53 @@ class Pkg(AbstractPkg):
         if not isinstance(inodes, list):
             inodes = [inodes]
 
-        if files:
-            for idx, file in enumerate(files):
-                pkgfile = PkgFile(file)
-                pkgfile.path = os.path.normpath(os.path.join(
-                    self.dir_name() or '/', pkgfile.name.lstrip('/')))
-                pkgfile.flags = flags[idx]
-                pkgfile.mode = modes[idx]
-                pkgfile.user = byte_to_string(users[idx])
-                pkgfile.group = byte_to_string(groups[idx])
-                pkgfile.linkto = links[idx] and os.path.normpath(links[idx])
-                pkgfile.size = sizes[idx]
-                pkgfile.md5 = md5s[idx]
-                pkgfile.mtime = mtimes[idx]
-                pkgfile.rdev = rdevs[idx]
-                pkgfile.inode = inodes[idx]
-                pkgfile.requires = parse_deps(requires[idx])
-                pkgfile.provides = parse_deps(provides[idx])
-                pkgfile.lang = byte_to_string(langs[idx])
-                pkgfile.magic = magics[idx]
-                pkgfile.magic = self._calc_magic(pkgfile)
-                if filecaps:
-                    pkgfile.filecaps = byte_to_string(filecaps[idx])
-                ret[pkgfile.name] = pkgfile
-        return ret
+        files = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILENAMES]]
+        if self.lazy:
+            self._pending_files.update(name for name, flag in zip(files, flags)
+                                       if not flag & rpm.RPMFILE_GHOST)
+        # the file attributes are decoded from the header arrays on demand
+        columns = {
+            'flags': flags,
+            'mode': self.header[rpm.RPMTAG_FILEMODES],
+            'user': self.header[rpm.RPMTAG_FILEUSERNAME],
+            'group': self.header[rpm.RPMTAG_FILEGROUPNAME],
+            'linkto': self.header[rpm.RPMTAG_FILELINKTOS],
+            'size': sizes,
+            'md5': self.header[rpm.RPMTAG_FILEMD5S],
+            'mtime': self.header[rpm.RPMTAG_FILEMTIMES],
+            'rdev': self.header[rpm.RPMTAG_FILERDEVS],
+            'inode': inodes,
+            'requires': self.header[rpm.RPMTAG_FILEREQUIRE],
+            'provides': self.header[rpm.RPMTAG_FILEPROVIDE],
+            'lang': self.header[rpm.RPMTAG_FILELANGS],
+            'magic': self.header[rpm.RPMTAG_FILECLASS],
+            'filecaps': filecaps or None,
+        }
+        decoders = {
+            'user': byte_to_string,
+            'group': byte_to_string,
+            'linkto': lambda x: os.path.normpath(byte_to_string(x)) if x else '',
+            'requires': lambda x: parse_deps(byte_to_string(x)),
+            'provides': lambda x: parse_deps(byte_to_string(x)),
+            'lang': byte_to_string,
+            'magic': byte_to_string,
+            'filecaps': byte_to_string,
+        }
+        return FileTable(files, columns, decoders, self.dirname or '/',
+                         extract=self._extract_pkgfile if self.lazy else None,
+                         magic_loader=self._load_files_magic)
+
+    def _load_files_magic(self, pkgfiles):
+        """
+        Return the magic of the package files (see FileTable.load_magic). In
+        the lazy mode the files without the magic in the header are extracted
+        at once for libmagic.
+        """
+        if self.lazy:
+            self.extract_files([pkgfile.name for pkgfile in pkgfiles
+                                if has_magic and not pkgfile.magic and pkgfile.size and
+                                not pkgfile.is_ghost and stat.S_ISREG(pkgfile.mode)])
+        return self._calc_files_magic(pkgfiles)
 
     def readlink(self, pkgfile):
         """
@@ -815,7 +986,9 @@ class FakePkg(AbstractPkg):
     ]
 
     def __init__(self, name, is_source=False):
-        self.timers = {'ExtractRpm': 0, 'libmagic': 0}
+        self.timers = {'ExtractRpm': 0, 'DecompressRpm': 0, 'libmagic': 0, 'ContentScan': 0}
+        self._content_matches = {}
+        self.magic_stats = {'hits': 0, 'misses': 0}
         self.name = str(name)
         self.filename = f'{name}.rpm'
         self.arch = None
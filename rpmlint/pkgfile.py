@@ -2,12 +2,15 @@ import rpm
 
 
 class PkgFile:
-    __slots__ = ['name', 'path', 'flags', 'mode', 'user', 'group', 'linkto',
+    __slots__ = ['name', 'flags', 'mode', 'user', 'group', 'linkto',
                  'size', 'md5', 'mtime', 'rdev', 'inode', 'requires', 'provides',
-                 'lang', 'magic', 'filecaps']
+                 'lang', 'magic', 'filecaps', '_path', 'extract']
 
     def __init__(self, name):
         self.name = name
+        # Callback extracting the file content on the first access to path
+        # (lazy extraction mode), None if the file is already available
+        self.extract = None
         # Real path to the file (taking extract dir into account)
         self.path = name
         self.flags = 0
@@ -26,6 +29,24 @@ class PkgFile:
         self.magic = ''
         self.filecaps = None
 
+    @property
+    def path(self):
+        if self.extract is not None:
+            self.extract(self)
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self._path = value
+
+    @property
+    def known_magic(self):
+        """
+        The magic of the file if it is known without classifying the file
+        content by libmagic (e.g. from the package header), '' otherwise.
+        """
+        return self.magic or ''
+
     @property
     def is_config(self):
         return self.flags & rpm.RPMFILE_CONFIG
@@ -1,8 +1,128 @@
-from itertools import dropwhile, takewhile
 import re
-import subprocess
-
-from rpmlint.helpers import ENGLISH_ENVIRONMENT
+import struct
+
+from rpmlint.elffile import ElfError, NOT_ELF_ERROR, open_elf_files
+
+
+# Names of the values used by readelf, the parsers below produce
+# the very same information as the readelf -S/-l/-d/-s/-p commands.
+SEGMENT_TYPES = {
+    0: 'NULL',
+    1: 'LOAD',
+    2: 'DYNAMIC',
+    3: 'INTERP',
+    4: 'NOTE',
+    5: 'SHLIB',
+    6: 'PHDR',
+    7: 'TLS',
+    0x6474e550: 'GNU_EH_FRAME',
+    0x6474e551: 'GNU_STACK',
+    0x6474e552: 'GNU_RELRO',
+    0x6474e553: 'GNU_PROPERTY',
+    0x6474e554: 'GNU_SFRAME',
+    0x65a3dbe6: 'OPENBSD_RANDOMIZE',
+    0x65a3dbe7: 'OPENBSD_WXNEEDED',
+    0x65a41be6: 'OPENBSD_BOOTDATA',
+}
+
+DYNAMIC_TAGS = {
+    0: 'NULL',
+    1: 'NEEDED',
+    2: 'PLTRELSZ',
+    3: 'PLTGOT',
+    4: 'HASH',
+    5: 'STRTAB',
+    6: 'SYMTAB',
+    7: 'RELA',
+    8: 'RELASZ',
+    9: 'RELAENT',
+    10: 'STRSZ',
+    11: 'SYMENT',
+    12: 'INIT',
+    13: 'FINI',
+    14: 'SONAME',
+    15: 'RPATH',
+    16: 'SYMBOLIC',
+    17: 'REL',
+    18: 'RELSZ',
+    19: 'RELENT',
+    20: 'PLTREL',
+    21: 'DEBUG',
+    22: 'TEXTREL',
+    23: 'JMPREL',
+    24: 'BIND_NOW',
+    25: 'INIT_ARRAY',
+    26: 'FINI_ARRAY',
+    27: 'INIT_ARRAYSZ',
+    28: 'FINI_ARRAYSZ',
+    29: 'RUNPATH',
+    30: 'FLAGS',
+    32: 'PREINIT_ARRAY',
+    33: 'PREINIT_ARRAYSZ',
+    34: 'SYMTAB_SHNDX',
+    35: 'RELRSZ',
+    36: 'RELR',
+    37: 'RELRENT',
+    0x6ffffdf5: 'GNU_PRELINKED',
+    0x6ffffdf6: 'GNU_CONFLICTSZ',
+    0x6ffffdf7: 'GNU_LIBLISTSZ',
+    0x6ffffdf8: 'CHECKSUM',
+    0x6ffffdf9: 'PLTPADSZ',
+    0x6ffffdfa: 'MOVEENT',
+    0x6ffffdfb: 'MOVESZ',
+    0x6ffffdfc: 'FEATURE',
+    0x6ffffdfd: 'POSFLAG_1',
+    0x6ffffdfe: 'SYMINSZ',
+    0x6ffffdff: 'SYMINENT',
+    0x6ffffef5: 'GNU_HASH',
+    0x6ffffef6: 'TLSDESC_PLT',
+    0x6ffffef7: 'TLSDESC_GOT',
+    0x6ffffef8: 'GNU_CONFLICT',
+    0x6ffffef9: 'GNU_LIBLIST',
+    0x6ffffefa: 'CONFIG',
+    0x6ffffefb: 'DEPAUDIT',
+    0x6ffffefc: 'AUDIT',
+    0x6ffffefd: 'PLTPAD',
+    0x6ffffefe: 'MOVETAB',
+    0x6ffffeff: 'SYMINFO',
+    0x6ffffff0: 'VERSYM',
+    0x6ffffff9: 'RELACOUNT',
+    0x6ffffffa: 'RELCOUNT',
+    0x6ffffffb: 'FLAGS_1',
+    0x6ffffffc: 'VERDEF',
+    0x6ffffffd: 'VERDEFNUM',
+    0x6ffffffe: 'VERNEED',
+    0x6fffffff: 'VERNEEDNUM',
+    0x7ffffffd: 'AUXILIARY',
+    0x7ffffffe: 'USED',
+    0x7fffffff: 'FILTER',
+}
+
+DYNAMIC_STRINGS = {
+    'NEEDED': 'Shared library',
+    'SONAME': 'Library soname',
+    'RPATH': 'Library rpath',
+    'RUNPATH': 'Library runpath',
+    'AUXILIARY': 'Auxiliary library',
+    'FILTER': 'Filter library',
+    'CONFIG': 'Configuration file',
+    'DEPAUDIT': 'Dependency audit library',
+    'AUDIT': 'Audit library',
+}
+
+DYNAMIC_SIZES = {'PLTRELSZ', 'RELASZ', 'RELAENT', 'STRSZ', 'SYMENT', 'RELSZ', 'RELENT',
+                 'INIT_ARRAYSZ', 'FINI_ARRAYSZ', 'PREINIT_ARRAYSZ', 'RELRSZ', 'RELRENT',
+                 'PLTPADSZ', 'MOVEENT', 'MOVESZ', 'SYMINSZ', 'SYMINENT'}
+DYNAMIC_COUNTS = {'VERDEFNUM', 'VERNEEDNUM', 'RELACOUNT', 'RELCOUNT'}
+
+DYNAMIC_FLAGS = ('ORIGIN', 'SYMBOLIC', 'TEXTREL', 'BIND_NOW', 'STATIC_TLS')
+DYNAMIC_FLAGS_1 = ('NOW', 'GLOBAL', 'GROUP', 'NODELETE', 'LOADFLTR', 'INITFIRST', 'NOOPEN',
+                   'ORIGIN', 'DIRECT', 'TRANS', 'INTERPOSE', 'NODEFLIB', 'NODUMP', 'CONFALT',
+                   'ENDFILTEE', 'DISPRELDNE', 'DISPRELPND', 'NODIRECT', 'IGNMULDEF', 'NOKSYMS',
+                   'NOHDR', 'EDITED', 'NORELOC', 'SYMINTPOSE', 'GLOBAUDIT', 'SINGLETON', 'STUB',
+                   'PIE', 'KMOD', 'WEAKFILTER', 'NOCOMMON')
+
+STT_FUNC = 2
 
 
 class ElfSection:
@@ -11,7 +131,7 @@ class ElfSection:
     """
     def __init__(self, name, size):
         self.name = name
-        self.size = int(size, 16)
+        self.size = size
 
 
 class ElfProgramHeader:
@@ -32,16 +152,34 @@ class ElfDynamicSection:
         self.value = value
 
 
-class ElfSectionInfo:
+class ElfInfo:
+    """
+    Base class of the ELF information parsers. The information is read
+    from the ElfFile objects (one per archive member) and the failure is
+    recorded in parsing_failed_reason in the same way as readelf reports it.
     """
-    Class contains information about ELF sections of an ELF file. The information
-    is get with the following command line: readelf -WS.
 
-    Output example:
+    def __init__(self, elf_files, parsing_failed_reason=None):
+        self.parsing_failed_reason = parsing_failed_reason
+        if parsing_failed_reason is None:
+            try:
+                for elf_file in elf_files:
+                    self.parse(elf_file)
+            except (ElfError, struct.error) as e:
+                self.parsing_failed_reason = str(e)
+
+    def parse(self, elf_file):
+        """Read the information of one ELF file, implemented by the subclasses."""
+        return
 
-    There are 12 section headers, starting at offset 0x268:
 
-    Section Headers:
+class ElfSectionInfo(ElfInfo):
+    """
+    Class contains information about ELF sections of an ELF file
+    (equivalent of readelf -WS).
+
+    Example of the parsed sections:
+
       [Nr] Name              Type            Address          Off    Size   ES Flg Lk Inf Al
       [ 0]                   NULL            0000000000000000 000000 000000 00      0   0  0
       [ 1] .text             PROGBITS        0000000000000000 000040 000015 00  AX  0   0  1
@@ -55,73 +193,36 @@ class ElfSectionInfo:
       [ 9] .symtab           SYMTAB          0000000000000000 0000d0 0000f0 18     10   8  8
       [10] .strtab           STRTAB          0000000000000000 0001c0 000011 00      0   0  1
       [11] .shstrtab         STRTAB          0000000000000000 000208 000059 00      0   0  1
-    Key to Flags:
-      W (write), A (alloc), X (execute), M (merge), S (strings), I (info),
-      L (link order), O (extra OS processing required), G (group), T (TLS),
-      C (compressed), x (unknown), o (OS specific), E (exclude),
-      l (large), p (processor specific)
+
+    The NULL section is skipped.
     """
 
-    section_regex = re.compile(r'.*\] (?P<section>\S*)\s*\S+\s*\S*\s*\S*\s*(?P<size>\w*)')
     pic_regex = re.compile(r'\.rela?\.(data|text)')
 
-    def __init__(self, path, extra_flags):
-        self.path = path
+    def __init__(self, elf_files, parsing_failed_reason=None):
         self.elf_files = []
-        self.parsing_failed_reason = None
         self.pic = False
-        self.extra_flags = extra_flags
-        self.parse()
-
-    def parse(self):
-        r = subprocess.run(['readelf', '-W', '-S', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
-            return
-
-        lines = r.stdout.splitlines()
-        needle = 'Section Headers:'
+        super().__init__(elf_files, parsing_failed_reason)
 
-        # archive files can contain multiple files
-        i = 0
-        length = len(lines)
+    def parse(self, elf_file):
+        parsed_sections = []
+        for section in elf_file.sections[1:]:
+            parsed_sections.append(ElfSection(section.name, section.size))
 
-        while i < length:
-            parsed_sections = []
-            while needle not in lines[i]:
-                i += 1
-                if i == length:
-                    return
+            # detect a PIC section
+            if self.pic_regex.search(section.name) is not None:
+                self.pic = True
 
-            # skip header and empty section
-            i += 3
+        if len(parsed_sections) > 0:
+            self.elf_files.append(parsed_sections)
 
-            sections = []
-            while 'Key to Flags:' not in lines[i]:
-                sections.append(lines[i])
-                i += 1
 
-            for s in sections:
-                r = self.section_regex.search(s)
-                section = ElfSection(r.group('section'), r.group('size'))
-                parsed_sections.append(section)
-
-                # detect a PIC section
-                if self.pic_regex.search(section.name) is not None:
-                    self.pic = True
-
-            if len(parsed_sections) > 0:
-                self.elf_files.append(parsed_sections)
-
-
-class ElfProgramHeaderInfo:
+class ElfProgramHeaderInfo(ElfInfo):
     """
     Program Headers:
       Type           Offset   VirtAddr           PhysAddr           FileSiz  MemSiz   Flg Align
       PHDR           0x000040 0x0000000000400040 0x0000000000400040 0x000268 0x000268 R   0x8
       INTERP         0x0002a8 0x00000000004002a8 0x00000000004002a8 0x00001c 0x00001c R   0x1
-          [Requesting program interpreter: /lib64/ld-linux-x86-64.so.2]
       LOAD           0x000000 0x0000000000400000 0x0000000000400000 0x000460 0x000460 R   0x1000
       LOAD           0x001000 0x0000000000401000 0x0000000000401000 0x0002ad 0x0002ad R E 0x1000
       LOAD           0x002000 0x0000000000402000 0x0000000000402000 0x0001d0 0x0001d0 R   0x1000
@@ -131,43 +232,33 @@ class ElfProgramHeaderInfo:
       GNU_EH_FRAME   0x002004 0x0000000000402004 0x0000000000402004 0x000054 0x000054 R   0x4
       GNU_STACK      0x000000 0x0000000000000000 0x0000000000000000 0x000000 0x000000 RW  0x10
       GNU_RELRO      0x002e00 0x0000000000403e00 0x0000000000403e00 0x000200 0x000200 R   0x1
-    """
 
-    header_regex = re.compile('\\s+(?P<header>\\w+)(\\s+\\w+){5}\\s+(?P<flags>[RWE ]{3}).*')
+    The headers are named by their type and the flags are 'R', 'W' and 'E'
+    (e.g. 'RE' for the second LOAD header).
+    """
 
-    def __init__(self, path, extra_flags):
-        self.path = path
+    def __init__(self, elf_files, parsing_failed_reason=None):
         self.headers = []
-        self.parsing_failed_reason = None
-        self.extra_flags = extra_flags
-        self.parse()
-
-    def parse(self):
-        r = subprocess.run(['readelf', '-W', '-l', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
-            return
-
-        lines = r.stdout.splitlines()
-        needle = 'Program Headers:'
-
-        while len(lines) > 0:
-            lines = list(dropwhile(lambda x: needle not in x, lines))
-
-            # skip header
-            lines = lines[2:]
-
-            sections = list(takewhile(lambda x: x.strip() != '', lines))
-            for s in sections:
-                r = self.header_regex.search(s)
-                if r is not None:
-                    self.headers.append(ElfProgramHeader(r.group('header'), r.group('flags')))
-
-            lines = lines[len(sections):]
-
-
-class ElfDynamicSectionInfo:
+        super().__init__(elf_files, parsing_failed_reason)
+
+    def parse(self, elf_file):
+        for segment in elf_file.segments:
+            flags = ''.join(c for c, bit in (('R', 4), ('W', 2), ('E', 1)) if segment.flags & bit)
+            self.headers.append(ElfProgramHeader(self.segment_type(segment.type), flags))
+
+    @staticmethod
+    def segment_type(value):
+        name = SEGMENT_TYPES.get(value)
+        if name is not None:
+            return name
+        if 0x70000000 <= value <= 0x7fffffff:
+            return f'LOPROC+{value - 0x70000000:#x}'
+        if 0x60000000 <= value <= 0x6fffffff:
+            return f'LOOS+{value - 0x60000000:#x}'
+        return f'<unknown>: {value:x}'
+
+
+class ElfDynamicSectionInfo(ElfInfo):
     """
     0x0000000000000001 (NEEDED)             Shared library: [ld-linux-x86-64.so.2]
     0x000000000000000e (SONAME)             Library soname: [libc.so.6]
@@ -201,38 +292,68 @@ class ElfDynamicSectionInfo:
 
     0x60009990 (Operating System specific: 60009990)        0x24e20
     0x60009991 (Operating System specific: 60009991)        0x8
+
+    The entries are stored as (key, value) pairs formatted the same way.
     """
 
-    section_regex = re.compile('\\s+\\w*\\s+\\((?P<key>[^\\)]+)\\)\\s+(?P<value>.*)')
     soname_regex = re.compile('Library soname: \\[(?P<soname>[^\\]]+)\\]')
     needed_regex = re.compile('Shared library: \\[(?P<library>[^\\]]+)\\]')
     runpath_regex = re.compile('Library runpath: \\[(?P<path>[^\\]]+)\\]')
     rpath_regex = re.compile('Library rpath: \\[(?P<path>[^\\]]+)\\]')
 
-    def __init__(self, path, extra_flags):
-        self.path = path
+    def __init__(self, elf_files, parsing_failed_reason=None):
         self.sections = []
-        self.parsing_failed_reason = None
-        self.extra_flags = extra_flags
-        self.parse()
+        super().__init__(elf_files, parsing_failed_reason)
         self.parse_meta()
 
-    def parse(self):
-        r = subprocess.run(['readelf', '-W', '-d', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
+    def parse(self, elf_file):
+        entries = elf_file.dynamic_entries()
+        if not entries:
             return
-
-        lines = r.stdout.splitlines()
-        needle = 'Dynamic section at offset'
-
-        lines = list(dropwhile(lambda x: needle not in x, lines))
-        # skip header
-        lines = lines[2:]
-        for line in lines:
-            r = self.section_regex.search(line)
-            self.sections.append(ElfDynamicSection(r.group('key'), r.group('value')))
+        strtab = elf_file.dynamic_strtab(entries)
+        for tag, value in entries:
+            key = self.dynamic_tag(tag)
+            self.sections.append(ElfDynamicSection(key, self.dynamic_value(elf_file, strtab, key, value)))
+
+    @staticmethod
+    def dynamic_tag(value):
+        name = DYNAMIC_TAGS.get(value)
+        if name is not None:
+            return name
+        if 0x70000000 <= value <= 0x7fffffff:
+            return f'Processor Specific: {value:x}'
+        if 0x6000000d <= value <= 0x6ffff000:
+            return f'Operating System specific: {value:x}'
+        return f'<unknown>: {value:x}'
+
+    @staticmethod
+    def dynamic_value(elf_file, strtab, key, value):
+        if key in DYNAMIC_STRINGS:
+            if strtab is not None and value < strtab[1]:
+                name = elf_file.cstring(strtab[0] + value, strtab[0] + strtab[1])
+                return f'{DYNAMIC_STRINGS[key]}: [{name}]'
+            if key in ('NEEDED', 'SONAME', 'RPATH', 'RUNPATH'):
+                return f'{value:#x}'
+            return f'{DYNAMIC_STRINGS[key]}: {value:#x}'
+        if key in DYNAMIC_SIZES:
+            return f'{value} (bytes)'
+        if key in DYNAMIC_COUNTS:
+            return str(value)
+        if key == 'BIND_NOW':
+            # the value of this entry is ignored
+            return ''
+        if key == 'PLTREL':
+            return DYNAMIC_TAGS.get(value, f'{value:#x}')
+        if key == 'FLAGS':
+            return ' '.join(DYNAMIC_FLAGS[bit] if bit < len(DYNAMIC_FLAGS) else 'unknown'
+                            for bit in range(value.bit_length()) if value & (1 << bit))
+        if key == 'FLAGS_1':
+            names = [DYNAMIC_FLAGS_1[bit] for bit in range(len(DYNAMIC_FLAGS_1)) if value & (1 << bit)]
+            rest = value & ~((1 << len(DYNAMIC_FLAGS_1)) - 1)
+            if rest:
+                names.append(f'{rest:x}')
+            return ' '.join(['Flags:'] + names)
+        return f'{value:#x}'
 
     def parse_meta(self):
         self.soname = None
@@ -264,40 +385,38 @@ class ElfDynamicSectionInfo:
         return [x.value for x in self.sections if x.key == key]
 
 
-class ElfSymbolTableInfo:
+class ElfSymbolTableInfo(ElfInfo):
     """
-     7: 0000000000000000     0 SECTION LOCAL  DEFAULT    7
-     8: 0000000000000000     0 SECTION LOCAL  DEFAULT    8
-     9: 0000000000000000     0 SECTION LOCAL  DEFAULT    6
-    10: 0000000000000000    18 FUNC    GLOBAL DEFAULT    4 main
-    11: 0000000000000000    11 FUNC    GLOBAL DEFAULT    5 foo
-    ...
-     7: 0000000000000000     0 SECTION LOCAL  DEFAULT    5 .comment
-     8: 0000000000000000    21 FUNC    GLOBAL DEFAULT    1 main
+    Collects the names of all functions from the symbol tables (.symtab and
+    .dynsym), versioned dynamic symbols are stored the same way as readelf
+    prints them:
+
+      10: 0000000000000000    18 FUNC    GLOBAL DEFAULT    4 main
+      11: 0000000000000000    11 FUNC    GLOBAL DEFAULT    5 foo
+      12: 0000000000000000     0 FUNC    GLOBAL DEFAULT  UND puts@GLIBC_2.2.5 (2)
+      13: 0000000000011960   224 FUNC    GLOBAL DEFAULT   16 bar@@VERS_1.0
     """
 
-    def __init__(self, path, extra_flags):
-        self.path = path
+    def __init__(self, elf_files, parsing_failed_reason=None):
         self.functions = set()
-        self.parsing_failed_reason = None
-        self.extra_flags = extra_flags
-        self.parse()
-
-    def parse(self):
-        try:
-            r = subprocess.run(['readelf', '-Ui', '-W', '-s', self.path] + self.extra_flags, encoding='utf8',
-                               errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
-            if r.returncode != 0:
-                self.parsing_failed_reason = r.stderr
-                return
-
-            lines = r.stdout.splitlines()
-            for line in lines:
-                parts = line.split()
-                if len(parts) >= 8 and parts[3] == 'FUNC':
-                    self.functions.add(parts[7])
-        except UnicodeDecodeError as e:
-            self.parsing_failed_reason = str(e)
+        super().__init__(elf_files, parsing_failed_reason)
+
+    def parse(self, elf_file):
+        for section in elf_file.sections:
+            if section.type not in (2, 11):  # SHT_SYMTAB, SHT_DYNSYM
+                continue
+            for symbol in elf_file.symbols(section):
+                if symbol.type != STT_FUNC:
+                    continue
+                name = symbol.name
+                if symbol.version_kind == 'public':
+                    name += '@@' + symbol.version
+                elif symbol.version_kind is not None:
+                    name += '@' + symbol.version
+                # readelf output is split on whitespace
+                parts = name.split()
+                if parts:
+                    self.functions.add(parts[0])
 
     def get_functions_for_regex(self, regex):
         for sym in self.functions:
@@ -305,42 +424,36 @@ class ElfSymbolTableInfo:
                 yield sym
 
 
-class ElfCommentInfo:
+class ElfCommentInfo(ElfInfo):
     """
     String dump of section '.comment':
       [     1]  GHC 8.6.5
-    """
 
-    comment_regex = re.compile('\\s+\\[[\\s[0-9]+\\]\\s+(?P<comment>.*)')
+    Contains all the (non-empty) strings of the .comment sections.
+    """
 
-    def __init__(self, path, extra_flags):
-        self.path = path
+    def __init__(self, elf_files, parsing_failed_reason=None):
         self.comments = []
-        self.parsing_failed_reason = None
-        self.extra_flags = extra_flags
-        self.parse()
-
-    def parse(self):
-        r = subprocess.run(['readelf', '-p', '.comment', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
-            return
+        super().__init__(elf_files, parsing_failed_reason)
 
-        lines = r.stdout.splitlines()
-        for line in lines:
-            r = self.comment_regex.search(line)
-            if r:
-                self.comments.append(r.group('comment'))
+    def parse(self, elf_file):
+        section = elf_file.get_section('.comment')
+        if section is None:
+            return
+        for comment in elf_file.section_content(section).split(b'\0'):
+            comment = comment.decode('utf-8', errors='replace').lstrip()
+            if comment:
+                self.comments.append(comment)
 
 
 class ReadelfParser:
     """
-    Class contains all information obtained by readelf command
+    Class contains all information read from the ELF file
+    (the same information as provided by readelf command)
     in a structured format.
     """
 
-    NOT_ELF_ERROR = 'Error: Not an ELF file - it has the wrong magic bytes at the start'
+    NOT_ELF_ERROR = NOT_ELF_ERROR
     so_regex = re.compile(r'/lib(64)?/[^/]+\.so(\.[0-9]+)*$')
 
     def __init__(self, pkgfile_path, path):
@@ -348,16 +461,18 @@ class ReadelfParser:
         self.is_shlib = self.so_regex.search(path)
         self.is_debug = path.endswith('.debug')
 
-        # Do not follow debug info links
-        output = subprocess.check_output('readelf --help', shell=True, encoding='utf8')
-        flag = '--debug-dump=no-follow-links'
-        extra_flags = [flag] if flag in output else []
-
-        self.section_info = ElfSectionInfo(pkgfile_path, extra_flags)
-        self.program_header_info = ElfProgramHeaderInfo(pkgfile_path, extra_flags)
-        self.dynamic_section_info = ElfDynamicSectionInfo(pkgfile_path, extra_flags)
-        self.symbol_table_info = ElfSymbolTableInfo(pkgfile_path, extra_flags)
-        self.comment_section_info = ElfCommentInfo(pkgfile_path, extra_flags)
+        try:
+            with open_elf_files(pkgfile_path) as elf_files:
+                self._parse(elf_files)
+        except ElfError as e:
+            self._parse([], str(e))
+
+    def _parse(self, elf_files, parsing_failed_reason=None):
+        self.section_info = ElfSectionInfo(elf_files, parsing_failed_reason)
+        self.program_header_info = ElfProgramHeaderInfo(elf_files, parsing_failed_reason)
+        self.dynamic_section_info = ElfDynamicSectionInfo(elf_files, parsing_failed_reason)
+        self.symbol_table_info = ElfSymbolTableInfo(elf_files, parsing_failed_reason)
+        self.comment_section_info = ElfCommentInfo(elf_files, parsing_failed_reason)
 
     def parsing_failed_reason(self):
         reasons = [self.section_info.parsing_failed_reason,
@@ -2,11 +2,10 @@ import contextlib
 from itertools import chain
 import pathlib
 import sys
-import tempfile
 
 import rpm
 from rpmlint.helpers import byte_to_string, print_warning
-from rpmlint.pkg import get_installed_pkgs, Pkg
+from rpmlint.pkg import get_installed_pkgs, read_header
 
 
 class Rpmdiff:
@@ -52,8 +51,8 @@ class Rpmdiff:
                     break
 
         try:
-            old = self.__load_pkg(old).header
-            new = self.__load_pkg(new).header
+            old = self.__load_header(old)
+            new = self.__load_header(new)
         except KeyError as e:
             print_warning(str(e))
             sys.exit(2)
@@ -128,20 +127,22 @@ class Rpmdiff:
     def __add(self, fmt, data):
         self.result.append((fmt, data))
 
-    # load a package from a file or from the installed ones
-    def __load_pkg(self, name):
+    # load a package header from a file or from the installed ones, the
+    # payload is never needed
+    def __load_header(self, name):
+        if isinstance(name, rpm.hdr):
+            return name
         # FIXME: redo to try file/installed and proceed based on that, or pick
         # one of the selected first
-        tmpdir = tempfile.gettempdir()
         with contextlib.suppress(TypeError):
             if name.is_file():
-                return Pkg(name, tmpdir)
+                return read_header(name)
         inst = get_installed_pkgs(str(name))
         if not inst:
             raise KeyError(f'No installed packages by name {name}')
         if len(inst) > 1:
             raise KeyError(f'More than one installed packages by name {name}')
-        return inst[0]
+        return inst[0].header
 
     # output the right string according to RPMSENSE_* const
     def sense2str(self, sense):
@@ -234,3 +235,51 @@ class Rpmdiff:
         for filedata in fi:
             result[filedata.name] = filedata
         return result
+
+
+def _package_key(header):
+    arch = 'src' if not header[rpm.RPMTAG_SOURCERPM] else byte_to_string(header[rpm.RPMTAG_ARCH])
+    return (byte_to_string(header[rpm.RPMTAG_NAME]), arch)
+
+
+def _load_directory(directory):
+    """
+    Read headers of all RPM files in the directory, return a dictionary
+    mapping (name, arch) to a (path, header) tuple. The files that cannot be
+    read are skipped.
+    """
+    packages = {}
+    for path in sorted(pathlib.Path(directory).glob('*.rpm')):
+        try:
+            header = read_header(path)
+        except (rpm.error, OSError) as e:
+            print_warning(f'Skipping {path}, it cannot be read: {e}')
+            continue
+        key = _package_key(header)
+        if key in packages:
+            print_warning(f'Skipping {path}, {packages[key][0]} has the same name')
+            continue
+        packages[key] = (path, header)
+    return packages
+
+
+def diff_directories(old_dir, new_dir, ignore=None, exclude=None):
+    """
+    Compare the packages in old_dir with the packages of the same name (and
+    architecture) in new_dir. Only package headers are read.
+
+    Yields (old, new, diff) tuples sorted by the package name, where old and
+    new are paths to the RPM files and diff is the Rpmdiff of them. For
+    packages found only in one of the directories, the other path and diff
+    are None.
+    """
+    old_packages = _load_directory(old_dir)
+    new_packages = _load_directory(new_dir)
+    for key in sorted(old_packages.keys() | new_packages.keys()):
+        if key not in new_packages:
+            yield old_packages[key][0], None, None
+        elif key not in old_packages:
+            yield None, new_packages[key][0], None
+        else:
+            (old, old_header), (new, new_header) = old_packages[key], new_packages[key]
+            yield old, new, Rpmdiff(old_header, new_header, ignore=ignore, exclude=exclude)
@@ -0,0 +1,181 @@
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import socket
+import stat
+import sys
+import traceback
+
+from rpmlint.helpers import print_warning
+
+# options of the command line that can be set by each request, the other
+# ones (configuration, checks, profiling) are given when starting the server;
+# the packages are always checked in the server process (--jobs is not
+# used), the forked workers would inherit the output redirected to the client
+REQUEST_OPTIONS = ('rpmfile', 'rpmlintrc', 'installed', 'verbose', 'strict', 'permissive', 'time_report',
+                   'stream', 'ignore_unused_rpmlintrc', 'explain', 'print_config')
+# options whose values are lists of paths
+PATH_OPTIONS = ('rpmfile', 'rpmlintrc')
+
+
+class StreamWriter(io.TextIOBase):
+    """
+    Text stream sending everything written to it to the client as the
+    messages {name: text}.
+    """
+
+    def __init__(self, connection_file, name):
+        self.connection_file = connection_file
+        self.name = name
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            send_message(self.connection_file, {self.name: text})
+        return len(text)
+
+    def flush(self):
+        self.connection_file.flush()
+
+
+def send_message(connection_file, message):
+    connection_file.write(json.dumps(message) + '\n')
+
+
+def receive_message(connection_file):
+    """Return the next message or None at the end of the connection."""
+    line = connection_file.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class LintServer:
+    """
+    Server checking the packages requested by the clients over a UNIX socket
+    with a warm Lint instance (rpmlint --serve SOCKET).
+
+    Starting rpmlint (imports, configuration and descriptions loading, checks
+    initialization, dictionaries) costs more than checking a small package,
+    the server pays it only once. The requests are served one by one, each
+    with its own rpmlintrc files and output (see Lint.serve_request).
+
+    The messages are JSON objects, one per line. The client sends the
+    request {'options': {...}} with the options of the command line (see
+    REQUEST_OPTIONS) and the server sends back the output of rpmlint as
+    {'stdout': text} and {'stderr': text} messages and {'exit': code} at the
+    end of the request.
+    """
+
+    def __init__(self, lint, socket_path):
+        self.lint = lint
+        self.socket_path = Path(socket_path)
+
+    def serve_forever(self):
+        self._remove_stale_socket()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            # the socket is created accessible only by the user, other users
+            # could connect before a chmod
+            umask = os.umask(0o177)
+            try:
+                server.bind(str(self.socket_path))
+            finally:
+                os.umask(umask)
+            try:
+                server.listen()
+                while True:
+                    connection, _ = server.accept()
+                    with connection:
+                        self.handle(connection)
+            finally:
+                self.socket_path.unlink(missing_ok=True)
+
+    def _remove_stale_socket(self):
+        try:
+            mode = self.socket_path.lstat().st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"'{self.socket_path}' exists and it is not a socket")
+        self.socket_path.unlink()
+
+    def handle(self, connection):
+        """Serve one request of the client."""
+        with connection.makefile('r', encoding='utf-8') as rfile, \
+                connection.makefile('w', encoding='utf-8') as wfile:
+            try:
+                request = receive_message(rfile)
+                if request is None:
+                    return
+                stderr = StreamWriter(wfile, 'stderr')
+                try:
+                    options = self.request_options(request)
+                except (ValueError, TypeError, KeyError) as e:
+                    stderr.write(f'invalid request: {e}\n')
+                    send_message(wfile, {'exit': 2})
+                    return
+                with contextlib.redirect_stdout(StreamWriter(wfile, 'stdout')), \
+                        contextlib.redirect_stderr(stderr):
+                    try:
+                        exit_code = self.lint.serve_request(options)
+                    except Exception:
+                        traceback.print_exc()
+                        exit_code = 3
+                send_message(wfile, {'exit': exit_code})
+                wfile.flush()
+            except (OSError, ValueError):
+                # the client went away or did not send a valid request
+                pass
+
+    @staticmethod
+    def request_options(request):
+        """Return the options of the request for Lint.serve_request."""
+        options = dict(request['options'])
+        unknown = set(options) - set(REQUEST_OPTIONS)
+        if unknown:
+            raise ValueError(f'unsupported options: {", ".join(sorted(unknown))}')
+        for name in PATH_OPTIONS:
+            if options.get(name):
+                options[name] = [Path(path) for path in options[name]]
+        return options
+
+
+def run_client(socket_path, options):
+    """
+    Send the options of the command line to the server listening at the
+    socket, print out its output and return its exit code.
+    """
+    request = {}
+    for name in REQUEST_OPTIONS:
+        value = options.get(name)
+        if name in PATH_OPTIONS and value:
+            # the server runs in another directory
+            value = [str(Path(path).absolute()) for path in value]
+        request[name] = value
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            with client.makefile('r', encoding='utf-8') as rfile, \
+                    client.makefile('w', encoding='utf-8') as wfile:
+                send_message(wfile, {'options': request})
+                wfile.flush()
+                while True:
+                    message = receive_message(rfile)
+                    if message is None:
+                        print_warning('(none): E: the rpmlint server closed the connection')
+                        return 3
+                    if 'stdout' in message:
+                        sys.stdout.write(message['stdout'])
+                        sys.stdout.flush()
+                    elif 'stderr' in message:
+                        sys.stderr.write(message['stderr'])
+                    elif 'exit' in message:
+                        return message['exit']
+    except OSError as e:
+        print_warning(f'(none): E: cannot connect to the rpmlint server at {socket_path}: {e.strerror or e}')
+        return 3
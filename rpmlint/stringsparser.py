@@ -1,24 +1,68 @@
-import subprocess
+import contextlib
+import mmap
+import os
+import re
 
-from rpmlint.helpers import ENGLISH_ENVIRONMENT
+# the printable characters of the strings command (7-bit ASCII and tab)
+PRINTABLE_REGEX = re.compile(rb'[\t\x20-\x7e]{4,}')
 
 
 class StringsParser:
     """
-    Class contains all information obtained by strings command.
+    Class scans the printable strings of a file like the strings command
+    (the runs of at least 4 printable ASCII characters).
+
+    The strings are not stored, they are generated by iterating the parser
+    or matched against regular expressions by search(). The whole file is
+    scanned (as the default of strings, ELF files and archives included),
+    directly in the mapped file.
     """
 
     def __init__(self, pkgfile_path):
         self.pkgfile_path = pkgfile_path
-        self.strings = []
         self.parsing_failed_reason = None
-        self.parse()
+        if not os.path.isfile(pkgfile_path):
+            self.parsing_failed_reason = f"strings: '{pkgfile_path}': No such file"
 
-    def parse(self):
-        r = subprocess.run(['strings', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
+    def __iter__(self):
+        if self.parsing_failed_reason:
             return
+        with contextlib.ExitStack() as stack:
+            try:
+                data, size = self._map_file(stack)
+            except OSError as e:
+                self.parsing_failed_reason = f"strings: '{self.pkgfile_path}': {e.strerror}"
+                return
+            for match in PRINTABLE_REGEX.finditer(data, 0, size):
+                yield match.group().decode('ascii')
+
+    def search(self, patterns):
+        """
+        Return the set of the keys of the patterns (a dictionary of compiled
+        regular expressions) found in any of the strings. The scanning stops
+        as soon as all the patterns are found.
+        """
+        remaining = dict(patterns)
+        found = set()
+        if not remaining:
+            return found
+        strings = iter(self)
+        try:
+            for string in strings:
+                for key, regex in list(remaining.items()):
+                    if regex.search(string):
+                        found.add(key)
+                        del remaining[key]
+                if not remaining:
+                    break
+        finally:
+            strings.close()
+        return found
 
-        self.strings = r.stdout.splitlines()
+    def _map_file(self, stack):
+        """Return the mapped file and its size."""
+        fobj = stack.enter_context(open(self.pkgfile_path, 'rb'))
+        size = os.fstat(fobj.fileno()).st_size
+        if not size:
+            return b'', 0
+        return stack.enter_context(mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)), size
@@ -0,0 +1,162 @@
+from collections import namedtuple
+import gzip
+import json
+
+# shared library in the index: the providing package, the NEEDED sonames
+# and the set of the exported dynamic symbols
+IndexedLibrary = namedtuple('IndexedLibrary', ['package', 'needed', 'symbols'])
+# dynamically linked file in the index: the NEEDED sonames, the undefined
+# (non-weak) dynamic symbols and whether it is an executable
+IndexedFile = namedtuple('IndexedFile', ['needed', 'undefined', 'is_exec'])
+
+
+class SymbolIndexError(Exception):
+    pass
+
+
+class SymbolIndex:
+    """
+    Index of the shared libraries and the dynamically linked files of a set
+    of packages: the package providing each SONAME, the dynamic symbols
+    exported by each SONAME and the NEEDED SONAMEs and undefined symbols of
+    each file.
+
+    The index is built while the packages are checked and it can be saved
+    to and loaded from a JSON file (gzip compressed if the name ends with
+    .gz), so the index of a base distribution can be built once and loaded
+    by the later runs instead of checking all its packages again. The index
+    of the checked packages is then built on top of the (unchanged) base
+    index, its libraries replace the ones of the base with the same soname.
+    """
+
+    format_version = 1
+
+    def __init__(self, base=None):
+        self.base = base
+        # soname -> IndexedLibrary
+        self.libraries = {}
+        # package name -> {file name -> IndexedFile}
+        self.files = {}
+        # symbol -> set of sonames exporting it
+        self._symbol_sonames = {}
+
+    def add_library(self, package, soname, needed, symbols):
+        """Add the shared library of the package, it replaces the same soname."""
+        previous = self.libraries.get(soname)
+        if previous is not None:
+            for symbol in previous.symbols:
+                self._symbol_sonames[symbol].discard(soname)
+        symbols = frozenset(symbols)
+        self.libraries[soname] = IndexedLibrary(package, tuple(needed), symbols)
+        for symbol in symbols:
+            self._symbol_sonames.setdefault(symbol, set()).add(soname)
+
+    def add_file(self, package, name, needed, undefined, is_exec):
+        """Add the dynamically linked file of the package."""
+        self.files.setdefault(package, {})[name] = IndexedFile(tuple(needed), tuple(undefined), is_exec)
+
+    def library(self, soname):
+        """Return the IndexedLibrary of the soname or None."""
+        library = self.libraries.get(soname)
+        if library is None and self.base is not None:
+            return self.base.library(soname)
+        return library
+
+    def provider(self, soname):
+        """Return the name of the package providing the soname or None."""
+        library = self.library(soname)
+        return library.package if library is not None else None
+
+    def symbol_providers(self, symbol):
+        """Return the set of the sonames exporting the symbol."""
+        sonames = self._symbol_sonames.get(symbol, set())
+        if self.base is not None:
+            base_sonames = self.base.symbol_providers(symbol)
+            if base_sonames:
+                sonames = sonames | {soname for soname in base_sonames if soname not in self.libraries}
+        return sonames
+
+    def dependency_closure(self, needed):
+        """
+        Return the set of the sonames loaded for the NEEDED sonames (with
+        their dependencies) or None if any of them is not in the index.
+        """
+        closure = set()
+        pending = list(needed)
+        while pending:
+            soname = pending.pop()
+            if soname in closure:
+                continue
+            library = self.library(soname)
+            if library is None:
+                return None
+            closure.add(soname)
+            pending.extend(library.needed)
+        return closure
+
+    def unresolved_symbols(self, indexed_file):
+        """
+        Return the list of the undefined symbols of the file no library of its
+        dependencies exports, or None if the dependencies are not all known.
+        """
+        closure = self.dependency_closure(indexed_file.needed)
+        if closure is None:
+            return None
+        return [symbol for symbol in indexed_file.undefined
+                if self.symbol_providers(symbol).isdisjoint(closure)]
+
+    def to_dict(self):
+        """
+        Return the JSON serializable representation of the index (including
+        the base index).
+        """
+        libraries = dict(self.base.libraries) if self.base is not None else {}
+        libraries.update(self.libraries)
+        files = dict(self.base.files) if self.base is not None else {}
+        files.update(self.files)
+        return {
+            'version': self.format_version,
+            'libraries': {soname: [library.package, list(library.needed), sorted(library.symbols)]
+                          for soname, library in libraries.items()},
+            'files': {package: {name: [list(f.needed), list(f.undefined), f.is_exec]
+                                for name, f in package_files.items()}
+                      for package, package_files in files.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return the index from its representation returned by to_dict()."""
+        if not isinstance(data, dict) or data.get('version') != cls.format_version:
+            raise SymbolIndexError('unsupported format of the symbol index')
+        index = cls()
+        try:
+            for soname, (package, needed, symbols) in data['libraries'].items():
+                index.add_library(package, soname, needed, symbols)
+            for package, files in data['files'].items():
+                for name, (needed, undefined, is_exec) in files.items():
+                    index.add_file(package, name, needed, undefined, is_exec)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise SymbolIndexError(f'invalid symbol index: {e}') from e
+        return index
+
+    def save(self, path):
+        """Save the index to the JSON file."""
+        opener = gzip.open if str(path).endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return the index loaded from the JSON file.
+
+        Raises:
+            SymbolIndexError: If the file cannot be read or it is not an index.
+        """
+        opener = gzip.open if str(path).endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, EOFError, ValueError) as e:
+            raise SymbolIndexError(f'cannot load symbol index {path}: {e}') from e
+        return cls.from_dict(data)
@@ -0,0 +1,30 @@
+import stat
+
+from Testing import get_tested_mock_package
+
+
+AppletviewerPackage = get_tested_mock_package(
+    name='appletviewer',
+    lazyload=True,
+    files={
+        '/usr/bin/appletviewer': {
+            'content-path': 'ldd/appletviewer',
+            'metadata': {'mode': 0o755 | stat.S_IFREG},
+        },
+    },
+    header={'requires': [], 'arch': 'x86_64'},
+)
+
+LibfooDevelPackage = get_tested_mock_package(
+    name='libfoo-devel',
+    lazyload=True,
+    files={
+        '/usr/lib/libfoo.so': {
+            'linkto': 'libfoo.so.1',
+            'metadata': {'mode': 0o777 | stat.S_IFREG},
+        },
+    },
+    header={'requires': []},
+)
+
+LibfooDevelRequiresPackage = LibfooDevelPackage.clone(header={'requires': ['libfoo1']})
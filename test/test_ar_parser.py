@@ -0,0 +1,84 @@
+from rpmlint.arparser import ArParser
+
+from Testing import get_tested_path
+
+
+def header(name, size):
+    return (name.ljust(16) + '0'.ljust(12) + '0'.ljust(6) + '0'.ljust(6) +
+            '644'.ljust(8) + str(size).ljust(10) + '`\n').encode()
+
+
+def member(name, data):
+    return header(name, len(data)) + data + b'\n' * (len(data) % 2)
+
+
+def arparser(tmp_path, content):
+    path = tmp_path / 'lib.a'
+    path.write_bytes(content)
+    return ArParser(str(path))
+
+
+def test_gnu_archive(tmp_path):
+    long_names = b'a_very_long_member_name.o/\nanother_long_member_name.o/\n'
+    content = (b'!<arch>\n' + member('/', b'\0\0\0\0') + member('//', long_names) +
+               member('short.o/', b'\x7fELF\x02') + member('/0', b'abc') +
+               member('/27', b'\x7fELF') + member('__.PKGDEF', b'go'))
+    ar = arparser(tmp_path, content)
+    assert not ar.parsing_failed_reason
+    assert not ar.is_thin
+    assert ar.objects == ['short.o', 'a_very_long_member_name.o', 'another_long_member_name.o', '__.PKGDEF']
+    assert [m.size for m in ar.members] == [5, 3, 4, 2]
+    assert [m.name for m in ar.elf_members] == ['short.o', 'another_long_member_name.o']
+    offset = ar.members[0].offset
+    assert content[offset:offset + 5] == b'\x7fELF\x02'
+
+
+def test_bsd_archive(tmp_path):
+    content = (b'!<arch>\n' + member('#1/20', b'__.SYMDEF SORTED\0\0\0\0abcd') +
+               member('#1/28', b'a_long_bsd_member_name.o\0\0\0\0\x7fELF') +
+               member('lib.rmeta', b'rust'))
+    ar = arparser(tmp_path, content)
+    assert not ar.parsing_failed_reason
+    assert ar.objects == ['a_long_bsd_member_name.o', 'lib.rmeta']
+    assert ar.members[0].size == 4
+    assert ar.members[0].is_elf
+    assert content[ar.members[0].offset:ar.members[0].offset + 4] == b'\x7fELF'
+
+
+def test_thin_archive(tmp_path):
+    long_names = b'sub/a_long_member_name.o/\n'
+    content = (b'!<thin>\n' + member('/', b'\0\0\0\0') + member('//', long_names) +
+               header('/0', 1000) + header('short.o/', 10))
+    ar = arparser(tmp_path, content)
+    assert not ar.parsing_failed_reason
+    assert ar.is_thin
+    assert ar.objects == ['sub/a_long_member_name.o', 'short.o']
+    assert [(m.offset, m.size, m.is_elf) for m in ar.members] == [(None, 1000, False), (None, 10, False)]
+
+
+def test_static_library():
+    ar = ArParser(str(get_tested_path('files/reiserfs/libreiserfscore.a')))
+    assert not ar.parsing_failed_reason
+    assert len(ar.objects) == 17
+    assert len(ar.elf_members) == 17
+    assert all(name.endswith('.o') for name in ar.objects)
+
+
+def test_parsing_failed(tmp_path):
+    bad_header = member('x.o', b'ab')[:58] + b'xx'
+    for content in (b'', b'garbage', b'!<arch>\n' + member('a.o', b'ab') + bad_header):
+        ar = arparser(tmp_path, content)
+        assert str(tmp_path / 'lib.a') in ar.parsing_failed_reason
+        assert ar.objects == []
+    assert arparser(tmp_path, b'garbage').parsing_failed_reason.endswith('file format not recognized')
+    assert arparser(tmp_path, b'!<arch>\n' + bad_header).parsing_failed_reason.endswith('invalid archive member header')
+    assert 'No such file or directory' in ArParser(str(tmp_path / 'missing.a')).parsing_failed_reason
+
+
+def test_malformed_member_size(tmp_path):
+    for content in (b'!<arch>\n' + header('a.o', -60), b'!<arch>\n' + header('a.o', 100) + b'short',
+                    b'!<arch>\n' + member('#1/20', b'abc')):
+        ar = arparser(tmp_path, content)
+        assert str(tmp_path / 'lib.a') in ar.parsing_failed_reason
+        assert ar.objects == []
+    assert arparser(tmp_path, b'!<arch>\n' + header('a.o', -60)).parsing_failed_reason.endswith('invalid archive member size')
@@ -320,6 +320,30 @@ def test_multiple_errors(tmp_path, package, binariescheck):
     assert 'W: binary-or-shlib-calls-gethostbyname' in out
 
 
+@pytest.mark.parametrize('package', ['binary/crypto-policy', 'binary/lto-text'])
+def test_elf_files_analysed_in_threads(tmp_path, package):
+    results = []
+    for threads in (1, 4):
+        output = Filter(CONFIG)
+        test = BinariesCheck(CONFIG, output)
+        test.elf_threads = threads
+        test.check(get_tested_package(package, tmp_path))
+        results.append([result.plain() for result in output.results])
+        # no thread is left running after the package
+        assert test._executor is None
+    # the same messages in the order of the files
+    assert results[0] == results[1]
+    assert results[0]
+
+    # the files not analysed ahead are analysed when they are checked
+    output = Filter(CONFIG)
+    test = BinariesCheck(CONFIG, output)
+    test.elf_threads = 4
+    test._is_elf_checked = lambda pkg, fname, pkgfile: False
+    test.check(get_tested_package(package, tmp_path))
+    assert [result.plain() for result in output.results] == results[0]
+
+
 @pytest.mark.parametrize('package', ['binary/libtest'])
 def test_patchable_function_entry_archive(tmp_path, package, binariescheck):
     output, test = binariescheck
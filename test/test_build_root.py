@@ -2,8 +2,9 @@ from mockdata.mock_build_root import BuildrootPackage
 import pytest
 from rpmlint.checks.BuildRootAndDateCheck import BuildRootAndDateCheck
 from rpmlint.filter import Filter
+from rpmlint.pkg import FakePkg
 
-from Testing import CONFIG
+from Testing import CONFIG, Config, TEST_CONFIG
 
 
 @pytest.fixture(scope='function', autouse=True)
@@ -21,3 +22,49 @@ def test_build_root(package, buildrootcheck):
     test.check(package)
     out = output.print_results(output.results)
     assert 'E: file-contains-buildroot /bin/trace' in out
+
+
+def limits_package(pkg):
+    buildroot = '/home/marxin/rpmbuild/BUILDROOT/foo-1.0-1.x86_64/usr/bin\n'
+    pkg.add_file_with_content('/usr/share/foo/small', buildroot, metadata={'size': len(buildroot)})
+    pkg.add_file_with_content('/usr/share/foo/small.gz', buildroot, metadata={'size': len(buildroot)})
+    pkg.add_file_with_content('/usr/share/foo/data', buildroot,
+                              metadata={'size': len(buildroot), 'magic': 'XZ compressed data'})
+    big = 'x' * 1000 + buildroot
+    pkg.add_file_with_content('/usr/share/foo/big', big, metadata={'size': len(big)})
+
+
+def test_build_root_no_scan_limits(buildrootcheck):
+    output, test = buildrootcheck
+    test.prepare_regex('/home/marxin/rpmbuild/BUILDROOT/%{NAME}-%{VERSION}-%{RELEASE}.x86_64')
+    with FakePkg('limits') as pkg:
+        limits_package(pkg)
+        test.check(pkg)
+    out = output.print_results(output.results)
+    # all the files are read by default
+    for fname in ('small', 'small.gz', 'data', 'big'):
+        assert f'E: file-contains-buildroot /usr/share/foo/{fname}\n' in out
+    assert test.checked_files == 4
+
+
+def test_build_root_scan_limits():
+    config = Config(TEST_CONFIG)
+    config.configuration['FileScanLimits'] = {'BuildRootAndDateCheck': {
+        'SkipMagic': ['compressed data'],
+        'SkipExtensions': ['.gz'],
+        'MaxScannedBytes': 100,
+    }}
+    output = Filter(config)
+    test = BuildRootAndDateCheck(config, output)
+    test.prepare_regex('/home/marxin/rpmbuild/BUILDROOT/%{NAME}-%{VERSION}-%{RELEASE}.x86_64')
+    with FakePkg('limits') as pkg:
+        limits_package(pkg)
+        test.check(pkg)
+    out = output.print_results(output.results)
+    assert 'E: file-contains-buildroot /usr/share/foo/small' in out
+    # skipped by the extension and the magic
+    assert 'small.gz' not in out
+    assert '/usr/share/foo/data' not in out
+    # the buildroot is beyond the scanned bytes
+    assert '/usr/share/foo/big' not in out
+    assert test.checked_files == 2
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+from rpmlint.cache import ResultCache
+from rpmlint.checks.ZipCheck import ZipCheck
+from rpmlint.config import Config
+from rpmlint.filter import Filter
+
+from Testing import get_tested_package, TEST_CONFIG
+
+
+def test_store_and_lookup(tmp_path):
+    cache = ResultCache(tmp_path / 'cache.sqlite', 10)
+    key = cache.key('Check', '0123abcd')
+    assert cache.lookup(key) == (False, None)
+    cache.store(key, ['potential-bashisms'])
+    assert cache.lookup(key) == (True, ['potential-bashisms'])
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # the results persist between the runs
+    cache.close()
+    cache = ResultCache(tmp_path / 'cache.sqlite', 10)
+    assert cache.lookup(key) == (True, ['potential-bashisms'])
+    assert cache.lookup(cache.key('Check', '0123abce')) == (False, None)
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path / 'cache.sqlite', 10)
+    keys = [cache.key('Check', str(i)) for i in range(10)]
+    for key in keys:
+        cache.store(key, True)
+    # use the first result so it is not the least recently used one
+    assert cache.lookup(keys[0]) == (True, True)
+    cache.store(cache.key('Check', 'new'), False)
+
+    assert cache.lookup(keys[0]) == (True, True)
+    assert cache.lookup(keys[1]) == (False, None)
+    assert cache.lookup(cache.key('Check', 'new')) == (True, False)
+
+
+def test_from_config(tmp_path):
+    config = Config(TEST_CONFIG)
+    assert ResultCache.from_config(config) is None
+
+    config.configuration['UseResultCache'] = True
+    config.configuration['ResultCacheDir'] = str(tmp_path)
+    cache = ResultCache.from_config(config)
+    assert cache.path == tmp_path / 'results.sqlite'
+    assert ResultCache.from_config(config) is cache
+
+
+@pytest.mark.parametrize('package', ['binary/bad-crc-uncompressed'])
+def test_cached_check_result(tmp_path, package):
+    config = Config(TEST_CONFIG)
+    config.configuration['UseResultCache'] = True
+    config.configuration['ResultCacheDir'] = str(tmp_path / 'cache')
+    config.info = True
+
+    output = Filter(config)
+    test = ZipCheck(config, output)
+    test.check(get_tested_package(package, tmp_path / 'first'))
+    assert 'bad-crc-in-zip' in output.print_results(output.results)
+
+    # the CRC is not tested again for the very same file content
+    output = Filter(config)
+    test = ZipCheck(config, output)
+    with patch('zipfile.ZipFile.testzip') as testzip:
+        test.check(get_tested_package(package, tmp_path / 'second'))
+    testzip.assert_not_called()
+    assert 'bad-crc-in-zip' in output.print_results(output.results)
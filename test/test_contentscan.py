@@ -0,0 +1,126 @@
+import re
+from unittest.mock import patch
+
+import pytest
+from rpmlint.contentscan import bytes_regex, content_windows, SAMPLE_WINDOWS, scan_file, scan_file_limits, search
+from rpmlint.pkg import FakePkg
+
+REGEXES = [
+    re.compile(r'/(home|tmp)(\W|$)'),
+    re.compile(r'(?:-rpath|Wl,-R)\b'),
+    re.compile(r'^-----BEGIN CERTIFICATE-----$'),
+    re.compile(r'(?i)žluťoučký'),
+    re.compile(r'\w+ička'),
+    re.compile(r'key\s+value'),
+]
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'libdir=/usr/lib64\ndependency_libs= -L/tmp/build\n',
+    b'Libs: -Wl,-rpath,/usr/lib\n',
+    b'-----BEGIN CERTIFICATE-----\n',
+    'first\nŽluťoučký kůň\nslepička /home/user\n'.encode(),
+    b'\x7fELF\x02\x01\x01\x00\xff/tmp/',
+    # \s of str regexes matches the ASCII separators too
+    b'key\x1cvalue\n',
+])
+def test_scan_file(tmp_path, content):
+    path = tmp_path / 'file'
+    path.write_bytes(content)
+    try:
+        text = content.decode()
+    except UnicodeDecodeError:
+        text = ''
+    expected = {}
+    for regex in REGEXES:
+        match = regex.search(text)
+        expected[regex] = text.count('\n', 0, match.start()) + 1 if match else None
+    assert scan_file(path, REGEXES) == expected
+
+
+def test_scan_file_missing(tmp_path):
+    assert scan_file(tmp_path / 'missing', REGEXES[:2]) == dict.fromkeys(REGEXES[:2])
+
+
+def test_scan_contents():
+    with FakePkg('scan') as pkg:
+        pkg.add_file_with_content('/usr/lib64/libfoo.la', 'libdir=/usr/lib64\nrelink=/tmp/foo\n')
+        pkg.add_file_with_content('/usr/share/foo', 'foo\n')
+        regex = REGEXES[0]
+        pkg.scan_contents({'/usr/lib64/libfoo.la': [regex], '/usr/share/foo': [regex],
+                           '/missing': [regex]})
+        # the results of the scan are used without reading the files again
+        with patch('rpmlint.pkg.scan_file') as scan:
+            assert pkg.grep(regex, '/usr/lib64/libfoo.la') == 2
+            assert pkg.grep(regex, '/usr/share/foo') is None
+        scan.assert_not_called()
+        assert pkg.grep(REGEXES[1], '/usr/lib64/libfoo.la') is None
+        assert pkg.timers['ContentScan'] >= 0
+
+
+def test_content_windows():
+    assert content_windows(100) == [(0, 100)]
+    assert content_windows(100, 100) == [(0, 100)]
+    assert content_windows(1000, 100) == [(0, 100)]
+    windows = content_windows(10000, 160, sample=True)
+    assert len(windows) == SAMPLE_WINDOWS
+    assert windows[0] == (0, 10)
+    assert windows[-1] == (9990, 10000)
+    assert sum(end - start for start, end in windows) == 160
+
+
+def test_scan_file_binary(tmp_path):
+    path = tmp_path / 'binary'
+    path.write_bytes(b'\x7fELF\x02\x01\xff\xfe\n/home/abuild/rpmbuild/BUILDROOT/foo\x00')
+    buildroot = re.compile(r'/BUILDROOT/')
+    # the str regexes do not match content that is not UTF-8, bytes ones do
+    assert scan_file(path, [buildroot, bytes_regex(buildroot)]) == {buildroot: None, bytes_regex(buildroot): 2}
+
+
+def test_scan_file_limited(tmp_path):
+    path = tmp_path / 'big'
+    path.write_bytes(b'a' * 2000 + b'\nneedle\n')
+    needle = re.compile(rb'needle')
+    assert scan_file(path, [needle]) == {needle: 2}
+    assert scan_file(path, [needle], max_size=100) == {needle: None}
+    # the last window of the samples ends with the file
+    assert scan_file(path, [needle], max_size=1000, sample=True) == {needle: 2}
+    # str regexes are searched as bytes in the limited files
+    assert scan_file(path, [re.compile('needle')], max_size=1000, sample=True) == {re.compile('needle'): 2}
+
+
+def test_scan_file_limits(tmp_path):
+    path = tmp_path / 'big'
+    path.write_bytes(b'a' * 2000 + b'\nneedle\n')
+    needle = re.compile(rb'needle')
+    text = re.compile('needle')
+    # each regex is searched by its own limit in the same read
+    results, scanned = scan_file_limits(path, {needle: 100, text: None})
+    assert results == {needle: None, text: 2}
+    assert scanned == {needle: 100, text: 2008}
+    results, scanned = scan_file_limits(path, {needle: 160}, sample=True)
+    assert results == {needle: 2}
+    assert scanned == {needle: 160}
+
+
+def test_scan_contents_scanned_bytes():
+    with FakePkg('scan') as pkg:
+        pkg.add_file_with_content('/usr/share/foo', 'a' * 1000)
+        regex = REGEXES[0]
+        scanned = pkg.scan_contents({'/usr/share/foo': {regex: 100, REGEXES[1]: None}, '/missing': [regex]})
+        assert scanned == {'/usr/share/foo': {regex: 100, REGEXES[1]: 1000}}
+
+
+def test_mmap_content():
+    with FakePkg('mmap') as pkg:
+        pkg.add_file_with_content('/usr/share/foo', 'ahoj\nsvěte\n')
+        pkg.add_file_with_content('/usr/share/empty', '')
+        with pkg.mmap_content('/usr/share/foo') as data:
+            assert search(re.compile('světe'.encode()), data).start() == 5
+            assert data[:4] == b'ahoj'
+        with pkg.mmap_content('/usr/share/empty') as data:
+            assert data == b''
+        assert pkg.read_with_mmap('/usr/share/foo') == 'ahoj\nsvěte\n'
+        assert pkg.read_with_mmap('/usr/share/missing') == ''
+        assert pkg.grep(re.compile(rb'\xc4\x9b'), '/usr/share/foo') == 2
@@ -0,0 +1,48 @@
+import os
+
+from rpmlint.demangler import demangle, Demangler
+
+
+def test_demangle():
+    assert demangle(['_ZN3foo3barEv', 'main', '_Z1fv', '_ZN3foo3barEv']) == \
+        ['foo::bar()', 'main', 'f()', 'foo::bar()']
+    assert demangle([]) == []
+
+
+def test_demangle_many_names():
+    # more names than would fit on the command line of c++filt
+    names = [f'_ZN9n{i:08}8functionEi' for i in range(100000)]
+    demangler = Demangler()
+    demangled = demangler.demangle(names)
+    demangler.close()
+    assert len(demangled) == 100000
+    assert demangled[12345] == 'n00012345::function(int)'
+
+
+def test_demangle_cache():
+    demangler = Demangler(cache_size=2)
+    assert demangler.demangle(['_Z1av', '_Z1bv']) == ['a()', 'b()']
+    process = demangler._process
+    assert demangler.demangle(['_Z1av']) == ['a()']
+    assert demangler.demangle(['_Z1cv']) == ['c()']
+    # the least recently used name is dropped
+    assert list(demangler._cache) == ['_Z1av', '_Z1cv']
+    assert demangler._process is process
+    demangler.close()
+    assert demangler._process is None
+    assert demangler.demangle(['_Z1bv', 'a\nb']) == ['b()', 'a\nb']
+    demangler.close()
+
+
+def test_demangle_after_fork():
+    demangler = Demangler()
+    assert demangler.demangle(['_Z1av']) == ['a()']
+    pid = os.fork()
+    if pid == 0:
+        demangler._after_fork()
+        status = 0 if demangler.demangle(['_Z1av', '_Z1bv']) == ['a()', 'b()'] else 1
+        os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert demangler.demangle(['_Z1cv']) == ['c()']
+    demangler.close()
@@ -1,4 +1,4 @@
-from rpmlint.rpmdiff import Rpmdiff
+from rpmlint.rpmdiff import diff_directories, Rpmdiff
 
 from Testing import get_tested_path
 
@@ -46,3 +46,47 @@ def test_exclude():
         textdiff = diff.textdiff()
         assert '/usr/share/mc/skins/yadt256.ini' in textdiff
         assert '/usr/share/mc/syntax/cuda.syntax' not in textdiff
+
+
+def test_diff_directories(tmp_path):
+    old_dir = tmp_path / 'old'
+    new_dir = tmp_path / 'new'
+    old_dir.mkdir()
+    new_dir.mkdir()
+    for directory, packages in ((old_dir, ('mc-4.8.15-10.3.1.x86_64.rpm', 'bad-crc-uncompressed-1.0-9.1.x86_64.rpm')),
+                                (new_dir, ('mc-4.8.21-2.1.x86_64.rpm', 'ruby2.6-rubygem-fast_gettext-2.0.1-1.1.x86_64.rpm'))):
+        for package in packages:
+            (directory / package).symlink_to(get_tested_path('binary', package))
+
+    results = list(diff_directories(old_dir, new_dir, ignore=list('T5S')))
+    assert len(results) == 3
+
+    old, new, diff = results[0]
+    assert old.name == 'bad-crc-uncompressed-1.0-9.1.x86_64.rpm'
+    assert new is None and diff is None
+
+    old, new, diff = results[1]
+    assert (old.name, new.name) == ('mc-4.8.15-10.3.1.x86_64.rpm', 'mc-4.8.21-2.1.x86_64.rpm')
+    assert 'added       /usr/share/mc/syntax/yaml.syntax' in diff.textdiff()
+
+    old, new, diff = results[2]
+    assert old is None and diff is None
+    assert new.name == 'ruby2.6-rubygem-fast_gettext-2.0.1-1.1.x86_64.rpm'
+
+
+def test_diff_directories_unreadable(tmp_path, capsys):
+    old_dir = tmp_path / 'old'
+    new_dir = tmp_path / 'new'
+    old_dir.mkdir()
+    new_dir.mkdir()
+    (old_dir / 'mc-4.8.15-10.3.1.x86_64.rpm').symlink_to(get_tested_path('binary/mc-4.8.15-10.3.1.x86_64.rpm'))
+    (new_dir / 'mc-4.8.21-2.1.x86_64.rpm').symlink_to(get_tested_path('binary/mc-4.8.21-2.1.x86_64.rpm'))
+    (new_dir / 'corrupt-1.0-1.x86_64.rpm').write_bytes(b'not an rpm')
+    (new_dir / 'dangling-1.0-1.x86_64.rpm').symlink_to(tmp_path / 'missing.rpm')
+
+    results = list(diff_directories(old_dir, new_dir, ignore=list('T5S')))
+    assert [(old.name, new.name) for old, new, _diff in results] == [
+        ('mc-4.8.15-10.3.1.x86_64.rpm', 'mc-4.8.21-2.1.x86_64.rpm')]
+    _, err = capsys.readouterr()
+    assert 'corrupt-1.0-1.x86_64.rpm, it cannot be read' in err
+    assert 'dangling-1.0-1.x86_64.rpm, it cannot be read' in err
@@ -0,0 +1,68 @@
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from rpmlint.cache import ResultCache
+from rpmlint.filemagic import has_magic, MagicCache
+from rpmlint.pkg import FakePkg
+from rpmlint.pkgfile import PkgFile
+
+pytestmark = pytest.mark.skipif(not has_magic, reason='requires libmagic')
+
+
+def _pkgfile(tmp_path, name, content, with_digest=True):
+    path = tmp_path / name
+    path.write_bytes(content)
+    pkgfile = PkgFile(f'/usr/share/{name}')
+    pkgfile.path = str(path)
+    pkgfile.size = len(content)
+    if with_digest:
+        pkgfile.md5 = hashlib.md5(content).hexdigest()
+    return pkgfile
+
+
+def test_classify(tmp_path):
+    magic_cache = MagicCache(threads=4)
+    stats = {'hits': 0, 'misses': 0}
+    pkgfiles = [
+        _pkgfile(tmp_path, 'script', b'#!/bin/sh\necho hello\n'),
+        _pkgfile(tmp_path, 'script-copy', b'#!/bin/sh\necho hello\n'),
+        _pkgfile(tmp_path, 'text', b'Hello world\n'),
+        _pkgfile(tmp_path, 'nodigest', b'Hello world\n', with_digest=False),
+    ]
+    magics = magic_cache.classify(pkgfiles, stats)
+    assert 'shell script' in magics[0]
+    assert magics[1] == magics[0]
+    assert 'text' in magics[2]
+    assert magics[3] == magics[2]
+    assert stats == {'hits': 1, 'misses': 3}
+
+    # the same content is not classified again
+    pkgfile = _pkgfile(tmp_path, 'another-text', b'Hello world\n')
+    with patch.object(MagicCache, '_detect') as detect:
+        assert magic_cache.classify([pkgfile], stats) == [magics[2]]
+    detect.assert_not_called()
+    assert stats == {'hits': 2, 'misses': 3}
+
+
+def test_persistent_magic_cache(tmp_path):
+    result_cache = ResultCache(tmp_path / 'cache.sqlite', 10)
+    pkgfile = _pkgfile(tmp_path, 'script', b'#!/bin/sh\necho hello\n')
+    stats = {'hits': 0, 'misses': 0}
+    magic = MagicCache(result_cache).classify([pkgfile], stats)
+    assert stats['misses'] == 1
+
+    # a new run finds the result in the result cache
+    with patch.object(MagicCache, '_detect') as detect:
+        assert MagicCache(result_cache).classify([pkgfile], stats) == magic
+    detect.assert_not_called()
+    assert stats == {'hits': 1, 'misses': 1}
+
+
+def test_fake_pkg_magic():
+    with FakePkg('magic') as pkg:
+        pkg.add_file_with_content('/usr/bin/script', '#!/bin/sh\necho hello\n')
+        pkg.add_file_with_content('/usr/bin/script2', '#!/bin/sh\necho hello\n')
+        assert 'shell script' in pkg.files['/usr/bin/script'].magic
+        assert pkg.files['/usr/bin/script2'].magic == pkg.files['/usr/bin/script'].magic
+        assert pkg.magic_stats['hits'] >= 1
@@ -0,0 +1,116 @@
+from array import array
+import stat
+from unittest.mock import Mock
+
+from rpmlint.filetable import FileTable
+from rpmlint.pkgfile import PkgFile
+
+
+def _table(extract=None, magic_loader=None):
+    names = ['/usr/bin/foo', '/usr/share/doc/foo/README', '/etc/foo.conf']
+    columns = {
+        'flags': [0, 0, 0],
+        'mode': [stat.S_IFREG | 0o755, stat.S_IFREG | 0o644, stat.S_IFREG | 0o644],
+        'user': [b'root', b'root', b'foo'],
+        'magic': [b'', b'ASCII text', b''],
+        'size': [10, 20, 30],
+        'rdev': None,
+    }
+    decoders = {
+        'user': Mock(side_effect=lambda x: x.decode()),
+        'size': Mock(side_effect=lambda x: x),
+        'magic': lambda x: x.decode(),
+    }
+    return FileTable(names, columns, decoders, '/tmp/foo', extract=extract,
+                     magic_loader=magic_loader)
+
+
+def test_mapping():
+    files = _table()
+    assert len(files) == 3
+    assert list(files) == ['/usr/bin/foo', '/usr/share/doc/foo/README', '/etc/foo.conf']
+    assert '/etc/foo.conf' in files
+    assert '/etc/bar.conf' not in files
+    assert files.get('/etc/bar.conf') is None
+    assert isinstance(files['/etc/foo.conf'], PkgFile)
+    assert files['/etc/foo.conf'] is files['/etc/foo.conf']
+    assert [f.name for f in files.values()] == list(files)
+    assert dict(files.items())['/usr/bin/foo'].size == 10
+
+
+def test_lazy_decoding():
+    files = _table()
+    decode_size = files._decoders['size']
+    pkgfile = files['/etc/foo.conf']
+    decode_size.assert_not_called()
+    assert pkgfile.size == 30
+    assert pkgfile.size == 30
+    decode_size.assert_called_once_with(30)
+    assert pkgfile.user == 'foo'
+    assert pkgfile.mode == stat.S_IFREG | 0o644
+    assert pkgfile.rdev is None
+    assert pkgfile.path == '/tmp/foo/etc/foo.conf'
+    assert pkgfile.extract is None
+
+    pkgfile.user = 'bar'
+    assert pkgfile.user == 'bar'
+    pkgfile.path = '/tmp/bar'
+    assert pkgfile.path == '/tmp/bar'
+
+
+def test_compact_columns():
+    files = _table()
+    assert isinstance(files._columns['mode'], array)
+    assert isinstance(files._columns['size'], array)
+    # the distinct user names are decoded once
+    assert files._columns['user'].strings == ['root', 'foo']
+    assert [files[name].user for name in files] == ['root', 'root', 'foo']
+    assert 'user' not in files._decoders
+
+    # values not fitting the array are kept in a list
+    files = FileTable(['/a', '/b'], {'flags': [0, 0], 'mode': [-1, 2 ** 20]}, {}, '/')
+    assert files._columns['mode'] == [-1, 2 ** 20]
+    assert files['/b'].mode == 2 ** 20
+
+
+def test_names_with_flags():
+    files = FileTable(['/a', '/b', '/c', '/d'], {'flags': [0, 2, 1 | 4, 2]}, {}, '/')
+    config = files.names_with_flags(1)
+    assert '/c' in config
+    assert '/a' not in config
+    assert '/e' not in config
+    assert list(config) == ['/c']
+    assert list(files.names_with_flags(2 | 4)) == ['/b', '/c', '/d']
+    assert len(files.names_with_flags(2 | 4)) == 3
+    assert not files.names_with_flags(8)
+    assert files.names_with_flags(2) == {'/b', '/d'}
+
+
+def test_extract():
+    extract = Mock()
+    files = _table(extract=extract)
+    assert files['/usr/bin/foo'].extract is extract
+
+
+def test_load_magic():
+    magic_loader = Mock(side_effect=lambda entries: [e.magic or 'magic of ' + e.name for e in entries])
+    files = _table(magic_loader=magic_loader)
+    files['/usr/bin/foo'].magic = 'set by a check'
+    assert files['/etc/foo.conf'].magic == 'magic of /etc/foo.conf'
+    # the loader gets the magic from the header
+    assert files['/usr/share/doc/foo/README'].magic == 'ASCII text'
+    assert files['/usr/bin/foo'].magic == 'set by a check'
+    # all the files are classified at once
+    magic_loader.assert_called_once()
+    assert [e.name for e in magic_loader.call_args[0][0]] == ['/usr/share/doc/foo/README', '/etc/foo.conf']
+
+
+def test_known_magic():
+    magic_loader = Mock(side_effect=lambda entries: ['magic of ' + e.name for e in entries])
+    files = _table(magic_loader=magic_loader)
+    assert files['/usr/share/doc/foo/README'].known_magic == 'ASCII text'
+    assert files['/etc/foo.conf'].known_magic == ''
+    # the files are not classified for the known magic
+    magic_loader.assert_not_called()
+    assert files['/etc/foo.conf'].magic == 'magic of /etc/foo.conf'
+    assert files['/etc/foo.conf'].known_magic == 'magic of /etc/foo.conf'
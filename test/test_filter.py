@@ -1,7 +1,11 @@
 from pathlib import Path
+import re
 
+import pytest
+import rpmlint.filter
+from rpmlint.color import Color
 from rpmlint.config import Config
-from rpmlint.filter import Filter
+from rpmlint.filter import Filter, FilterMatcher, RecordedPkg
 
 from Testing import get_tested_package, get_tested_path
 
@@ -154,6 +158,29 @@ ngircd.x86_64: E: suse-dbus-unauthorized-service\n"""
     assert result.print_results(result.results) == expected_output
 
 
+@pytest.mark.parametrize('colors', [False, True])
+def test_output_order(colors, monkeypatch):
+    """
+    Test that the messages are sorted as their printed out lines by the issue
+    name and the (colored on a terminal) level
+    """
+    if colors:
+        for name, value in (('Bold', '\x1b[1m'), ('Red', '\x1b[31m'), ('Yellow', '\x1b[33m'), ('Reset', '\x1b[0m')):
+            monkeypatch.setattr(Color, name, value)
+        monkeypatch.setattr(rpmlint.filter, 'LEVEL_COLORS', {'E': Color.Red, 'W': Color.Yellow})
+    result = Filter(Config(TEST_CONFIG_FILTERS))
+    pkg = RecordedPkg('ngircd', 'x86_64', None)
+    for level in ('I', 'E', 'W'):
+        result.add_info(level, pkg, 'sort-issue', level)
+    result.add_info('E', pkg, 'sort-issue-more', 'detail')
+    result.add_info('I', pkg, 'other-sort-issue', '')
+    lines = result.print_results(result.results).splitlines()
+    # the lines were sorted by the issue and the colored level
+    assert lines == sorted(lines, key=lambda line: (line.split()[2], line.split()[1]), reverse=True)
+    levels = [line.split()[-1] for line in lines if line.split()[2] == f'sort-issue{Color.Reset}']
+    assert levels == (['W', 'E', 'I'] if colors else ['W', 'I', 'E'])
+
+
 def test_filtered_output(tmp_path):
     cfg = Config(TEST_CONFIG_FILTERS)
     result = Filter(cfg)
@@ -175,3 +202,89 @@ def test_blocked_filters(tmp_path):
     assert key in cfg.configuration['Filters']
     result.add_info('E', pkg, key, '')
     assert len(result.results) == 1
+
+
+def test_filter_matcher():
+    filters = ['.*invalid-buildhost.*', 'E: no-regex', '(?i)NO-DOCUMENTATION', 'no-(doc|documentation)',
+               '(ng)\\1', 'ngircd.*: E: bad-error', '.*bad-error', '(dangling-symlink|invalid-url) /usr']
+    matcher = FilterMatcher([re.compile(f) for f in filters])
+    # the filters with a literal are indexed, the rest is combined
+    assert matcher.combined == [3]
+    assert matcher.unindexed == [4]
+    indexed = {i for filters in matcher.index.values() for i in filters}
+    assert indexed == {0, 1, 5, 6, 7}
+    assert matcher.icase_indexed == [2]
+
+    def matched(text):
+        regex = matcher.search(text)
+        return regex.pattern if regex else None
+
+    assert matched('ngircd.x86_64: W: invalid-buildhost foo') == '.*invalid-buildhost.*'
+    assert matched('ngircd.x86_64: W: no-regex') is None
+    assert matched('ngircd.x86_64: E: no-regex') == 'E: no-regex'
+    assert matched('ngircd.x86_64: W: no-documentation') == '(?i)NO-DOCUMENTATION'
+    assert matched('ngircd.x86_64: W: No-Documentation ä') == '(?i)NO-DOCUMENTATION'
+    assert matched('ngircd.x86_64: W: no-doc') == 'no-(doc|documentation)'
+    assert matched('ngircdngircd.x86_64: W: no-doc') == 'no-(doc|documentation)'
+    assert matched('ngng.x86_64: W: foo') == '(ng)\\1'
+    # the first matching filter is reported
+    assert matched('ngircd.x86_64: E: bad-error') == 'ngircd.*: E: bad-error'
+    assert matched('foo.x86_64: E: bad-error') == '.*bad-error'
+    assert matched('foo.x86_64: W: invalid-url /usr/bin') == '(dangling-symlink|invalid-url) /usr'
+    assert matched('foo.x86_64: W: dangling-symlink /usr/bin') == '(dangling-symlink|invalid-url) /usr'
+    assert matched('foo.x86_64: W: dangling-symlink /etc') is None
+
+
+def test_used_filters():
+    cfg = Config(TEST_CONFIG_FILTERS)
+    result = Filter(cfg)
+    pkg = RecordedPkg('ngircd', 'x86_64', None)
+    result.add_info('W', pkg, 'invalid-buildhost', 'foo')
+    result.add_info('E', pkg, 'bad-error', '')
+    result.add_info('E', pkg, 'no-buildroot-tag-found', '')
+    result.add_info('E', pkg, 'other-error', '')
+    assert len(result.results) == 1
+    assert result.filtered_out == 3
+    assert result.used_filters == {'.*invalid-buildhost.*', 'ngircd.*: E: bad-error', '.*no-buildroot-tag.*'}
+
+
+def test_flush_results():
+    cfg = Config(TEST_CONFIG_FILTERS)
+    result = Filter(cfg)
+    result.info = True
+    result.error_details.update({'suse-other-error': 'Description of the error.'})
+    pkg = RecordedPkg('ngircd', 'x86_64', None)
+    pkg2 = RecordedPkg('tempfiled', 'x86_64', None)
+    result.add_info('I', pkg, 'suse-other-error', '/usr/bin/1')
+    result.add_info('E', pkg, 'suse-dbus-unauthorized-service', '')
+    assert result.flush_results() == """ngircd.x86_64: I: suse-other-error /usr/bin/1
+Description of the error.
+
+ngircd.x86_64: E: suse-dbus-unauthorized-service
+"""
+    assert not result.results
+    # the description is printed out only once
+    result.add_info('E', pkg2, 'suse-other-error', '/usr/bin/3')
+    assert result.flush_results() == 'tempfiled.x86_64: E: suse-other-error /usr/bin/3\n'
+    assert result.flush_results() == ''
+    assert result.printed_messages == {'I': 1, 'W': 0, 'E': 2}
+
+
+def test_reset():
+    cfg = Config(TEST_CONFIG_FILTERS)
+    result = Filter(cfg)
+    result.error_details.update({'suse-other-error': 'Description of the error.'})
+    pkg = RecordedPkg('ngircd', 'x86_64', None)
+    result.add_info('W', pkg, 'invalid-buildhost', 'foo')
+    result.add_info('E', pkg, 'other-error', '')
+    assert result.results
+    cfg.configuration['Filters'].append('.*other-error.*')
+    result.reset(cfg)
+    assert not result.results
+    assert result.filtered_out == 0
+    assert result.score == 0
+    assert result.used_filters == set()
+    # the new configuration is used, the descriptions are kept
+    result.add_info('E', pkg, 'other-error', '')
+    assert not result.results
+    assert result.error_details['suse-other-error'] == 'Description of the error.'
@@ -1,10 +1,12 @@
 from pathlib import Path
+import shutil
 
 import pytest
 from rpmlint.checks.BinariesCheck import BinariesCheck
+from rpmlint.filemagic import get_magic
 from rpmlint.filter import Filter
-from rpmlint.lddparser import LddParser
-from rpmlint.pkg import FakePkg, get_magic
+from rpmlint.lddparser import LddParser, load_shared_object
+from rpmlint.pkg import FakePkg
 
 from Testing import CONFIG, get_tested_path, IS_X86_64
 
@@ -28,8 +30,9 @@ def lddparser(path, system_path=None):
 
 
 def run_elf_checks(test, pkg, pkgfile):
-    test._detect_attributes(get_magic(pkgfile.path))
-    test.run_elf_checks(pkg, pkgfile)
+    elf = test.analyse_elf(pkg, pkgfile, get_magic(pkgfile.path))
+    test.run_elf_checks(pkg, pkgfile, elf)
+    return elf
 
 
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
@@ -57,8 +60,45 @@ def test_ldd_parser_failure():
 def test_dependencies():
     ldd = lddparser('libtirpc.so.3.0.0')
     assert not ldd.parsing_failed_reason
-    assert len(ldd.dependencies) == 5
-    assert any(d for d in ldd.dependencies if d.startswith('linux-vdso.so.1'))
+    assert len(ldd.dependencies) == 4
+    assert ldd.dependencies[0] == 'liXXXsapi_krb5.so.2 => not found'
+    assert ldd.dependencies[1].startswith('libpthread.so.0 => /')
+    assert ldd.dependencies[2].startswith('libc.so.6 => /')
+    assert ldd.dependencies[3] == '/lib64/ld-linux-x86-64.so.2'
+
+
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+def test_system_lib_paths(tmp_path):
+    # the libraries missing in ld.so.cache are looked up in SystemLibPaths
+    (tmp_path / 'libFOO.so').write_bytes(Path(get_full_path('libtirpc.so.3.0.0')).read_bytes())
+    ldd = LddParser(get_full_path('appletviewer'), 'appletviewer', True, (str(tmp_path),))
+    assert not ldd.parsing_failed_reason
+    assert ldd.dependencies[0] == f'libFOO.so => {tmp_path}/libFOO.so'
+    assert 'liXXXsapi_krb5.so.2 => not found' in ldd.dependencies
+    assert 'JLI_Launch' in ldd.undefined_symbols
+
+
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+def test_shared_objects_cached():
+    path = get_full_path('libtirpc.so.3.0.0')
+    shared_object = load_shared_object(path)
+    assert shared_object.soname == 'libtirpc.so.3'
+    assert shared_object.needed == ['liXXXsapi_krb5.so.2', 'libpthread.so.0', 'libc.so.6']
+    assert load_shared_object(path) is shared_object
+    assert load_shared_object(get_full_path('not-existing-file')) is None
+
+
+def test_checked_file_not_cached(tmp_path):
+    path = tmp_path / 'libtirpc.so.3.0.0'
+    shutil.copy(get_full_path('libtirpc.so.3.0.0'), path)
+    shared_object = load_shared_object(str(path), cache=False)
+    assert shared_object.soname == 'libtirpc.so.3'
+    assert load_shared_object(str(path), cache=False) is not shared_object
+
+
+def test_not_dynamic_executable():
+    ldd = LddParser(str(get_tested_path('files/reiserfs/libreiserfscore.a')), 'libreiserfscore.a', True)
+    assert ldd.parsing_failed_reason == '\tnot a dynamic executable'
 
 
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
@@ -66,9 +106,9 @@ def test_unused_dependency_in_package(binariescheck):
     output, test = binariescheck
     with FakePkg('fake') as pkg:
         pkgfile = pkg.add_file(get_full_path('libtirpc.so.3.0.0'), '/lib64/x.so')
-        run_elf_checks(test, pkg, pkgfile)
-        assert not test.readelf_parser.parsing_failed_reason()
-        assert not test.ldd_parser.parsing_failed_reason
+        elf = run_elf_checks(test, pkg, pkgfile)
+        assert not elf.readelf_parser.parsing_failed_reason()
+        assert not elf.ldd_parser.parsing_failed_reason
         out = output.print_results(output.results)
         assert 'E: unused-direct-shlib-dependency ' in out
 
@@ -78,9 +118,9 @@ def test_unused_dependency_in_package_for_executable(binariescheck):
     output, test = binariescheck
     with FakePkg('fake') as pkg:
         pkgfile = pkg.add_file(get_full_path('appletviewer'), '/usr/bin/appletviewer')
-        run_elf_checks(test, pkg, pkgfile)
-        assert not test.readelf_parser.parsing_failed_reason()
-        assert not test.ldd_parser.parsing_failed_reason
+        elf = run_elf_checks(test, pkg, pkgfile)
+        assert not elf.readelf_parser.parsing_failed_reason()
+        assert not elf.ldd_parser.parsing_failed_reason
         out = output.print_results(output.results)
         assert 'W: unused-direct-shlib-dependency ' in out
 
@@ -90,9 +130,9 @@ def test_opt_dependency(binariescheck):
     output, test = binariescheck
     with FakePkg('fake') as pkg:
         pkgfile = pkg.add_file(get_full_path('opt-dependency'), '/bin/opt-dependency')
-        run_elf_checks(test, pkg, pkgfile)
-        assert not test.readelf_parser.parsing_failed_reason()
-        assert not test.ldd_parser.parsing_failed_reason
+        elf = run_elf_checks(test, pkg, pkgfile)
+        assert not elf.readelf_parser.parsing_failed_reason()
+        assert not elf.ldd_parser.parsing_failed_reason
         out = output.print_results(output.results)
         assert 'E: linked-against-opt-library /bin/opt-dependency /opt/libfoo.so' in out
 
@@ -102,8 +142,8 @@ def test_usr_dependency(binariescheck):
     output, test = binariescheck
     with FakePkg('fake') as pkg:
         pkgfile = pkg.add_file(get_full_path('usr-dependency'), '/bin/usr-dependency')
-        run_elf_checks(test, pkg, pkgfile)
-        assert not test.readelf_parser.parsing_failed_reason()
-        assert not test.ldd_parser.parsing_failed_reason
+        elf = run_elf_checks(test, pkg, pkgfile)
+        assert not elf.readelf_parser.parsing_failed_reason()
+        assert not elf.ldd_parser.parsing_failed_reason
         out = output.print_results(output.results)
         assert 'W: linked-against-usr-library /bin/usr-dependency /usr/libfoo.so' in out
@@ -1,9 +1,13 @@
+import json
+
 from mockdata.mock_files import Shlib2DevelPackage
+from mockdata.mock_lib_dependency import AppletviewerPackage, LibfooDevelPackage, LibfooDevelRequiresPackage
 import pytest
 from rpmlint.checks.LibraryDependencyCheck import LibraryDependencyCheck
 from rpmlint.filter import Filter
+from rpmlint.symbolindex import SymbolIndex
 
-from Testing import CONFIG
+from Testing import CONFIG, Config, TEST_CONFIG
 
 
 @pytest.fixture(scope='function', autouse=True)
@@ -14,6 +18,15 @@ def libdependencycheck():
     return output, test
 
 
+@pytest.fixture
+def indexingcheck():
+    config = Config(TEST_CONFIG)
+    config.info = True
+    config.configuration['CheckUndefinedSymbols'] = True
+    output = Filter(config)
+    return output, LibraryDependencyCheck(config, output)
+
+
 @pytest.mark.parametrize('package', [Shlib2DevelPackage])
 def test_shlib2_devel(package, libdependencycheck):
     output, test = libdependencycheck
@@ -22,3 +35,113 @@ def test_shlib2_devel(package, libdependencycheck):
     out = output.print_results(output.results)
     print(out)
     assert 'E: no-library-dependency-for /usr/lib/libfoo.so.1' in out
+
+
+def test_no_index_by_default(libdependencycheck):
+    output, test = libdependencycheck
+    # the files are not read at all
+    assert test.wanted_files(AppletviewerPackage) == ()
+    test.check(Shlib2DevelPackage)
+    test.check(AppletviewerPackage)
+    assert test.symbol_index.files == {}
+    test.after_checks()
+    assert 'undefined-symbol-not-provided' not in output.print_results(output.results)
+
+
+def libdependencycheck_with_index(tmp_path, base_index, check_undefined_symbols=True):
+    config = Config(TEST_CONFIG)
+    config.info = True
+    config.configuration['CheckUndefinedSymbols'] = check_undefined_symbols
+    base_index.save(tmp_path / 'base.json.gz')
+    config.configuration['SymbolIndex'] = str(tmp_path / 'base.json.gz')
+    config.configuration['SaveSymbolIndex'] = str(tmp_path / 'saved.json')
+    output = Filter(config)
+    return output, LibraryDependencyCheck(config, output)
+
+
+def appletviewer_undefined_symbols(libdependencycheck):
+    _output, test = libdependencycheck
+    test.check(AppletviewerPackage)
+    indexed_file = test.symbol_index.files['appletviewer']['/usr/bin/appletviewer']
+    assert indexed_file.needed == ('libFOO.so', 'libc.so.6')
+    assert indexed_file.is_exec
+    return indexed_file.undefined
+
+
+def test_symbol_index(indexingcheck):
+    output, test = indexingcheck
+    test.check(Shlib2DevelPackage)
+    assert test.symbol_index.provider('libfoo.so.1') == 'shlib2-devel'
+    assert 'JLI_Launch' in appletviewer_undefined_symbols(indexingcheck)
+    test.after_checks()
+    # libFOO.so and libc.so.6 are not in the index
+    assert 'undefined-symbol-not-provided' not in output.print_results(output.results)
+
+
+def test_undefined_symbol_not_provided(tmp_path, indexingcheck):
+    undefined = appletviewer_undefined_symbols(indexingcheck)
+    base_index = SymbolIndex()
+    base_index.add_library('libFOO1', 'libFOO.so', ['libc.so.6'], ['JLI_Other'])
+    base_index.add_library('glibc', 'libc.so.6', [], [s for s in undefined if s != 'JLI_Launch'])
+    output, test = libdependencycheck_with_index(tmp_path, base_index)
+    test.check(AppletviewerPackage)
+    test.after_checks()
+    out = output.print_results(output.results)
+    assert 'W: undefined-symbol-not-provided /usr/bin/appletviewer JLI_Launch' in out
+    assert out.count('undefined-symbol-not-provided') == 1
+    saved = SymbolIndex.load(tmp_path / 'saved.json')
+    assert saved.provider('libc.so.6') == 'glibc'
+    assert '/usr/bin/appletviewer' in saved.files['appletviewer']
+
+    # the index is saved, but the undefined symbols are not reported
+    output, test = libdependencycheck_with_index(tmp_path, base_index, check_undefined_symbols=False)
+    test.check(AppletviewerPackage)
+    test.after_checks()
+    assert 'undefined-symbol-not-provided' not in output.print_results(output.results)
+    saved = SymbolIndex.load(tmp_path / 'saved.json')
+    assert '/usr/bin/appletviewer' in saved.files['appletviewer']
+
+
+def test_devel_dependency_from_index(tmp_path):
+    base_index = SymbolIndex()
+    base_index.add_library('libfoo1', 'libfoo.so.1', [], ['foo'])
+    output, test = libdependencycheck_with_index(tmp_path, base_index)
+    test.check(LibfooDevelPackage)
+    test.after_checks()
+    out = output.print_results(output.results)
+    assert 'E: no-library-dependency-on libfoo1 /usr/lib/libfoo.so.1' in out
+    assert 'no-library-dependency-for' not in out
+
+    output, test = libdependencycheck_with_index(tmp_path, base_index)
+    test.check(LibfooDevelRequiresPackage)
+    test.after_checks()
+    assert 'no-library-dependency' not in output.print_results(output.results)
+
+
+def test_index_kept_for_the_run(indexingcheck):
+    output, test = indexingcheck
+    test.check(Shlib2DevelPackage)
+    test.reset()
+    test.check(AppletviewerPackage)
+    assert test.symbol_index.provider('libfoo.so.1') == 'shlib2-devel'
+    assert set(test.symbol_index.files) == {'shlib2-devel', 'appletviewer'}
+    test.after_checks()
+    assert test.symbol_index.files == {}
+
+
+def test_merge_collected_data(indexingcheck):
+    output, test = indexingcheck
+    worker = LibraryDependencyCheck(test.config, Filter(test.config))
+    worker.check(Shlib2DevelPackage)
+    worker.reset()
+    worker.check(AppletviewerPackage)
+    # only the package checked since the reset
+    # it is stored in the package cache as JSON
+    data = json.loads(json.dumps(worker.collected_data()))
+    assert list(data['libraries']) == ['lib.so']
+    assert list(data['files']) == ['appletviewer']
+    test.merge_collected_data(data)
+    assert test.symbol_index.files['appletviewer'] == worker.symbol_index.files['appletviewer']
+    assert test.symbol_index.libraries['lib.so'] == worker.symbol_index.libraries['lib.so']
+    test.clear_collected_data()
+    assert test.symbol_index.files == {}
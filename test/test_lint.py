@@ -1,6 +1,8 @@
+from itertools import groupby
 from pathlib import Path
 
 import pytest
+from rpmlint.cache import ResultCache
 from rpmlint.lint import Lint
 from rpmlint.spellcheck import ENCHANT
 
@@ -24,7 +26,9 @@ options_preset = {
     'time_report': False,
     'profile': False,
     'ignore_unused_rpmlintrc': False,
-    'checks': None
+    'checks': None,
+    'jobs': 1,
+    'stream': False,
 }
 
 basic_tests = [
@@ -288,6 +292,152 @@ def test_run_strict(capsys, packages):
     assert not err
 
 
+@pytest.mark.parametrize('packages', [[
+    Path('test/binary/bad-crc-uncompressed-1.0-9.1.x86_64.rpm'),
+    Path('test/binary/ruby2.5-rubygem-rubyzip-testsuite-1.2.1-0.x86_64.rpm'),
+    Path('test/binary/ruby2.6-rubygem-fast_gettext-2.0.1-1.1.x86_64.rpm'),
+    Path('test/source/wrongsrc-0-0.src.rpm'),
+]])
+def test_run_parallel(capsys, packages):
+    """
+    Test that checking packages in worker processes gives the same output
+    as checking them one by one
+    """
+    outputs = []
+    for jobs in (1, 3):
+        additional_options = {
+            'rpmfile': packages,
+            'jobs': jobs,
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.checks = _remove_except_zip(linter.checks)
+        retcode = linter.run()
+        out, err = capsys.readouterr()
+        assert '4 packages and 0 specfiles checked' in out
+        assert not err
+        # the last line contains the duration of the run
+        outputs.append((retcode, out.splitlines()[:-1], linter.output.score))
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize('packages', [[
+    Path('test/binary/bad-crc-uncompressed-1.0-9.1.x86_64.rpm'),
+    Path('test/binary/ruby2.5-rubygem-rubyzip-testsuite-1.2.1-0.x86_64.rpm'),
+    Path('test/binary/ruby2.6-rubygem-fast_gettext-2.0.1-1.1.x86_64.rpm'),
+    Path('test/source/wrongsrc-0-0.src.rpm'),
+]])
+def test_run_stream(capsys, packages):
+    """
+    Test that the streamed output contains the same messages as the output
+    printed at the end, grouped by the packages in the sorted order
+    """
+    outputs = []
+    for stream in (False, True):
+        additional_options = {
+            'rpmfile': packages,
+            'stream': stream,
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.checks = _remove_except_zip(linter.checks)
+        retcode = linter.run()
+        out, err = capsys.readouterr()
+        assert '4 packages and 0 specfiles checked' in out
+        assert not err
+        # the last line contains the duration of the run
+        outputs.append((retcode, out.splitlines()[:-1], linter.output.score))
+    assert outputs[0][0] == outputs[1][0]
+    assert outputs[0][2] == outputs[1][2]
+    assert sorted(outputs[0][1]) == sorted(outputs[1][1])
+
+    # the messages of every package are printed out together
+    names = [line.split(':')[0] for line in outputs[1][1] if ': E: ' in line or ': W: ' in line]
+    assert names
+    assert [name for name, _ in groupby(names)] == sorted(set(names))
+
+
+@pytest.mark.parametrize('packages', [[
+    Path('test/binary/bad-crc-uncompressed-1.0-9.1.x86_64.rpm'),
+    Path('test/binary/python311-pytest-xprocess-0.23.0-2.4.noarch.rpm'),
+    Path('test/binary/ruby2.6-rubygem-fast_gettext-2.0.1-1.1.x86_64.rpm'),
+    Path('test/source/wrongsrc-0-0.src.rpm'),
+]])
+def test_run_lazy_extraction(capsys, packages):
+    """
+    Test that extracting only the files read by checks gives the same output
+    as extracting the whole payload
+    """
+    outputs = []
+    for lazy in (False, True):
+        additional_options = {
+            'rpmfile': packages,
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.config.configuration['LazyExtraction'] = lazy
+        retcode = linter.run()
+        out, err = capsys.readouterr()
+        assert '4 packages and 0 specfiles checked' in out
+        # the last line contains the duration of the run
+        outputs.append((retcode, out.splitlines()[:-1], linter.output.score))
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize('packages', [[
+    Path('test/binary/bad-crc-uncompressed-1.0-9.1.x86_64.rpm'),
+    Path('test/binary/python311-pytest-xprocess-0.23.0-2.4.noarch.rpm'),
+    Path('test/source/wrongsrc-0-0.src.rpm'),
+]])
+def test_run_package_cache(capsys, tmp_path, packages):
+    """
+    Test that the output replayed from the package cache is the same as the
+    output of the checks
+    """
+    outputs = []
+    for run in range(2):
+        additional_options = {
+            'rpmfile': packages,
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.package_cache = ResultCache(tmp_path / 'packages.sqlite', 100)
+        if run:
+            # the cached packages are not extracted at all, only the last
+            # package is always checked
+            check_rpm = linter._check_rpm
+            linter._check_rpm = lambda pname, is_last, check_rpm=check_rpm: check_rpm(pname, is_last) if is_last else \
+                pytest.fail(f'{pname} checked again')
+        retcode = linter.run()
+        out, err = capsys.readouterr()
+        assert '3 packages and 0 specfiles checked' in out
+        # the last line contains the duration of the run
+        outputs.append((retcode, out.splitlines()[:-1], linter.output.score))
+    assert linter.package_cache.hits == 2
+    assert outputs[0] == outputs[1]
+
+
+
+def test_package_cache_collected_data(tmp_path):
+    """
+    Test that the data collected for after_checks is merged from the package
+    cache too
+    """
+    package = Path('test/binary/libtest-1.0-0.x86_64.rpm')
+    config = tmp_path / 'index.toml'
+    config.write_text('CheckUndefinedSymbols = true\n')
+    indexes = []
+    for run in range(2):
+        options = {**options_preset, 'rpmfile': [package], 'checks': 'LibraryDependencyCheck',
+                   'config': TEST_CONFIG + [config]}
+        linter = Lint(options)
+        linter.package_cache = ResultCache(tmp_path / 'packages.sqlite', 100)
+        linter.validate_file(package, False)
+        indexes.append(linter.checks['LibraryDependencyCheck'].symbol_index.files)
+    assert linter.package_cache.hits == 1
+    assert indexes[0]
+    assert indexes[0] == indexes[1]
+
 @pytest.mark.skipif(not HAS_RPMDB, reason='No RPM database present')
 def test_run_installed_not_present(capsys):
     additional_options = {
@@ -2,9 +2,10 @@ from pathlib import Path
 
 import pytest
 from rpmlint.checks.BinariesCheck import BinariesCheck
+from rpmlint.filemagic import get_magic
 from rpmlint.filter import Filter
 from rpmlint.objdumpparser import ObjdumpParser
-from rpmlint.pkg import FakePkg, get_magic
+from rpmlint.pkg import FakePkg
 
 from Testing import CONFIG, get_tested_path, IS_X86_64
 
@@ -28,8 +29,9 @@ def objdumpparser(path, system_path=None):
 
 
 def run_elf_checks(test, pkg, pkgfile):
-    test._detect_attributes(get_magic(pkgfile.path))
-    test.run_elf_checks(pkg, pkgfile)
+    elf = test.analyse_elf(pkg, pkgfile, get_magic(pkgfile.path))
+    test.run_elf_checks(pkg, pkgfile, elf)
+    return elf
 
 
 def test_basic():
@@ -43,6 +45,34 @@ def test_basic():
     assert first['language'] == '32769\t(MIPS assembler)'
 
 
+def test_relocatable_archive():
+    # the string offsets of the object files are stored in the relocations
+    objdump = objdumpparser('archive-with-debuginfo.a')
+    assert not objdump.parsing_failed_reason
+    assert objdump.compile_units == [{
+        'producer': 'GNU C17 9.1.1 20190805 [gcc-9-branch revision 274114] -mtune=generic -march=x86-64 -g',
+        'language': '12\t(ANSI C99)',
+        'name': 'main.c',
+        'comp_dir': '/tmp',
+    }]
+
+
+def test_dwarf5_and_colon():
+    objdump = objdumpparser('libgame.so')
+    assert not objdump.parsing_failed_reason
+    assert [unit['name'] for unit in objdump.compile_units] == ['crti.S', 'crtn.S']
+    assert objdump.compile_units[0]['comp_dir'] == '/home/abuild/rpmbuild/BUILD/glibc-2.34/csu'
+
+    objdump = objdumpparser('libbsd-ctor.a')
+    assert objdump.compile_units[0]['comp_dir'] == '/home/marxin/BIG/osc/openSUSE:Factory/libbsd/libbsd-0.9.1/src'
+
+
+def test_objdump_parser_failure():
+    objdump = objdumpparser('not-existing-file')
+    assert 'not-existing-file' in objdump.parsing_failed_reason
+    assert not objdump.compile_units
+
+
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
 def test_executable_stack_package(binariescheck):
     output, test = binariescheck
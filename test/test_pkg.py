@@ -1,10 +1,12 @@
 import os
+from pathlib import Path
 import subprocess
 import unittest.mock as mock
 
 import pytest
 import rpm
-from rpmlint.pkg import parse_deps, rangeCompare
+from rpmlint.payload import extract_payload, UnsupportedPayloadError
+from rpmlint.pkg import parse_deps, Pkg, rangeCompare
 
 from Testing import get_tested_package
 
@@ -36,7 +38,8 @@ def test_extract_fail(package, tmp_path):
     permissions to some files.
     """
 
-    with mock.patch('shutil.which') as mock_which:
+    with mock.patch('shutil.which') as mock_which, \
+            mock.patch('rpmlint.pkg.extract_payload', side_effect=UnsupportedPayloadError):
         mock_which.return_value = None
         # the package cannot be extracted using rpm2cpio because it contains a directory without 'x' permission
         with pytest.raises(subprocess.CalledProcessError) as exc:
@@ -44,3 +47,97 @@ def test_extract_fail(package, tmp_path):
         mock_which.assert_called_once_with('rpm2archive')
         # check that it was rpm2cpio what failed
         assert exc.match(r'rpm2cpio .*')
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
+def test_extract_payload(package, tmp_path):
+    """
+    Check that the payload is extracted natively with readable files even
+    if the package contains a directory without 'x' permission.
+    """
+
+    pkg = get_tested_package(package, tmp_path)
+    assert 'DecompressRpm' in pkg.timers
+    for pkgfile in pkg.files.values():
+        if not pkgfile.is_ghost:
+            assert os.path.lexists(pkgfile.path)
+            if os.path.isfile(pkgfile.path):
+                assert os.access(pkgfile.path, os.R_OK)
+
+
+def test_extract_payload_wanted(tmp_path):
+    rpm_file = next((Path(__file__).parent / 'binary').glob('python311-pytest-xprocess-*.rpm'))
+    extract_payload(rpm_file, tmp_path, wanted=lambda name: name.endswith('/PKG-INFO'))
+    extracted = [p for p in tmp_path.rglob('*') if p.is_file()]
+    assert extracted
+    assert all(p.name == 'PKG-INFO' for p in extracted)
+
+
+def _cpio_entry(name, mode, content=b''):
+    name = name.encode() + b'\0'
+    fields = (1, mode, 0, 0, 1, 0, len(content), 0, 0, 0, 0, len(name), 0)
+    header = b'070701' + b''.join(b'%08x' % field for field in fields) + name
+    return header + b'\0' * (-len(header) % 4) + content + b'\0' * (-len(content) % 4)
+
+
+def _write_rpm(path, entries):
+    """Write a minimal RPM file with an uncompressed cpio payload."""
+    empty_header = b'\x8e\xad\xe8\x01' + b'\0' * 12
+    payload = b''.join(_cpio_entry(*entry) for entry in entries) + _cpio_entry('TRAILER!!!', 0)
+    path.write_bytes(b'\0' * 96 + empty_header + empty_header + payload)
+
+
+def test_extract_payload_symlink_traversal(tmp_path):
+    rpm_file = tmp_path / 'evil.rpm'
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    _write_rpm(rpm_file, [('./usr/lib/foo', 0o120777, str(outside).encode()),
+                          ('./usr/lib/foo/pwned', 0o100644, b'pwned\n'),
+                          ('./usr/lib/bar', 0o100644, b'bar\n')])
+    dirname = tmp_path / 'extracted'
+    dirname.mkdir()
+    extract_payload(rpm_file, dirname)
+    assert not (outside / 'pwned').exists()
+    assert (dirname / 'usr/lib/foo').is_symlink()
+    assert (dirname / 'usr/lib/bar').read_text() == 'bar\n'
+
+    # the symlink of an earlier (lazy) extraction is not followed either
+    extract_payload(rpm_file, dirname, wanted=lambda name: name == '/usr/lib/foo/pwned')
+    assert not (outside / 'pwned').exists()
+
+
+def test_extract_payload_over_directory(tmp_path):
+    rpm_file = tmp_path / 'clash.rpm'
+    _write_rpm(rpm_file, [('./usr/lib/foo', 0o40755),
+                          ('./usr/lib/foo/bar', 0o100644, b'bar\n'),
+                          ('./usr/lib/foo', 0o120777, b'/tmp'),
+                          ('./usr/lib/foo', 0o100644, b'foo\n')])
+    dirname = tmp_path / 'extracted'
+    dirname.mkdir()
+    extract_payload(rpm_file, dirname)
+    # the entries clashing with the directory are skipped
+    assert (dirname / 'usr/lib/foo').is_dir()
+    assert not (dirname / 'usr/lib/foo').is_symlink()
+    assert (dirname / 'usr/lib/foo/bar').read_text() == 'bar\n'
+
+
+def test_lazy_extraction(tmp_path):
+    rpm_file = next((Path(__file__).parent / 'binary').glob('python311-pytest-xprocess-*.rpm'))
+    with Pkg(rpm_file, tmp_path, lazy=True) as pkg:
+        assert pkg.lazy
+        metadata = '/usr/lib/python3.11/site-packages/pytest_xprocess-0.23.0-py3.11.egg-info/PKG-INFO'
+        readme = '/usr/share/doc/packages/python311-pytest-xprocess/README.rst'
+        # only files without magic in the header are extracted (for libmagic)
+        assert not Path(pkg.files[metadata]._path).exists()
+        assert Path(pkg.files[metadata].path).is_file()
+        assert not Path(pkg.files[readme]._path).exists()
+
+        # the head is captured without extracting the file
+        pkg.extract_files((), {readme: 10})
+        assert not Path(pkg.files[readme]._path).exists()
+        assert len(pkg.file_head(readme, 10)) == 10
+        assert pkg.file_head(readme, 20) is None
+
+        # the directory is extracted with its content
+        egginfo = str(Path(metadata).parent)
+        assert len(list(Path(pkg.files[egginfo].path).iterdir())) > 1
@@ -1,10 +1,13 @@
 from pathlib import Path
 import re
+import struct
 
 import pytest
 from rpmlint.checks.BinariesCheck import BinariesCheck
+from rpmlint.elffile import ElfError, ElfFile
+from rpmlint.filemagic import get_magic
 from rpmlint.filter import Filter
-from rpmlint.pkg import FakePkg, get_magic
+from rpmlint.pkg import FakePkg
 from rpmlint.pkgfile import PkgFile
 from rpmlint.readelfparser import ReadelfParser
 
@@ -30,8 +33,9 @@ def readelfparser(path, system_path=None):
 
 
 def run_elf_checks(test, pkg, pkgfile):
-    test._detect_attributes(get_magic(pkgfile.path))
-    test.run_elf_checks(pkg, pkgfile)
+    elf = test.analyse_elf(pkg, pkgfile, get_magic(pkgfile.path))
+    test.run_elf_checks(pkg, pkgfile, elf)
+    return elf
 
 
 def test_empty_archive():
@@ -52,6 +56,18 @@ def test_simple_archive():
     assert len(list(readelf.symbol_table_info.get_functions_for_regex(re.compile('mai.')))) == 1
 
 
+def test_corrupt_section_count():
+    ident = b'\x7fELF\x02\x01\x01' + b'\0' * 9
+    # no section entry size and the section count taken from section 0
+    ehdr = struct.pack('<HHIQQQIHHHHHH', 1, 62, 1, 0, 64, 64, 0, 64, 56, 0xffff, 0, 0, 0)
+    shdr0 = struct.pack('<IIQQQQIIQQ', 0, 0, 0, 0, 0, 2 ** 63, 0, 0xffff, 0, 0)
+    elf = ElfFile(ident + ehdr + shdr0)
+    with pytest.raises(ElfError):
+        elf.sections
+    with pytest.raises(ElfError):
+        elf.segments
+
+
 def test_program_header_parsing():
     readelf = readelfparser('nested-function')
     assert len(readelf.program_header_info.headers) == 11
@@ -76,6 +92,18 @@ def test_dynamic_section_parsing():
     assert readelf.dynamic_section_info.soname == 'libutil.so.1'
     assert len(readelf.dynamic_section_info.needed) == 1
     assert readelf.dynamic_section_info.needed[0] == 'libc.so.6'
+    assert readelf.dynamic_section_info['FLAGS_1'] == ['Flags: NOW']
+    assert readelf.dynamic_section_info['RELAENT'] == ['24 (bytes)']
+
+
+def test_symbol_versions():
+    readelf = readelfparser('libutil-2.29.so', '/lib64/libutil-2.29.so')
+    functions = readelf.symbol_table_info.functions
+    # undefined dynamic symbol required from a versioned library
+    assert '_exit@GLIBC_2.2.5' in functions
+    # defined dynamic symbol
+    assert 'openpty@@GLIBC_2.2.5' in functions
+    assert '__GI_openpty' in functions
 
 
 def test_rpath():
@@ -90,8 +118,8 @@ def test_lto_bytecode(binariescheck):
     output, test = binariescheck
     with FakePkg('fake') as pkg:
         pkgfile = pkg.add_file(get_full_path('lto-object.o'), 'x.a')
-        run_elf_checks(test, pkg, pkgfile)
-        assert not test.readelf_parser.parsing_failed_reason()
+        elf = run_elf_checks(test, pkg, pkgfile)
+        assert not elf.readelf_parser.parsing_failed_reason()
         out = output.print_results(output.results)
         assert 'lto-bytecode' in out
 
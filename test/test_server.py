@@ -0,0 +1,121 @@
+import json
+import multiprocessing
+from pathlib import Path
+import socket
+import stat
+import time
+
+import pytest
+from rpmlint.lint import Lint
+from rpmlint.server import LintServer, run_client
+
+from Testing import get_tested_path
+
+TEST_CONFIG = [get_tested_path('configs/test.config')]
+TEST_RPMLINTRC = get_tested_path('configs/testing2-rpmlintrc')
+TEST_SPEC = get_tested_path('rpmlintrc/single/sample.spec')
+
+options_preset = {
+    'config': TEST_CONFIG,
+    'verbose': False,
+    'strict': False,
+    'permissive': False,
+    'print_config': False,
+    'explain': '',
+    'rpmfile': [],
+    'rpmlintrc': None,
+    'installed': '',
+    'time_report': False,
+    'profile': False,
+    'ignore_unused_rpmlintrc': False,
+    'checks': 'AlternativesCheck',
+    'jobs': 1,
+    'stream': False,
+}
+
+
+@pytest.fixture
+def server_socket(tmp_path):
+    socket_path = tmp_path / 'rpmlint.socket'
+    server = LintServer(Lint(options_preset), socket_path)
+    process = multiprocessing.get_context('fork').Process(target=server.serve_forever, daemon=True)
+    process.start()
+    for _ in range(500):
+        if socket_path.exists():
+            break
+        time.sleep(0.01)
+    yield socket_path
+    process.terminate()
+    process.join()
+
+
+def test_serve_requests(capsys, server_socket):
+    options = {**options_preset, 'rpmfile': [TEST_SPEC], 'rpmlintrc': [TEST_RPMLINTRC]}
+    assert run_client(server_socket, options) == 64
+    out, err = capsys.readouterr()
+    assert 'E: unused-rpmlintrc-filter "I am not used"' in out
+    assert '0 packages and 1 specfiles checked; 3 errors' in out
+    assert not err
+
+    # the rpmlintrc of the previous request is not used anymore, the spec
+    # file directory has its own one
+    options = {**options_preset, 'rpmfile': [TEST_SPEC]}
+    assert run_client(server_socket, options) == 0
+    out, err = capsys.readouterr()
+    assert 'unused-rpmlintrc-filter "I am not used"' not in out
+    assert '0 packages and 1 specfiles checked; 0 errors' in out
+    assert not err
+
+    options = {**options_preset, 'rpmfile': [TEST_SPEC], 'rpmlintrc': [TEST_RPMLINTRC], 'permissive': True}
+    assert run_client(server_socket, options) == 0
+    out, _ = capsys.readouterr()
+    assert '0 packages and 1 specfiles checked; 3 errors' in out
+
+
+def test_serve_request_with_jobs(capsys, server_socket):
+    options = {**options_preset, 'rpmfile': [TEST_SPEC]}
+    assert run_client(server_socket, options) == 0
+    first, _ = capsys.readouterr()
+    # the packages are still checked in the server process
+    assert run_client(server_socket, {**options, 'jobs': 4}) == 0
+    second, err = capsys.readouterr()
+    assert '0 packages and 1 specfiles checked; 0 errors' in second
+    # the last line contains the duration of the run
+    assert second.splitlines()[:-1] == first.splitlines()[:-1]
+    assert not err
+    with pytest.raises(ValueError):
+        LintServer.request_options({'options': {'jobs': 4}})
+
+
+def test_socket_permissions(server_socket):
+    assert stat.S_IMODE(server_socket.stat().st_mode) == 0o600
+
+
+def test_invalid_request(server_socket):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(server_socket))
+        with client.makefile('rw', encoding='utf-8') as f:
+            f.write(json.dumps({'options': {'config': ['other.toml']}}) + '\n')
+            f.flush()
+            messages = [json.loads(line) for line in f]
+    assert messages == [{'stderr': 'invalid request: unsupported options: config\n'}, {'exit': 2}]
+
+
+def test_no_server(capsys, tmp_path):
+    assert run_client(tmp_path / 'missing.socket', options_preset) == 3
+    _, err = capsys.readouterr()
+    assert 'cannot connect to the rpmlint server' in err
+
+
+def test_socket_path_exists(tmp_path):
+    path = tmp_path / 'file'
+    path.write_text('')
+    with pytest.raises(FileExistsError):
+        LintServer(None, path).serve_forever()
+
+
+def test_request_options():
+    options = LintServer.request_options({'options': {'rpmfile': ['/tmp/a.rpm'], 'rpmlintrc': None}})
+    assert options == {'rpmfile': [Path('/tmp/a.rpm')], 'rpmlintrc': None}
+    with pytest.raises(ValueError):
+        LintServer.request_options({'options': {'checks': 'TagsCheck'}})
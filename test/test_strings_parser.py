@@ -0,0 +1,58 @@
+import re
+
+from rpmlint.stringsparser import StringsParser
+
+from Testing import get_tested_path
+
+
+def test_strings(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(b'abc\0abcd\0\x01first\tline\nsecond\xffmore')
+    assert list(StringsParser(str(path))) == ['abcd', 'first\tline', 'second', 'more']
+
+
+def test_elf_scanned_as_whole():
+    strings = list(StringsParser(str(get_tested_path('ldd/libtirpc.so.3.0.0'))))
+    assert 'libtirpc.so.3' in strings
+    assert 'clnt_create' in strings
+    # the sections that are not loaded are scanned too (as by strings)
+    assert '.gnu_debuglink' in strings
+
+
+def test_archive_scanned_as_whole():
+    strings = list(StringsParser(str(get_tested_path('files/reiserfs/libreiserfscore.a'))))
+    assert strings[0] == '!<arch>'
+    assert len(strings) == 13335
+
+
+def test_search(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(b'\0'.join([b'PROFILE=SYSTEM', b'other'] + [b'x' * 10] * 1000))
+    parser = StringsParser(str(path))
+    patterns = {'profile': re.compile('PROFILE=SYSTEM'), 'other': re.compile('^oth'),
+                'missing': re.compile('missing')}
+    assert parser.search(patterns) == {'profile', 'other'}
+    assert parser.search({}) == set()
+    assert not parser.parsing_failed_reason
+
+
+def test_search_stops_when_all_found(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(b'\0'.join([b'first', b'second', b'third']))
+    parser = StringsParser(str(path))
+    scanned = []
+
+    class Recorder:
+        def search(self, string):
+            scanned.append(string)
+            return string == 'second'
+
+    assert parser.search({'second': Recorder()}) == {'second'}
+    assert scanned == ['first', 'second']
+
+
+def test_strings_failure(tmp_path):
+    parser = StringsParser(str(tmp_path / 'missing'))
+    assert parser.parsing_failed_reason.endswith('No such file')
+    assert list(parser) == []
+    assert parser.search({'a': re.compile('a')}) == set()
@@ -0,0 +1,76 @@
+import pickle
+
+import pytest
+from rpmlint.symbolindex import SymbolIndex, SymbolIndexError
+
+
+def make_index():
+    index = SymbolIndex()
+    index.add_library('glibc', 'libc.so.6', ['ld-linux-x86-64.so.2'], ['printf', 'malloc'])
+    index.add_library('glibc', 'ld-linux-x86-64.so.2', [], ['__tls_get_addr'])
+    index.add_library('libfoo1', 'libfoo.so.1', ['libc.so.6'], ['foo', 'foo_init'])
+    index.add_file('app', '/usr/bin/app', ['libfoo.so.1'], ['foo', 'printf', '__tls_get_addr', 'bar'], True)
+    index.add_file('app', '/usr/bin/other', ['libbar.so.2', 'libc.so.6'], ['bar'], True)
+    return index
+
+
+def test_lookups():
+    index = make_index()
+    assert index.provider('libfoo.so.1') == 'libfoo1'
+    assert index.provider('libbar.so.2') is None
+    assert index.symbol_providers('foo') == {'libfoo.so.1'}
+    assert index.symbol_providers('missing') == set()
+    assert index.dependency_closure(['libfoo.so.1']) == {'libfoo.so.1', 'libc.so.6', 'ld-linux-x86-64.so.2'}
+    assert index.dependency_closure(['libbar.so.2', 'libc.so.6']) is None
+    app = index.files['app']
+    assert index.unresolved_symbols(app['/usr/bin/app']) == ['bar']
+    # libbar.so.2 is not indexed
+    assert index.unresolved_symbols(app['/usr/bin/other']) is None
+
+
+def test_replaced_library():
+    index = make_index()
+    index.add_library('libfoo2', 'libfoo.so.1', ['libc.so.6'], ['foo_init'])
+    assert index.provider('libfoo.so.1') == 'libfoo2'
+    assert index.symbol_providers('foo') == set()
+    assert index.unresolved_symbols(index.files['app']['/usr/bin/app']) == ['foo', 'bar']
+
+
+def test_base_index():
+    index = SymbolIndex(make_index())
+    index.add_library('libfoo2', 'libfoo.so.1', [], ['bar'])
+    index.add_library('libbaz', 'libbaz.so.0', [], ['baz'])
+    assert index.provider('libc.so.6') == 'glibc'
+    assert index.provider('libfoo.so.1') == 'libfoo2'
+    # the libraries replaced in the index do not provide the base symbols
+    assert index.symbol_providers('foo') == set()
+    assert index.symbol_providers('bar') == {'libfoo.so.1'}
+    assert index.symbol_providers('printf') == {'libc.so.6'}
+    assert index.files == {}
+    data = index.to_dict()
+    assert set(data['libraries']) == {'libc.so.6', 'ld-linux-x86-64.so.2', 'libfoo.so.1', 'libbaz.so.0'}
+    assert data['libraries']['libfoo.so.1'] == ['libfoo2', [], ['bar']]
+    assert set(data['files']['app']) == {'/usr/bin/app', '/usr/bin/other'}
+
+
+@pytest.mark.parametrize('name', ['index.json', 'index.json.gz'])
+def test_save_and_load(tmp_path, name):
+    index = make_index()
+    index.save(tmp_path / name)
+    loaded = SymbolIndex.load(tmp_path / name)
+    assert loaded.to_dict() == index.to_dict()
+    assert loaded.libraries == index.libraries
+    assert loaded.files == index.files
+    assert loaded.symbol_providers('printf') == {'libc.so.6'}
+    assert pickle.loads(pickle.dumps(loaded.libraries)) == index.libraries
+
+
+def test_load_failure(tmp_path):
+    with pytest.raises(SymbolIndexError, match='cannot load symbol index'):
+        SymbolIndex.load(tmp_path / 'missing.json')
+    (tmp_path / 'bad.json').write_text('{"version": 99}')
+    with pytest.raises(SymbolIndexError, match='unsupported format'):
+        SymbolIndex.load(tmp_path / 'bad.json')
+    (tmp_path / 'bad.json').write_text('{"version": 1, "libraries": {"libc.so.6": 1}, "files": {}}')
+    with pytest.raises(SymbolIndexError, match='invalid symbol index'):
+        SymbolIndex.load(tmp_path / 'bad.json')
@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+
+# Measure the memory used by the file list of a package with a very large
+# number of files (kernel-devel like). The FileTable of Pkg is compared with
+# the dict of fully decoded PkgFile objects and the lists of the config, doc,
+# ghost, noreplace and missingok files that rpmlint used before. The memory
+# is measured by tracemalloc, the raw header arrays are not included.
+#
+# Usage: tools/benchmark-filetable.py [--files 200000]
+
+import argparse
+import gc
+from pathlib import Path
+import random
+import stat
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import rpm  # noqa: E402
+from rpmlint.pkg import Pkg  # noqa: E402
+from rpmlint.pkgfile import PkgFile  # noqa: E402
+
+ATTRIBUTES = ('flags', 'mode', 'user', 'group', 'linkto', 'size', 'md5',
+              'mtime', 'rdev', 'inode', 'requires', 'provides', 'lang',
+              'magic', 'filecaps', 'path', 'extract')
+FLAGS = ('CONFIG', 'DOC', 'GHOST', 'NOREPLACE', 'MISSINGOK')
+
+
+class HeaderPkg(Pkg):
+    """Pkg with the file list from the given header, no file is read."""
+
+    def __init__(self, header):
+        self.header = header
+        self.lazy = False
+        self.dirname = '/tmp/benchmark-filetable'
+        self._pending_files = set()
+        self.files = self._gather_files_info()
+        for flag in FLAGS:
+            setattr(self, f'{flag.lower()}_files',
+                    self.files.names_with_flags(getattr(rpm, f'RPMFILE_{flag}')))
+
+
+def generate_header(count):
+    version = '6.10.11-200.fc40.x86_64'
+    dirs = [f'/usr/src/kernels/{version}/{top}/{sub}'
+            for top in ('include', 'arch/x86', 'drivers', 'scripts', 'tools')
+            for sub in range(count // 200 + 1)]
+    names = [f'{random.choice(dirs)}/file{i}.{random.choice("hcS")}' for i in range(count)]
+    special = (rpm.RPMFILE_DOC, rpm.RPMFILE_CONFIG | rpm.RPMFILE_NOREPLACE,
+               rpm.RPMFILE_GHOST | rpm.RPMFILE_MISSINGOK)
+    flags = [random.choice((0,) * 20 + special) for _ in range(count)]
+    header = {
+        rpm.RPMTAG_FILENAMES: [name.encode() for name in names],
+        rpm.RPMTAG_FILEFLAGS: flags,
+        rpm.RPMTAG_FILEMODES: [stat.S_IFREG | 0o644] * count,
+        rpm.RPMTAG_FILEUSERNAME: [b'root'] * count,
+        rpm.RPMTAG_FILEGROUPNAME: [b'root'] * count,
+        rpm.RPMTAG_FILELINKTOS: [b''] * count,
+        rpm.RPMTAG_FILESIZES: [random.randrange(100000) for _ in range(count)],
+        rpm.RPMTAG_FILEMD5S: [f'{random.getrandbits(256):064x}' for _ in range(count)],
+        rpm.RPMTAG_FILEMTIMES: [1700000000 + random.randrange(1000000) for _ in range(count)],
+        rpm.RPMTAG_FILERDEVS: [0] * count,
+        rpm.RPMTAG_FILEINODES: list(range(1, count + 1)),
+        rpm.RPMTAG_FILEREQUIRE: [b''] * count,
+        rpm.RPMTAG_FILEPROVIDE: [b''] * count,
+        rpm.RPMTAG_FILELANGS: [b''] * count,
+        rpm.RPMTAG_FILECLASS: [b'C source, ASCII text'] * count,
+        rpm.RPMTAG_FILECAPS: [b''] * count,
+    }
+    return names, header
+
+
+def legacy_files(header):
+    """Return the dict of PkgFile objects and the lists of the file flags."""
+    table = HeaderPkg(header)
+    files = {}
+    for name, entry in table.files.items():
+        pkgfile = files[name] = PkgFile(name)
+        for attribute in ATTRIBUTES:
+            setattr(pkgfile, attribute, getattr(entry, attribute))
+    flag_lists = [[pkgfile.name for pkgfile in files.values() if pkgfile.flags & getattr(rpm, f'RPMFILE_{flag}')]
+                  for flag in FLAGS]
+    return files, flag_lists
+
+
+def measure(function, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current
+
+
+def touch_modes(pkg):
+    for pkgfile in pkg.files.values():
+        pkgfile.mode
+    return pkg
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memory used by the package file list')
+    parser.add_argument('--files', type=int, default=200000, help='number of files')
+    parser.add_argument('--lookups', type=int, default=1000,
+                        help='number of membership tests of the doc files')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    random.seed(options.seed)
+    names, header = generate_header(options.files)
+    mb = 1024 * 1024
+
+    (legacy, flag_lists), legacy_size = measure(legacy_files, header)
+    print(f'dict of PkgFile: {legacy_size / mb:.1f} MB ({legacy_size / options.files:.0f} B per file)')
+    pkg, table_size = measure(HeaderPkg, header)
+    print(f'FileTable: {table_size / mb:.1f} MB ({table_size / options.files:.0f} B per file)')
+    _, touched_size = measure(touch_modes, pkg)
+    print(f'FileTable after reading the mode of every file: {(table_size + touched_size) / mb:.1f} MB')
+
+    probes = random.sample(names, min(options.lookups, len(names)))
+    for label, doc_files in (('list', flag_lists[1]), ('FileFlagSet', pkg.doc_files)):
+        start = time.perf_counter()
+        found = sum(1 for name in probes if name in doc_files)
+        elapsed = time.perf_counter() - start
+        print(f'{len(probes)} doc file lookups ({found} found) in {label}: {elapsed * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
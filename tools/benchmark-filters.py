@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+# Measure the cost of the rpmlintrc filters (addFilter) on a large number of
+# messages. The messages are matched by the FilterMatcher used by rpmlint and
+# by the plain loop over all filter regexes, which is timed only for a sample
+# of messages (it would take hours for all of them) and extrapolated.
+#
+# Usage: tools/benchmark-filters.py [--filters 10000] [--messages 1000000]
+
+import argparse
+from pathlib import Path
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rpmlint.filter import Diagnostic, FilterMatcher  # noqa: E402
+from rpmlint.filter import Filter  # noqa: E402
+
+
+def generate_packages(count):
+    packages = set()
+    while len(packages) < count:
+        prefix = random.choice(['', '', 'lib', 'python3-', 'perl-', 'ghc-'])
+        name = ''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 12)))
+        packages.add(f'{prefix}{name}')
+    return sorted(packages)
+
+
+def generate_filters(count, issues, packages):
+    filters = []
+    for i in range(count):
+        issue = random.choice(issues)
+        package = random.choice(packages)
+        style = i % 100
+        if style < 40:
+            filters.append(f'{package}\\.x86_64: [EW]: {issue}')
+        elif style < 70:
+            filters.append(f'W: {issue} /usr/lib64/lib{package}\\.so\\.{i}')
+        elif style < 90:
+            filters.append(f'.*{issue}.*{package}-{i}.*')
+        elif style < 98:
+            filters.append(f'({package}|{random.choice(packages)})\\.(x86_64|noarch): E: ')
+        elif style < 99:
+            filters.append(f'(?i){package}\\.(x86_64|noarch): E: {issue}-{i}')
+        else:
+            # no literal can be extracted from these
+            filters.append(f'^{package[:3]}[a-z0-9]*: W')
+    return filters
+
+
+def generate_messages(count, issues, packages):
+    for _ in range(count):
+        package = random.choice(packages)
+        issue = random.choice(issues)
+        details = f'/usr/lib64/lib{package}.so.{random.randrange(20000)}'
+        yield Diagnostic(package, 'x86_64', None, random.choice('EW'), issue, details, 0).plain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rpmlintrc filters')
+    parser.add_argument('--filters', type=int, default=10000, help='number of filters')
+    parser.add_argument('--messages', type=int, default=1000000, help='number of messages')
+    parser.add_argument('--sample', type=int, default=1000,
+                        help='number of messages matched by all the filters one by one')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    random.seed(options.seed)
+    issues = sorted(Filter._load_descriptions())
+    packages = generate_packages(2000)
+    filters = generate_filters(options.filters, issues, packages)
+
+    start = time.perf_counter()
+    regexes = [re.compile(f) for f in filters]
+    matcher = FilterMatcher(regexes)
+    print(f'{len(filters)} filters compiled and indexed in {time.perf_counter() - start:.2f} s '
+          f'({len(matcher.combined)} combined, {len(matcher.unindexed)} unindexed)')
+
+    messages = list(generate_messages(options.messages, issues, packages))
+
+    start = time.perf_counter()
+    matched = sum(1 for text in messages if matcher.search(text) is not None)
+    elapsed = time.perf_counter() - start
+    print(f'FilterMatcher: {len(messages)} messages ({matched} filtered out) in {elapsed:.2f} s')
+
+    sample = messages[:options.sample]
+    start = time.perf_counter()
+    for text in sample:
+        expected = next((regex for regex in regexes if regex.search(text)), None)
+        if matcher.search(text) is not expected:
+            sys.exit(f'FilterMatcher result differs for {text}')
+    elapsed = (time.perf_counter() - start) * len(messages) / len(sample)
+    print(f'one by one: {len(messages)} messages in {elapsed:.2f} s (estimated from {len(sample)} messages)')
+
+
+if __name__ == '__main__':
+    main()